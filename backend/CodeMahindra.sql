@@ -208,3 +208,79 @@ CREATE TABLE IF NOT EXISTS Suggestion_Resource (
     resource_id INTEGER REFERENCES Resource(id),
     PRIMARY KEY (suggestion_id, resource_id)
 );
+
+CREATE TABLE IF NOT EXISTS "Solution_TestCase_Result" (
+    solution_id INTEGER REFERENCES "Solution"(id) ON DELETE CASCADE,
+    position SMALLINT,
+    testcase_id INTEGER REFERENCES "TestCase"(id) ON DELETE SET NULL,
+    verdict VARCHAR(2) NOT NULL,
+    time FLOAT,
+    memory INTEGER,
+    output TEXT,
+    error_details TEXT,
+    PRIMARY KEY (solution_id, position)
+);
+
+ALTER TABLE "Problem" ADD COLUMN IF NOT EXISTS checker VARCHAR(10) NOT NULL DEFAULT 'lines';
+ALTER TABLE "Problem" ADD COLUMN IF NOT EXISTS checker_epsilon FLOAT;
+
+CREATE TABLE IF NOT EXISTS "Regrade_Job" (
+    id SERIAL PRIMARY KEY,
+    problem_id INTEGER NOT NULL REFERENCES "Problem"(id) ON DELETE CASCADE,
+    strategy VARCHAR(10) NOT NULL DEFAULT 'latest',
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    total INTEGER NOT NULL DEFAULT 0,
+    processed INTEGER NOT NULL DEFAULT 0,
+    changed INTEGER NOT NULL DEFAULT 0,
+    last_solution_id INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT now(),
+    heartbeat_at TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "Regrade_Job_status_idx" ON "Regrade_Job" (status);
+
+CREATE TABLE IF NOT EXISTS "Problem_Best_Solution" (
+    problem_id INTEGER REFERENCES "Problem"(id) ON DELETE CASCADE,
+    employee_id UUID REFERENCES "Employee"(id) ON DELETE CASCADE,
+    solution_id INTEGER NOT NULL REFERENCES "Solution"(id) ON DELETE CASCADE,
+    "testCasesPassed" INTEGER NOT NULL DEFAULT 0,
+    "executionTime" FLOAT,
+    PRIMARY KEY (problem_id, employee_id)
+);
+CREATE INDEX IF NOT EXISTS "Problem_Best_Solution_rank_idx"
+    ON "Problem_Best_Solution" (problem_id, "testCasesPassed" DESC, "executionTime" ASC, solution_id);
+
+-- Backfill from existing solutions
+INSERT INTO "Problem_Best_Solution" (problem_id, employee_id, solution_id, "testCasesPassed", "executionTime")
+SELECT DISTINCT ON (problem_id, employee_id) problem_id, employee_id, id, "testCasesPassed", "executionTime"
+FROM "Solution"
+ORDER BY problem_id, employee_id, "testCasesPassed" DESC, "executionTime" ASC, id ASC
+ON CONFLICT (problem_id, employee_id) DO NOTHING;
+
+CREATE INDEX IF NOT EXISTS "Employee_experience_rank_idx"
+    ON "Employee" (experience DESC, id);
+
+CREATE INDEX IF NOT EXISTS "Employee_XP_History_employee_date_idx"
+    ON "Employee_XP_History" (employee_id, date, id);
+
+-- Experience awarded by a record; NULL: the difference with the previous record
+ALTER TABLE "Employee_XP_History" ADD COLUMN IF NOT EXISTS gained INTEGER;
+
+CREATE TABLE IF NOT EXISTS "Employee_XP_Daily" (
+    day DATE,
+    employee_id UUID REFERENCES "Employee"(id) ON DELETE CASCADE,
+    xp INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, employee_id)
+);
+
+-- Backfill: a record is worth what it awarded, otherwise (running totals) the difference with the
+-- previous one; an employee's first record is their starting total and is worth nothing
+INSERT INTO "Employee_XP_Daily" (day, employee_id, xp)
+SELECT CAST(date AS DATE), employee_id, SUM(gained)
+FROM (
+    SELECT employee_id, date,
+           COALESCE(gained, experience - LAG(experience) OVER (PARTITION BY employee_id ORDER BY date, id), 0) AS gained
+    FROM "Employee_XP_History"
+) deltas
+GROUP BY CAST(date AS DATE), employee_id
+ON CONFLICT (day, employee_id) DO NOTHING;
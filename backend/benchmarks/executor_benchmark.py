@@ -0,0 +1,79 @@
+"""
+Throughput benchmark for the code executors.
+
+Run from backend/:
+    python -m benchmarks.executor_benchmark --executor local --submissions 20 --cases 25
+    python -m benchmarks.executor_benchmark --executor judge0 --language C++
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from services.executor import Judge0Executor
+
+SAMPLES = {
+    'Python': "n = int(input())\nprint(sum(range(n + 1)))\n",
+    'C++': (
+        "#include <iostream>\n"
+        "int main() { long long n; std::cin >> n; std::cout << n * (n + 1) / 2 << std::endl; }\n"
+    ),
+    'Java': (
+        "import java.util.Scanner;\n"
+        "public class Main { public static void main(String[] a) {\n"
+        "  long n = new Scanner(System.in).nextLong(); System.out.println(n * (n + 1) / 2); } }\n"
+    ),
+    'Javascript': (
+        "const n = BigInt(require('fs').readFileSync(0, 'utf8').trim());\n"
+        "console.log((n * (n + 1n) / 2n).toString());\n"
+    ),
+}
+
+
+def build_executor(name: str, workers: int):
+    if name == 'local':
+        from services.local_executor import LocalProcessExecutor
+        return LocalProcessExecutor(max_workers=workers)
+    return Judge0Executor()
+
+
+async def run_benchmark(args):
+    executor = build_executor(args.executor, args.workers)
+    source_code = SAMPLES[args.language]
+    cases = [(str(n), str(n * (n + 1) // 2)) for n in range(1, args.cases + 1)]
+    latencies = []
+
+    async def one_submission():
+        started = time.perf_counter()
+        results = await executor.execute_many(source_code, args.language, cases)
+        latencies.append(time.perf_counter() - started)
+        return results
+
+    await executor.start()
+    started = time.perf_counter()
+    all_results = await asyncio.gather(*(one_submission() for _ in range(args.submissions)))
+    elapsed = time.perf_counter() - started
+    await executor.close()
+
+    runs = args.submissions * args.cases
+    accepted = sum(1 for results in all_results for r in results if r.get('status', {}).get('id') == 3)
+    latencies.sort()
+    print(f"executor={args.executor} language={args.language} submissions={args.submissions} cases={args.cases}")
+    print(f"accepted runs:     {accepted}/{runs}")
+    print(f"wall time:         {elapsed:.2f}s")
+    print(f"throughput:        {runs / elapsed:.1f} test cases/s, {args.submissions / elapsed:.2f} submissions/s")
+    print(f"submission p50:    {statistics.median(latencies):.3f}s")
+    print(f"submission p95:    {latencies[int(0.95 * (len(latencies) - 1))]:.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure code executor throughput")
+    parser.add_argument('--executor', choices=['local', 'judge0'], default='local')
+    parser.add_argument('--language', choices=sorted(SAMPLES), default='Python')
+    parser.add_argument('--submissions', type=int, default=10)
+    parser.add_argument('--cases', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=None, help="local executor worker count")
+    asyncio.run(run_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from uuid import UUID
 from passlib.context import CryptContext
 from models.problem import Problem
 from models.employee_problem import EmployeeProblem
+from controllers.ranking_controller import publish_experience_changes
 
 # Contexto para hashear contraseñas
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -49,16 +50,20 @@ def create_employee(employee_data: EmployeeCreate, db: Session) -> Employee:
     db.add(new_employee)
     db.commit()
     db.refresh(new_employee)
+    publish_experience_changes(db, {new_employee.id: new_employee.experience})
     return new_employee
 
 def update_employee(employee_id: UUID, employee_data: EmployeeUpdate, db: Session) -> Employee:
     employee = db.query(Employee).filter(Employee.id == employee_id).first()
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
-    for key, value in employee_data.dict(exclude_unset=True).items():
+    changes = employee_data.dict(exclude_unset=True)
+    for key, value in changes.items():
         setattr(employee, key, value)
     db.commit()
     db.refresh(employee)
+    if "experience" in changes:
+        publish_experience_changes(db, {employee.id: employee.experience})
     return employee
 
 def delete_employee(employee_id: UUID, db: Session):
@@ -67,6 +72,7 @@ def delete_employee(employee_id: UUID, db: Session):
         raise HTTPException(status_code=404, detail="Employee not found")
     db.delete(employee)
     db.commit()
+    publish_experience_changes(db, {employee_id: None})
 
 def set_admin_status(employee_id: UUID, is_admin: bool, db: Session) -> Employee:
     employee = db.query(Employee).filter(Employee.id == employee_id).first()
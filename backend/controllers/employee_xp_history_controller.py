@@ -1,12 +1,77 @@
+from datetime import datetime
 from fastapi import HTTPException
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
+from database import dialect_insert
+from models.employee_xp_daily import EmployeeXPDaily
 from models.employee_xp_history import EmployeeXPHistory
 from schemas.employee_xp_history import EmployeeXPHistoryCreate, EmployeeXPHistoryUpdate
 from uuid import UUID
 
-def create_xp_record(db: Session, record: EmployeeXPHistoryCreate):
-    db_record = EmployeeXPHistory(**record.dict())
+def _neighbour(db: Session, record: EmployeeXPHistory, before: bool):
+    # The employee's record right before/after `record`, by (date, id)
+    query = db.query(EmployeeXPHistory).filter(EmployeeXPHistory.employee_id == record.employee_id)
+    if before:
+        return (
+            query.filter(or_(
+                EmployeeXPHistory.date < record.date,
+                and_(EmployeeXPHistory.date == record.date, EmployeeXPHistory.id < record.id)
+            ))
+            .order_by(EmployeeXPHistory.date.desc(), EmployeeXPHistory.id.desc())
+            .first()
+        )
+    return (
+        query.filter(or_(
+            EmployeeXPHistory.date > record.date,
+            and_(EmployeeXPHistory.date == record.date, EmployeeXPHistory.id > record.id)
+        ))
+        .order_by(EmployeeXPHistory.date.asc(), EmployeeXPHistory.id.asc())
+        .first()
+    )
+
+def _add_daily_xp(db: Session, employee_id: UUID, day, xp: int):
+    if not xp:
+        return
+    stmt = dialect_insert(db, EmployeeXPDaily).values(employee_id=employee_id, day=day, xp=xp)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[EmployeeXPDaily.day, EmployeeXPDaily.employee_id],
+        set_={'xp': EmployeeXPDaily.xp + stmt.excluded.xp}
+    ))
+
+def _worth(record: EmployeeXPHistory, previous: EmployeeXPHistory | None) -> int:
+    # A record that stores what it awarded is worth that. Otherwise records
+    # hold the running experience total, and an employee's first record is
+    # where their total started (seeded or set by hand), not a gain.
+    if record.gained is not None:
+        return record.gained
+    return record.experience - previous.experience if previous is not None else 0
+
+def roll_up_xp_record(db: Session, record: EmployeeXPHistory, sign: int = 1):
+    """
+    Apply (sign=1) or withdraw (sign=-1) a flushed history record's share
+    of Employee_XP_Daily. The record may also change what the next record
+    is worth.
+    """
+    previous = _neighbour(db, record, before=True)
+    following = _neighbour(db, record, before=False)
+    _add_daily_xp(db, record.employee_id, record.date.date(), sign * _worth(record, previous))
+    if following is not None:
+        shift = _worth(following, record) - _worth(following, previous)
+        _add_daily_xp(db, record.employee_id, following.date.date(), sign * shift)
+
+def add_xp_record(db: Session, employee_id: UUID, experience: int, date: datetime = None, gained: int = None) -> EmployeeXPHistory:
+    """
+    Add a history record and its rollup to the session's transaction (no
+    commit). `gained` is the experience just awarded, stored on the record.
+    """
+    db_record = EmployeeXPHistory(employee_id=employee_id, experience=experience, gained=gained, date=date or datetime.utcnow())
     db.add(db_record)
+    db.flush()
+    roll_up_xp_record(db, db_record)
+    return db_record
+
+def create_xp_record(db: Session, record: EmployeeXPHistoryCreate):
+    db_record = add_xp_record(db, record.employee_id, record.experience)
     db.commit()
     db.refresh(db_record)
     return db_record
@@ -29,7 +94,11 @@ def update_xp_record(db: Session, record_id: int, updated: EmployeeXPHistoryUpda
     record = db.query(EmployeeXPHistory).filter(EmployeeXPHistory.id == record_id).first()
     if not record:
         raise HTTPException(status_code=404, detail="Record not found")
+    roll_up_xp_record(db, record, sign=-1)
+    # A total set by hand: worth its difference with the previous record
     record.experience = updated.experience
+    record.gained = None
+    roll_up_xp_record(db, record)
     db.commit()
     db.refresh(record)
     return record
@@ -38,6 +107,7 @@ def delete_xp_record(db: Session, record_id: int):
     record = db.query(EmployeeXPHistory).filter(EmployeeXPHistory.id == record_id).first()
     if not record:
         raise HTTPException(status_code=404, detail="Record not found")
+    roll_up_xp_record(db, record, sign=-1)
     db.delete(record)
     db.commit()
     return {"message": "Record deleted"}
@@ -1,7 +1,6 @@
 from sqlalchemy import asc, desc, func
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
-from models.employee_xp_history import EmployeeXPHistory
 from models.employee import Employee
 from models.solution import Solution
 from models.problem import Problem
@@ -12,6 +11,11 @@ from schemas.problem_with_testcases import TestCaseCreate  # Import TestCaseCrea
 from datetime import datetime
 from models.testcase import TestCase
 from typing import List
+from services.reference_cache import reference_cache
+from services.submission_cache import submission_cache
+from services.leaderboard_cache import leaderboard_cache
+from controllers.ranking_controller import publish_experience_changes
+from controllers.employee_xp_history_controller import add_xp_record
 
 def get_all_problems(db: Session) -> List[Problem]:
     return db.query(Problem).all()
@@ -33,10 +37,21 @@ def update_problem(problem_id: int, data: ProblemUpdate, db: Session) -> Problem
     problem = db.query(Problem).filter(Problem.id == problem_id).first()
     if not problem:
         raise HTTPException(status_code=404, detail="Problem not found")
-    for key, value in data.dict(exclude_unset=True).items():
+    changes = data.dict(exclude_unset=True)
+    reference_changed = any(
+        key in changes and changes[key] != getattr(problem, key)
+        for key in ('solution', 'language')
+    )
+    for key, value in changes.items():
         setattr(problem, key, value)
     db.commit()
     db.refresh(problem)
+    if reference_changed:
+        # Cached expected outputs for custom inputs came from the old reference solution
+        reference_cache.invalidate_problem(problem_id)
+    if 'checker' in changes or 'checker_epsilon' in changes:
+        # Reused verdicts were decided by the old comparison rules
+        submission_cache.invalidate_problem(problem_id)
     return problem
     
 def delete_problem(problem_id: int, db: Session):
@@ -47,6 +62,9 @@ def delete_problem(problem_id: int, db: Session):
         
         db.delete(problem)
         db.commit()
+        reference_cache.invalidate_problem(problem_id)
+        submission_cache.invalidate_problem(problem_id)
+        leaderboard_cache.invalidate_problem(problem_id)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to delete problem: {str(e)}")
@@ -65,6 +83,8 @@ def create_problem_with_testcases(data: ProblemCreateWithTestCases, db: Session)
         expirationDate=data.expirationDate,
         solution=data.solution,
         language=data.language,
+        checker=data.checker,
+        checker_epsilon=data.checker_epsilon,
         successful_submissions=0,
         total_submissions=0
     )
@@ -133,7 +153,7 @@ def grade_problem(problem_id: int, db: Session) -> ProblemGradingResult:
                     partition_by=Solution.employee_id,
                     order_by=(
                         desc(Solution.testCasesPassed),
-                        asc(Solution.executionTime),
+                        asc(Solution.executionTime).nulls_last(),
                         asc(Solution.submissionDate)
                     )
                 ).label("rank")
@@ -156,7 +176,7 @@ def grade_problem(problem_id: int, db: Session) -> ProblemGradingResult:
             .filter(Solution.id.in_(top_solution_ids))
             .order_by(
                 desc(Solution.testCasesPassed),
-                asc(Solution.executionTime),
+                asc(Solution.executionTime).nulls_last(),
                 asc(Solution.submissionDate)
             )
             .limit(3)
@@ -166,6 +186,7 @@ def grade_problem(problem_id: int, db: Session) -> ProblemGradingResult:
         result = ProblemGradingResult(
             message=f"Graded {len(top_solutions)} submission(s)"
         )
+        rewarded = {}
 
         for i, solution in enumerate(top_solutions):
             reward = rewards[i] if i < len(rewards) else 0
@@ -183,38 +204,26 @@ def grade_problem(problem_id: int, db: Session) -> ProblemGradingResult:
                         for member in team_members:
                             member.coins += reward_per_member
                             member.experience += reward_per_member
-                            db.add(EmployeeXPHistory(
-                                employee_id=member.id,
-                                experience=member.experience,
-                                date=datetime.utcnow()
-                            ))
+                            rewarded[member.id] = member.experience
+                            add_xp_record(db, member.id, member.experience, gained=reward_per_member)
                     else:
                         # No members found, give reward to original employee
                         employee.coins += reward
                         employee.experience += reward
-                        db.add(EmployeeXPHistory(
-                            employee_id=employee.id,
-                            experience=employee.experience,
-                            date=datetime.utcnow()
-                        ))
+                        rewarded[employee.id] = employee.experience
+                        add_xp_record(db, employee.id, employee.experience, gained=reward)
                 else:
                     # Team doesn't exist anymore or is terminated
                     employee.coins += reward
                     employee.experience += reward
-                    db.add(EmployeeXPHistory(
-                        employee_id=employee.id,
-                        experience=employee.experience,
-                        date=datetime.utcnow()
-                    ))
+                    rewarded[employee.id] = employee.experience
+                    add_xp_record(db, employee.id, employee.experience, gained=reward)
             else:
                 # Individual solution
                 employee.coins += reward
                 employee.experience += reward
-                db.add(EmployeeXPHistory(
-                    employee_id=employee.id,
-                    experience=employee.experience,
-                    date=datetime.utcnow()
-                ))
+                rewarded[employee.id] = employee.experience
+                add_xp_record(db, employee.id, employee.experience, gained=reward)
 
             if i == 0:
                 result.first_place = employee.id
@@ -228,6 +237,7 @@ def grade_problem(problem_id: int, db: Session) -> ProblemGradingResult:
 
         problem.was_graded = True
         db.commit()
+        publish_experience_changes(db, rewarded)
         return result
 
     except Exception as e:
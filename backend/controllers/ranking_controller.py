@@ -1,31 +1,324 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import and_, case, func, or_, text
 from sqlalchemy.orm import Session
+from database import SessionLocal, engine
 from models.employee import Employee
-from schemas.ranking import EmployeeRankingOut
-from typing import List
+from models.employee_xp_daily import EmployeeXPDaily
+from models.position import Position
+from models.team import Team
+from schemas.ranking import EmployeeRankingOut, EmployeeWindowRankingOut
+from services.ranking_index import (
+    RANKING_INDEX_CONFIG,
+    NotificationListener,
+    decode_notification,
+    encode_notifications,
+    ranking_index
+)
+from typing import Dict, List, Optional
+from uuid import UUID
 
-def get_profile_image(emp: Employee) -> str | None:
-    return emp.profilePicture if emp.profilePicture else None
+# Cross-worker updates of ranking_index (PostgreSQL only)
+_listener: Optional[NotificationListener] = None
 
-def get_employee_ranking(db: Session) -> List[EmployeeRankingOut]:
-    employees = (
-        db.query(Employee)
+# Columns of a ranking entry; Position and Team are joined in the same query
+# instead of being lazy-loaded for every employee
+RANKING_COLUMNS = (
+    Employee.id,
+    Employee.firstName,
+    Employee.lastName,
+    Employee.email,
+    Employee.profilePicture,
+    Employee.profileEpic,
+    Employee.experience,
+    Employee.nationality,
+    Position.positionName,
+    Team.name.label("teamName"),
+)
+
+def ranking_rows(db: Session, *extra_columns):
+    return (
+        db.query(*RANKING_COLUMNS, *extra_columns)
+        .outerjoin(Position, Employee.position_id == Position.id)
+        .outerjoin(Team, Employee.team_id == Team.id)
+    )
+
+def get_profile_image(row) -> str | None:
+    return row.profilePicture if row.profilePicture else None
+
+def ranking_entry(row, rank: int, profile_epic: str | None = None) -> EmployeeRankingOut:
+    return EmployeeRankingOut(
+        id=row.id,
+        name=f"{row.firstName} {row.lastName}".strip() or row.email,
+        profileEpic=profile_epic if profile_epic is not None else get_profile_image(row),  # Usamos la función que te protege de basura
+        experience=row.experience,
+        position=row.positionName,
+        team=row.teamName,
+        rank=rank,
+        firstName=row.firstName,
+        lastName=row.lastName,
+        nationality=row.nationality
+    )
+
+def get_employee_ranking(db: Session, limit: Optional[int] = None, offset: int = 0) -> List[EmployeeRankingOut]:
+    """The whole ranking, or `limit` entries from position `offset`."""
+    if ranking_index.ready:
+        return _indexed_ranking_page(db, limit, offset)
+
+    # rank() is computed over the whole ranked set before the page is cut, so
+    # ties share a position on every page; id keeps page boundaries stable.
+    # Both follow Employee_experience_rank_idx.
+    rank = func.rank().over(order_by=Employee.experience.desc()).label("rank")
+    rows = (
+        ranking_rows(db, rank)
         .filter(Employee.experience > 0)
-        .order_by(Employee.experience.desc())
+        .order_by(Employee.experience.desc(), Employee.id)
+        .offset(offset)
+        .limit(limit)
         .all()
     )
 
+    return [ranking_entry(row, row.rank) for row in rows]
+
+def _indexed_ranking_page(db: Session, limit: Optional[int], offset: int) -> List[EmployeeRankingOut]:
+    # Order and ranks come from the index; only the page's employees are loaded
+    return _indexed_entries(db, ranking_index.page(len(ranking_index) if limit is None else limit, offset))
+
+def _indexed_entries(db: Session, page) -> List[EmployeeRankingOut]:
+    if not page:
+        return []
+    rows = {
+        row.id: row
+        for row in ranking_rows(db).filter(Employee.id.in_([employee_id for employee_id, _, _ in page]))
+    }
     return [
-        EmployeeRankingOut(
-            id=emp.id,
-            name=f"{emp.firstName} {emp.lastName}".strip() or emp.email,
-            profileEpic=get_profile_image(emp),  # Usamos la función que te protege de basura
-            experience=emp.experience,
-            position=emp.position.name if emp.position else None,
-            team=emp.team.name if emp.team else None,
-            rank=index + 1,
-            firstName=emp.firstName,
-            lastName=emp.lastName,
-            nationality=emp.nationality
+        ranking_entry(rows[employee_id], rank)
+        for employee_id, _, rank in page
+        if employee_id in rows
+    ]
+
+def get_employee_ranking_entry(db: Session, employee: Employee) -> EmployeeRankingOut:
+    """Ranking entry of one employee, ranked or not."""
+    row = ranking_rows(db).filter(Employee.id == employee.id).one()
+    rank = get_employee_rank(db, employee)
+    if (row.experience or 0) > 0:
+        return ranking_entry(row, rank, profile_epic=row.profilePicture)
+    # Unranked: placed right after the last ranked employee
+    return ranking_entry(row, rank, profile_epic=row.profileEpic or row.profilePicture)
+
+def get_ranking_around(db: Session, employee_id: UUID, k: int = 5) -> List[EmployeeRankingOut]:
+    """
+    The employee's ranking entry with up to `k` employees above and below,
+    in ranking order. An unranked employee (no experience) comes after the
+    last `k` ranked ones. O(k) rows, from the index or keyset queries.
+    """
+    employee = db.query(Employee).filter(Employee.id == employee_id).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    ranked = (employee.experience or 0) > 0
+
+    if ranking_index.ready:
+        entries = _indexed_entries(db, ranking_index.around(employee.id, k))
+    elif ranked:
+        entries = _ranking_around_sql(db, employee, k)
+    else:
+        last = (
+            ranking_rows(db)
+            .filter(Employee.experience > 0)
+            .order_by(Employee.experience.asc(), Employee.id.desc())
+            .limit(k)
+            .all()
         )
-        for index, emp in enumerate(employees)
-    ]
\ No newline at end of file
+        entries = _ranked_sequence(db, list(reversed(last)))
+
+    if not ranked:
+        entries.append(get_employee_ranking_entry(db, employee))
+    return entries
+
+def _ranking_around_sql(db: Session, employee: Employee, k: int) -> List[EmployeeRankingOut]:
+    # Keyset reads on either side of (experience, id), along Employee_experience_rank_idx
+    experience, employee_id = employee.experience, employee.id
+    above = (
+        ranking_rows(db)
+        .filter(or_(
+            Employee.experience > experience,
+            and_(Employee.experience == experience, Employee.id < employee_id)
+        ))
+        .order_by(Employee.experience.asc(), Employee.id.desc())
+        .limit(k)
+        .all()
+    )
+    below = (
+        ranking_rows(db)
+        .filter(or_(
+            and_(Employee.experience < experience, Employee.experience > 0),
+            and_(Employee.experience == experience, Employee.id > employee_id)
+        ))
+        .order_by(Employee.experience.desc(), Employee.id)
+        .limit(k)
+        .all()
+    )
+    own = ranking_rows(db).filter(Employee.id == employee_id).all()
+    return _ranked_sequence(db, list(reversed(above)) + own + below)
+
+def _ranked_sequence(db: Session, rows) -> List[EmployeeRankingOut]:
+    """Ranks for consecutive rows of the ranking, from one count of what precedes the first."""
+    if not rows:
+        return []
+    first = rows[0]
+    ahead, tied_before = db.query(
+        func.coalesce(func.sum(case((Employee.experience > first.experience, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((and_(Employee.experience == first.experience, Employee.id < first.id), 1), else_=0)), 0)
+    ).filter(Employee.experience >= first.experience).one()
+
+    entries = []
+    position = ahead + tied_before
+    rank = ahead + 1
+    previous = first.experience
+    for row in rows:
+        if row.experience != previous:
+            # Everything before this row has more experience
+            rank = position + 1
+            previous = row.experience
+        entries.append(ranking_entry(row, rank))
+        position += 1
+    return entries
+
+def window_start(window: str, today: date | None = None) -> date:
+    """First (UTC) day of the current week (Monday) or month."""
+    today = today or datetime.utcnow().date()
+    if window == "week":
+        return today - timedelta(days=today.weekday())
+    if window == "month":
+        return today.replace(day=1)
+    raise ValueError(f"Unknown ranking window '{window}'")
+
+def get_windowed_ranking(db: Session, window: str, limit: int = 100, offset: int = 0) -> List[EmployeeWindowRankingOut]:
+    """
+    Employees ranked by experience gained this week or month, summed from
+    the Employee_XP_Daily rollups (one row per employee and active day).
+    """
+    start = window_start(window)
+    gained = (
+        db.query(EmployeeXPDaily.employee_id, func.sum(EmployeeXPDaily.xp).label("gained"))
+        .filter(EmployeeXPDaily.day >= start)
+        .group_by(EmployeeXPDaily.employee_id)
+        .having(func.sum(EmployeeXPDaily.xp) > 0)
+        .subquery()
+    )
+    rank = func.rank().over(order_by=gained.c.gained.desc()).label("rank")
+    rows = (
+        ranking_rows(db, gained.c.gained, rank)
+        .join(gained, gained.c.employee_id == Employee.id)
+        .order_by(gained.c.gained.desc(), Employee.id)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+    return [
+        EmployeeWindowRankingOut(
+            **ranking_entry(row, row.rank).dict(),
+            gainedExperience=row.gained,
+            windowStart=start
+        )
+        for row in rows
+    ]
+
+def get_employee_rank(db: Session, employee: Employee) -> int:
+    """
+    Position of `employee` in the ranking: one more than the number of
+    employees with more experience. Employees without experience are not
+    ranked and are placed right after the last ranked one.
+    """
+    if ranking_index.ready:
+        return ranking_index.rank_for_experience(employee.experience)
+
+    experience = employee.experience or 0
+    if experience <= 0:
+        ahead = db.query(func.count(Employee.id)).filter(Employee.experience > 0).scalar()
+    else:
+        ahead = db.query(func.count(Employee.id)).filter(Employee.experience > experience).scalar()
+    return ahead + 1
+
+def publish_experience_changes(db: Session, changes: Dict[UUID, Optional[int]]):
+    """
+    Call after committing experience changes ({employee id: experience, or
+    None when deleted}). Updates this worker's index and tells the others,
+    which re-read the employees from the database. Never raises: the write
+    has already succeeded.
+    """
+    if not changes or not RANKING_INDEX_CONFIG['enabled']:
+        return
+    for employee_id, experience in changes.items():
+        ranking_index.update(employee_id, experience)
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    try:
+        for payload in encode_notifications(ranking_index.token, changes):
+            db.execute(text("SELECT pg_notify(:channel, :payload)"), {
+                "channel": RANKING_INDEX_CONFIG['channel'],
+                "payload": payload
+            })
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Could not publish ranking changes: {e}")
+
+def _load_ranking_index():
+    db = SessionLocal()
+    try:
+        ranking_index.load(
+            db.query(Employee.id, Employee.experience).filter(Employee.experience > 0).yield_per(5000)
+        )
+    finally:
+        db.close()
+
+def _apply_notification(payload: str):
+    token, employee_ids = decode_notification(payload)
+    if token == ranking_index.token or not employee_ids:
+        return
+    db = SessionLocal()
+    try:
+        found = dict(db.query(Employee.id, Employee.experience).filter(Employee.id.in_(employee_ids)))
+    finally:
+        db.close()
+    for employee_id in employee_ids:
+        ranking_index.update(employee_id, found.get(employee_id))
+
+def _connect_listener():
+    # A connection of its own, outside the pool: it stays in LISTEN mode
+    args, kwargs = engine.dialect.create_connect_args(engine.url)
+    return engine.dialect.connect(*args, **kwargs)
+
+async def start_ranking_index():
+    """Warm the ranking index and follow other workers' changes (called from the app lifespan)."""
+    global _listener
+    if not RANKING_INDEX_CONFIG['enabled']:
+        return
+    if engine.dialect.name == "postgresql":
+        # The listener loads the index once LISTEN is active, and again after every reconnect
+        _listener = NotificationListener(
+            _connect_listener,
+            RANKING_INDEX_CONFIG['channel'],
+            on_notify=_apply_notification,
+            on_connect=_load_ranking_index,
+            on_disconnect=ranking_index.invalidate
+        )
+        _listener.start()
+        return
+    try:
+        await asyncio.to_thread(_load_ranking_index)
+    except Exception as e:
+        print(f"⚠️ Could not load the ranking index: {e}")
+
+async def stop_ranking_index():
+    global _listener
+    if _listener is not None:
+        await asyncio.to_thread(_listener.stop)
+        _listener = None
+    ranking_index.invalidate()
+
+def get_ranking_index_stats() -> dict:
+    return ranking_index.stats()
@@ -0,0 +1,407 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from controllers.solution_controller import (
+    judge_submission,
+    load_problem_checker,
+    load_testcases,
+    rebuild_best_solutions,
+    results_reusable,
+    summarize_results,
+    testcase_result_rows
+)
+from database import SessionLocal, dialect_insert
+from models.employee_problem import EmployeeProblem
+from models.problem import Problem
+from models.regrade_job import RegradeJob
+from models.solution import Solution
+from models.solution_testcase_result import SolutionTestCaseResult
+from schemas.regrade_job import RegradeRequest
+from schemas.solution import Submission
+from services.leaderboard_cache import leaderboard_cache
+from services.execution_scheduler import (
+    PRIORITY_GRADED,
+    PRIORITY_PRACTICE,
+    PRIORITY_REGRADE,
+    execution_context,
+    execution_scheduler
+)
+
+REGRADE_CONFIG = {
+    # Solutions judged at the same time by one job
+    'concurrency': int(os.getenv('REGRADE_CONCURRENCY', '2')),
+    # Solutions per committed batch (progress is saved after each one)
+    'batch_size': int(os.getenv('REGRADE_BATCH_SIZE', '20')),
+    # Pause between batches, on top of the scheduler's priority
+    'pause': float(os.getenv('REGRADE_PAUSE', '0')),
+    # While live runs are queued, regrades wait this long before checking again
+    'yield_interval': float(os.getenv('REGRADE_YIELD_INTERVAL', '0.5')),
+    # Judge unavailable: retry the batch after this many seconds, this many times
+    'retry_after': float(os.getenv('REGRADE_RETRY_AFTER', '15')),
+    'max_retries': int(os.getenv('REGRADE_MAX_RETRIES', '5')),
+    # A running job without a heartbeat for this long is taken over by another worker
+    'stale_after': float(os.getenv('REGRADE_STALE_AFTER', '300')),
+}
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+# Jobs running in this worker
+_regrade_tasks: Dict[int, asyncio.Task] = {}
+
+
+class RegradeRetryLater(Exception):
+    """The judge could not give a trustworthy verdict; the batch is retried later."""
+
+
+def regrade_targets(problem_id: int, strategy: str):
+    """Ids of the solution to re-judge for every employee who submitted to the problem."""
+    if strategy == 'best':
+        order_by = [Solution.testCasesPassed.desc(), Solution.executionTime.asc().nulls_last(), Solution.id.desc()]
+    else:
+        order_by = [Solution.submissionDate.desc(), Solution.id.desc()]
+    ranked = (
+        select(
+            Solution.id,
+            func.row_number().over(partition_by=Solution.employee_id, order_by=order_by).label('position')
+        )
+        .where(Solution.problem_id == problem_id)
+        .subquery()
+    )
+    return select(ranked.c.id).where(ranked.c.position == 1)
+
+
+def get_regrade_job(job_id: int, db: Session) -> RegradeJob:
+    job = db.query(RegradeJob).filter(RegradeJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Regrade job not found")
+    return job
+
+
+def start_regrade(problem_id: int, data: RegradeRequest, db: Session) -> RegradeJob:
+    """
+    Queue a regrade of a problem's solutions against its current test
+    cases and run it in the background of this worker.
+    """
+    if not db.query(Problem.id).filter(Problem.id == problem_id).first():
+        raise HTTPException(status_code=404, detail="Problem not found")
+    load_testcases(problem_id, db)  # 404 when there is nothing to judge against
+
+    running = db.query(RegradeJob).filter(
+        RegradeJob.problem_id == problem_id, RegradeJob.status.in_(ACTIVE_STATUSES)
+    ).first()
+    if running:
+        raise HTTPException(status_code=409, detail=f"Regrade job {running.id} is already running for this problem")
+
+    total = db.execute(select(func.count()).select_from(regrade_targets(problem_id, data.strategy).subquery())).scalar()
+    job = RegradeJob(problem_id=problem_id, strategy=data.strategy, status='queued', total=total)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _spawn(job.id)
+    return job
+
+
+def cancel_regrade(job_id: int, db: Session) -> RegradeJob:
+    job = get_regrade_job(job_id, db)
+    if job.status in ACTIVE_STATUSES:
+        # The job's worker stops before its next batch
+        job.status = 'cancelled'
+        db.commit()
+        db.refresh(job)
+    return job
+
+
+def _spawn(job_id: int):
+    if job_id not in _regrade_tasks:
+        task = asyncio.create_task(_run_regrade(job_id))
+        _regrade_tasks[job_id] = task
+        task.add_done_callback(lambda _: _regrade_tasks.pop(job_id, None))
+
+
+async def resume_regrade_jobs():
+    """Pick up jobs left unfinished by a restart (called from the app lifespan)."""
+    try:
+        job_ids = await asyncio.to_thread(_active_job_ids)
+    except Exception as e:
+        print(f"⚠️ Could not resume regrade jobs: {e}")
+        return
+    for job_id in job_ids:
+        _spawn(job_id)
+
+
+async def stop_regrade_jobs():
+    job_ids = list(_regrade_tasks)
+    for task in list(_regrade_tasks.values()):
+        task.cancel()
+    await asyncio.gather(*_regrade_tasks.values(), return_exceptions=True)
+    if job_ids:
+        # Hand the jobs back so the next start (of any worker) resumes them right away
+        await asyncio.to_thread(_release_jobs, job_ids)
+
+
+def _active_job_ids() -> List[int]:
+    db = SessionLocal()
+    try:
+        return [job_id for (job_id,) in db.query(RegradeJob.id).filter(RegradeJob.status.in_(ACTIVE_STATUSES))]
+    finally:
+        db.close()
+
+
+def _release_jobs(job_ids: List[int]):
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(RegradeJob)
+            .where(RegradeJob.id.in_(job_ids), RegradeJob.status == 'running')
+            .values(status='queued', heartbeat_at=None)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _claim_job(job_id: int) -> Optional[dict]:
+    """Mark the job as ours; None when it is finished or another worker holds it."""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=REGRADE_CONFIG['stale_after'])
+        claimed = db.execute(
+            update(RegradeJob)
+            .where(
+                RegradeJob.id == job_id,
+                or_(
+                    RegradeJob.status == 'queued',
+                    (RegradeJob.status == 'running') & or_(RegradeJob.heartbeat_at.is_(None), RegradeJob.heartbeat_at < stale)
+                )
+            )
+            .values(status='running', heartbeat_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return None
+        job = get_regrade_job(job_id, db)
+        return {
+            'problem_id': job.problem_id,
+            'strategy': job.strategy,
+            'testcases': load_testcases(job.problem_id, db),
+            'checker': load_problem_checker(job.problem_id, db),
+        }
+    finally:
+        db.close()
+
+
+def _next_batch(job_id: int, problem_id: int, strategy: str) -> Optional[List[Solution]]:
+    """The next solutions after the job's cursor; None once the job was cancelled."""
+    db = SessionLocal()
+    try:
+        job = get_regrade_job(job_id, db)
+        if job.status != 'running':
+            return None
+        job.heartbeat_at = datetime.utcnow()
+        db.commit()
+        targets = regrade_targets(problem_id, strategy).subquery()
+        solutions = (
+            db.query(Solution)
+            .filter(Solution.id.in_(select(targets.c.id)), Solution.id > job.last_solution_id)
+            .order_by(Solution.id)
+            .limit(REGRADE_CONFIG['batch_size'])
+            .all()
+        )
+        db.expunge_all()
+        return solutions
+    finally:
+        db.close()
+
+
+async def _yield_to_live_traffic():
+    while (
+        execution_scheduler.queue_depth(PRIORITY_GRADED)
+        or execution_scheduler.queue_depth(PRIORITY_PRACTICE)
+    ):
+        await asyncio.sleep(REGRADE_CONFIG['yield_interval'])
+
+
+async def _regrade_solution(job_id: int, solution: Solution, context: dict, limiter: asyncio.Semaphore):
+    async with limiter:
+        await _yield_to_live_traffic()
+        submission = Submission(
+            employee_id=solution.employee_id,
+            problem_id=solution.problem_id,
+            source_code=solution.code or '',
+            language=solution.language,
+            inTeam=bool(solution.inTeam)
+        )
+        # One submitter for the whole job: it shares the regrade queue fairly with other jobs
+        with execution_context(f"regrade-{job_id}", PRIORITY_REGRADE):
+            try:
+                results = await judge_submission(submission, context['testcases'], context['checker'])
+            except HTTPException as e:
+                if e.status_code == 503:
+                    raise RegradeRetryLater(e.detail)
+                raise
+        if not results_reusable([result.dict() for result in results]):
+            raise RegradeRetryLater("the judge failed on some test cases")
+        return results
+
+
+def _apply_batch(job_id: int, problem_id: int, solutions: List[Solution], results: list) -> int:
+    """Store new verdicts, solved markers and job progress in one transaction."""
+    db = SessionLocal()
+    try:
+        updates, result_rows, solved, unsolved = [], [], set(), set()
+        changed, accepted_delta = 0, 0
+        for solution, solution_results in zip(solutions, results):
+            summary = summarize_results(solution_results)
+            if (summary['status'], summary['testCasesPassed']) != (solution.status, solution.testCasesPassed):
+                changed += 1
+            accepted_delta += (summary['status'] == 'Accepted') - (solution.status == 'Accepted')
+            updates.append({'id': solution.id, **summary})
+            result_rows.extend(testcase_result_rows(solution.id, solution_results))
+            (solved if summary['status'] == 'Accepted' else unsolved).add(solution.employee_id)
+
+        solution_ids = [solution.id for solution in solutions]
+        db.execute(update(Solution), updates)
+        db.execute(delete(SolutionTestCaseResult).where(SolutionTestCaseResult.solution_id.in_(solution_ids)))
+        if result_rows:
+            db.execute(insert(SolutionTestCaseResult), result_rows)
+
+        # An Accepted regrade marks the problem solved
+        if solved:
+            db.execute(
+                dialect_insert(db, EmployeeProblem)
+                .values([{'employee_id': employee_id, 'problem_id': problem_id} for employee_id in solved])
+                .on_conflict_do_nothing()
+            )
+        if unsolved:
+            # Only when no Accepted solution is left (the verdicts above are already applied):
+            # an employee who solved it and then failed another attempt keeps the marker
+            still_accepted = (
+                select(Solution.id)
+                .where(
+                    Solution.problem_id == problem_id,
+                    Solution.employee_id == EmployeeProblem.employee_id,
+                    Solution.status == 'Accepted'
+                )
+                .exists()
+            )
+            db.execute(
+                delete(EmployeeProblem)
+                .where(
+                    EmployeeProblem.problem_id == problem_id,
+                    EmployeeProblem.employee_id.in_(unsolved),
+                    ~still_accepted
+                )
+                .execution_options(synchronize_session=False)
+            )
+        # Regraded solutions can get worse, so best solutions are recomputed rather than upserted
+        rebuild_best_solutions(problem_id, db, list({solution.employee_id for solution in solutions}))
+        if accepted_delta:
+            db.execute(
+                update(Problem)
+                .where(Problem.id == problem_id)
+                .values(successful_submissions=func.coalesce(Problem.successful_submissions, 0) + accepted_delta)
+                .execution_options(synchronize_session=False)
+            )
+
+        db.execute(
+            update(RegradeJob)
+            .where(RegradeJob.id == job_id)
+            .values(
+                processed=RegradeJob.processed + len(solutions),
+                changed=RegradeJob.changed + changed,
+                last_solution_id=max(solution_ids),
+                heartbeat_at=datetime.utcnow()
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        leaderboard_cache.invalidate_problem(problem_id)
+        return changed
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _touch_job(job_id: int):
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(RegradeJob)
+            .where(RegradeJob.id == job_id, RegradeJob.status == 'running')
+            .values(heartbeat_at=datetime.utcnow())
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _heartbeat(job_id: int):
+    # Batches can wait a long time behind live traffic; keep the claim fresh meanwhile
+    while True:
+        await asyncio.sleep(REGRADE_CONFIG['stale_after'] / 3)
+        try:
+            await asyncio.to_thread(_touch_job, job_id)
+        except Exception as e:
+            print(f"⚠️ Regrade job {job_id} heartbeat failed: {e}")
+
+
+def _finish_job(job_id: int, status: str, error: Optional[str] = None):
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(RegradeJob)
+            .where(RegradeJob.id == job_id, RegradeJob.status == 'running')
+            .values(status=status, error=error, heartbeat_at=datetime.utcnow())
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _run_regrade(job_id: int):
+    heartbeat = None
+    try:
+        context = await asyncio.to_thread(_claim_job, job_id)
+        if context is None:
+            return
+        heartbeat = asyncio.create_task(_heartbeat(job_id))
+        limiter = asyncio.Semaphore(max(1, REGRADE_CONFIG['concurrency']))
+        retries = 0
+        while True:
+            solutions = await asyncio.to_thread(_next_batch, job_id, context['problem_id'], context['strategy'])
+            if not solutions:
+                break
+            try:
+                results = await asyncio.gather(*(
+                    _regrade_solution(job_id, solution, context, limiter) for solution in solutions
+                ))
+            except RegradeRetryLater as e:
+                retries += 1
+                if retries > REGRADE_CONFIG['max_retries']:
+                    raise
+                print(f"⚠️ Regrade job {job_id} paused: {e}, retrying in {REGRADE_CONFIG['retry_after']:.0f}s")
+                await asyncio.sleep(REGRADE_CONFIG['retry_after'])
+                continue
+            retries = 0
+            changed = await asyncio.to_thread(_apply_batch, job_id, context['problem_id'], solutions, results)
+            print(f"Regrade job {job_id}: {len(solutions)} solutions judged, {changed} changed")
+            if REGRADE_CONFIG['pause'] > 0:
+                await asyncio.sleep(REGRADE_CONFIG['pause'])
+        await asyncio.to_thread(_finish_job, job_id, 'completed')
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Regrade job {job_id} failed: {e}")
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        await asyncio.to_thread(_finish_job, job_id, 'failed', str(detail))
+    finally:
+        if heartbeat is not None:
+            heartbeat.cancel()
@@ -2,15 +2,31 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from models.employee_problem import EmployeeProblem
 from models.solution import Solution
+from models.solution_testcase_result import SolutionTestCaseResult
+from models.problem_best_solution import ProblemBestSolution
 from schemas.solution import SolutionCreate, SolutionUpdate, Submission
 from schemas.testcase import TestCaseOut, TestCaseResult
 from typing import List
 import asyncio
-import httpx
+from services.judge0_client import judge0_pool, judge0_resilience
+from services.judge0_resilience import JudgeUnavailableError
+from services.executor import get_executor
+from services.output_checker import OutputChecker
+from services.reference_cache import reference_cache, reference_cache_key
+from services.submission_cache import submission_cache, submission_cache_key, testcase_set_version
+from services.submission_jobs import SubmissionJob, submission_jobs
+from services.leaderboard_cache import leaderboard_cache
+from services.execution_scheduler import (
+    PRIORITY_GRADED,
+    PRIORITY_PRACTICE,
+    execution_context,
+    execution_scheduler
+)
+from database import SessionLocal, dialect_insert
 import random
 from models.problem import Problem
 from pydantic import BaseModel
-from typing import Optional
+from typing import Callable, Optional
 from models.testcase import TestCase
 from uuid import UUID 
 import os
@@ -23,41 +39,13 @@ from models.employee import Employee
 from sqlalchemy import func, desc, asc
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import label
-from sqlalchemy import select
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import aliased
 from sqlalchemy import over
 from typing import List
 load_dotenv()
 
-# Updated configuration for self-hosted Judge0
-
-JUDGE0_CONFIG = {
-    'url': os.getenv('SELF_HOSTED_JUDGE0_URL'),
-    'headers': {
-        'content-type': 'application/json'
-    }
-}
-
-# Updated language mappings to match your Judge0 instance
-language_map = {
-    'Python': 71,    # Python 3.8.1
-    'C++': 54,       # C++ (GCC 9.2.0)
-    'Java': 62,      # Java (OpenJDK 13.0.1)
-    'Javascript': 63 # JavaScript (Node.js 12.14.0)
-}
-
-# Descomentar este y comentar otro en caso de fallo
-'''
-JUDGE0_CONFIG = {
-   'url': os.getenv('JUDGE0_URL'),
-   'headers': {
-       'content-type': 'application/json',
-       'x-rapidapi-key': os.getenv('JUDGE0_API_KEY'),
-       'x-rapidapi-host': os.getenv('JUDGE0_API_HOST')
-   }
-}'''
-
-
 class TestCaseBase(BaseModel):
     input: str
     output: str
@@ -76,40 +64,7 @@ class TestCaseResult(BaseModel):
     output: Optional[str]
     error_details: Optional[str] = None  # Added for better error reporting
 
-async def submit_code_to_judge0(source_code, stdin, language, expected_output=None):
-    if language not in language_map:
-        return {'result': 'Language Not Supported'}
-
-    language_id = language_map[language]
-
-    payload = {
-        "language_id": language_id,
-        "source_code": source_code,
-        "stdin": stdin,
-        "cpu_time_limit": 5,    # Added time limit (seconds)
-        "memory_limit": 128000  # Added memory limit (KB)
-    }
-
-    if expected_output is not None:
-        payload["expected_output"] = expected_output
-
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                JUDGE0_CONFIG['url'],
-                headers=JUDGE0_CONFIG['headers'],
-                json=payload
-            )
-        response.raise_for_status()
-        return response.json()
-    except httpx.TimeoutException as e:
-        return {'timeout': True, 'error': str(e)}
-    except Exception as e:
-        return {'error': str(e)}
-
-async def evaluate_code(source_code, stdin, expected_output, language) -> TestCaseResult:
-    result = await submit_code_to_judge0(source_code, stdin, language, expected_output)
-
+def judge0_result_to_testcase_result(result: dict, expected_output) -> TestCaseResult:
     if result.get('timeout'):
         return TestCaseResult(
             id=-1, result='TL', time=None, memory=None,
@@ -157,6 +112,17 @@ async def evaluate_code(source_code, stdin, expected_output, language) -> TestCa
         error_details=error_details
     )
 
+def judge_unavailable(error: JudgeUnavailableError) -> HTTPException:
+    # The judge could not be reached: nothing was judged, so no verdict (or RE) is recorded
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": "15"})
+
+async def evaluate_code(source_code, stdin, expected_output, language) -> TestCaseResult:
+    try:
+        result = await get_executor().execute(source_code, stdin, language, expected_output)
+    except JudgeUnavailableError as e:
+        raise judge_unavailable(e)
+    return judge0_result_to_testcase_result(result, expected_output)
+
 # Database operations remain unchanged
 def get_all_solutions(db: Session) -> List[Solution]:
     return db.query(Solution).all()
@@ -176,8 +142,12 @@ def get_solutions_by_employee_and_problem(employee_id: UUID, problem_id: int, db
 def create_solution(data: SolutionCreate, db: Session) -> Solution:
     sol = Solution(**data.dict())
     db.add(sol)
+    db.flush()
+    improved = upsert_best_solution(sol, db)
     db.commit()
     db.refresh(sol)
+    if improved:
+        leaderboard_changed(sol)
     return sol
 
 def update_solution(solution_id: int, data: SolutionUpdate, db: Session) -> Solution:
@@ -186,18 +156,103 @@ def update_solution(solution_id: int, data: SolutionUpdate, db: Session) -> Solu
         raise HTTPException(status_code=404, detail="Solution not found")
     for key, value in data.dict(exclude_unset=True).items():
         setattr(sol, key, value)
+    db.flush()
+    # The edited solution may have been (or become) the employee's best
+    rebuild_best_solutions(sol.problem_id, db, [sol.employee_id])
     db.commit()
     db.refresh(sol)
+    leaderboard_cache.invalidate_problem(sol.problem_id)
     return sol
 
 def delete_solution(solution_id: int, db: Session):
     sol = db.query(Solution).filter(Solution.id == solution_id).first()
     if not sol:
         raise HTTPException(status_code=404, detail="Solution not found")
+    problem_id, employee_id = sol.problem_id, sol.employee_id
     db.delete(sol)
+    db.flush()
+    rebuild_best_solutions(problem_id, db, [employee_id])
     db.commit()
+    leaderboard_cache.invalidate_problem(problem_id)
+
+def upsert_best_solution(solution: Solution, db: Session) -> bool:
+    """
+    Record `solution` as its author's best for the problem when it passes
+    more test cases, or as many in less time, than the current best.
+    Runs inside the caller's transaction; True when the best changed.
+    """
+    stmt = dialect_insert(db, ProblemBestSolution).values(
+        problem_id=solution.problem_id,
+        employee_id=solution.employee_id,
+        solution_id=solution.id,
+        testCasesPassed=solution.testCasesPassed or 0,
+        executionTime=solution.executionTime
+    )
+    current_time = func.coalesce(ProblemBestSolution.executionTime, float('inf'))
+    new_time = func.coalesce(stmt.excluded.executionTime, float('inf'))
+    result = db.execute(stmt.on_conflict_do_update(
+        index_elements=[ProblemBestSolution.problem_id, ProblemBestSolution.employee_id],
+        set_={
+            'solution_id': stmt.excluded.solution_id,
+            'testCasesPassed': stmt.excluded.testCasesPassed,
+            'executionTime': stmt.excluded.executionTime
+        },
+        where=or_(
+            ProblemBestSolution.testCasesPassed < stmt.excluded.testCasesPassed,
+            and_(ProblemBestSolution.testCasesPassed == stmt.excluded.testCasesPassed, current_time > new_time)
+        )
+    ))
+    return result.rowcount > 0
+
+def leaderboard_changed(solution: Solution):
+    """Call after commit when `solution` became its author's best."""
+    leaderboard_cache.best_solution_changed(
+        solution.problem_id,
+        solution.employee_id,
+        solution.testCasesPassed,
+        solution.executionTime,
+        solution.id
+    )
+
+def rebuild_best_solutions(problem_id: int, db: Session, employee_ids: Optional[List[UUID]] = None):
+    """
+    Recompute best solutions from the Solution table, for some employees
+    of a problem (or all of them). Needed when a stored solution got worse
+    (regrade, edit, delete), which an upsert cannot express.
+    """
+    scope = [Solution.problem_id == problem_id]
+    best_scope = [ProblemBestSolution.problem_id == problem_id]
+    if employee_ids is not None:
+        scope.append(Solution.employee_id.in_(employee_ids))
+        best_scope.append(ProblemBestSolution.employee_id.in_(employee_ids))
+
+    ranked = (
+        select(
+            Solution.problem_id,
+            Solution.employee_id,
+            Solution.id.label('solution_id'),
+            Solution.testCasesPassed,
+            Solution.executionTime,
+            func.row_number().over(
+                partition_by=Solution.employee_id,
+                order_by=[desc(Solution.testCasesPassed), asc(Solution.executionTime).nulls_last(), asc(Solution.id)]
+            ).label('position')
+        )
+        .where(*scope)
+        .subquery()
+    )
+    db.execute(delete(ProblemBestSolution).where(*best_scope).execution_options(synchronize_session=False))
+    db.execute(
+        insert(ProblemBestSolution).from_select(
+            ['problem_id', 'employee_id', 'solution_id', 'testCasesPassed', 'executionTime'],
+            select(
+                ranked.c.problem_id, ranked.c.employee_id, ranked.c.solution_id,
+                func.coalesce(ranked.c.testCasesPassed, 0), ranked.c.executionTime
+            ).where(ranked.c.position == 1)
+        )
+    )
     
-async def test_code(problem_id: int, source_code: str, input: str, language: str, db: Session) -> TestCaseResult:
+async def test_code(problem_id: int, source_code: str, input: str, language: str, db: Session, employee_id: Optional[UUID] = None) -> TestCaseResult:
     # 1. Get the problem's solution code
     problem = db.query(Problem).filter(Problem.id == problem_id).first()
     if not problem:
@@ -206,61 +261,164 @@ async def test_code(problem_id: int, source_code: str, input: str, language: str
     if not problem.solution:
         raise HTTPException(status_code=400, detail="Problem has no reference solution")
     
-    # 2. Get expected output by running the problem's solution code
-    solution_result = await evaluate_code(
-        source_code=problem.solution,
-        stdin=input,
-        expected_output=None,  # We just want the output
-        language=problem.language
-    )
-    
-    if solution_result.result != 'AC':
-        raise HTTPException(
-            status_code=400,
-            detail=f"Reference solution failed with status: {solution_result.result}. Error: {solution_result.error_details}"
-        )
-    
-    expected_output = solution_result.output
-    
-    # 3. Evaluate the submitted code against the expected output
-    test_result = await evaluate_code(
-        source_code=source_code,
-        stdin=input,
-        expected_output=expected_output,
-        language=language
-    )
+    # Practice runs queue behind graded submissions in the execution scheduler
+    with execution_context(employee_id, PRIORITY_PRACTICE):
+        # 2. Expected output comes from the reference cache, or from running the
+        # problem's solution alongside the submitted code on a miss
+        cache_key = reference_cache_key(problem_id, problem.solution, problem.language, input)
+        expected_output = reference_cache.get(cache_key)
+
+        if expected_output is None:
+            solution_result, test_result = await asyncio.gather(
+                evaluate_code(
+                    source_code=problem.solution,
+                    stdin=input,
+                    expected_output=None,  # We just want the output
+                    language=problem.language
+                ),
+                evaluate_code(
+                    source_code=source_code,
+                    stdin=input,
+                    expected_output=None,  # Compared below once the reference finishes
+                    language=language
+                )
+            )
+
+            if solution_result.result != 'AC':
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Reference solution failed with status: {solution_result.result}. Error: {solution_result.error_details}"
+                )
+
+            expected_output = solution_result.output
+            reference_cache.put(cache_key, expected_output)
+        else:
+            test_result = await evaluate_code(
+                source_code=source_code,
+                stdin=input,
+                expected_output=None,
+                language=language
+            )
+
+        # 3. Compare the submitted code's output against the expected output
+        test_result.expected_output = expected_output
+        apply_checker(test_result, expected_output, problem_checker(problem))
     
     return test_result
 
+def problem_checker(problem: Problem) -> OutputChecker:
+    try:
+        return OutputChecker(problem.checker, problem.checker_epsilon)
+    except ValueError as e:
+        print(f"Problem {problem.id}: {e}, using the default checker")
+        return OutputChecker()
+
+def load_problem_checker(problem_id: int, db: Session) -> OutputChecker:
+    problem = db.query(Problem).filter(Problem.id == problem_id).first()
+    if not problem:
+        raise HTTPException(status_code=404, detail="Problem not found")
+    return problem_checker(problem)
+
+def apply_checker(result: TestCaseResult, expected_output: Optional[str], checker: OutputChecker) -> TestCaseResult:
+    # Runs are sent without expected_output, so a finished run comes back AC
+    # and the verdict is decided here
+    if result.result == 'AC':
+        check = checker.check(result.output, expected_output)
+        if not check.ok:
+            result.result = 'WA'
+            result.error_details = check.message
+    return result
+
 async def evaluate_testcases(
     source_code: str,
     language: str,
-    testcases: List[TestCaseBase]
+    testcases: List[TestCaseBase],
+    mode: Optional[str] = None,
+    compile_once: Optional[bool] = None,
+    on_result: Optional[Callable[[TestCaseResult], None]] = None,
+    fail_fast: bool = False,
+    checker: Optional[OutputChecker] = None,
+    packed: Optional[bool] = None
 ) -> List[TestCaseResult]:
     """
-    Evaluate code against multiple test cases.
+    Evaluate code against multiple test cases on the configured executor.
+    For Judge0, mode 'single' sends one request per test case, 'batch'
+    uses /submissions/batch and 'callback' lets Judge0 push each result to
+    JUDGE0_CALLBACK_URL (defaults to JUDGE0_EXECUTION_MODE); compile_once
+    compiles C++/Java a single time (defaults to JUDGE0_COMPILE_ONCE).
+    packed runs small Python inputs several to a submission (defaults to
+    JUDGE0_PACKED_TESTS). The local executor always compiles once and
+    never packs.
+    on_result receives each TestCaseResult as soon as that case finishes.
+    fail_fast cancels the remaining runs once any case is not AC; those
+    cases come back with the 'SK' (skipped) verdict. Only queued cases are
+    saved: runs already sent to Judge0 (including created batch tokens)
+    finish there, and results arriving after the failure are ignored.
+    Expected outputs are not sent to the executor: outputs are compared
+    here with checker (the 'lines' checker by default).
     """
-    async def process_testcase(testcase: TestCaseBase) -> TestCaseResult:
-        result = await evaluate_code(
-            source_code=source_code,
-            stdin=testcase.input,
-            expected_output=testcase.output,
-            language=language
-        )
-        
-        return TestCaseResult(
-            id=testcase.id,
-            result=result.result,
-            time=result.time,
-            memory=result.memory,
-            expected_output=testcase.output,
-            output=result.output,
-            error_details=result.error_details
-        )
-
-    # Process all test cases concurrently
-    tasks = [process_testcase(tc) for tc in testcases]
-    return await asyncio.gather(*tasks)
+    checker = checker or OutputChecker()
+
+    def to_result(index: int, raw: dict) -> TestCaseResult:
+        result = judge0_result_to_testcase_result(raw, testcases[index].output)
+        result.id = testcases[index].id
+        return apply_checker(result, testcases[index].output, checker)
+
+    finished = {}
+    decided = asyncio.Event()
+
+    def collect(index: int, raw: dict):
+        if decided.is_set():
+            # Already failed: in-flight runs finishing now are reported as skipped
+            return
+        result = to_result(index, raw)
+        finished[index] = result
+        if on_result:
+            on_result(result)
+        if fail_fast and result.result != 'AC':
+            decided.set()
+
+    run = asyncio.create_task(get_executor().execute_many(
+        source_code=source_code,
+        language=language,
+        cases=[(tc.input, None) for tc in testcases],
+        mode=mode,
+        compile_once=compile_once,
+        on_result=collect,
+        packed=packed
+    ))
+    decider = asyncio.create_task(decided.wait())
+    try:
+        await asyncio.wait({run, decider}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        decider.cancel()
+        if not run.done():
+            run.cancel()
+            try:
+                await run
+            except asyncio.CancelledError:
+                pass
+
+    if not run.cancelled():
+        # Surface executor errors; results themselves come through collect()
+        try:
+            run.result()
+        except JudgeUnavailableError as e:
+            raise judge_unavailable(e)
+
+    results = []
+    for index, testcase in enumerate(testcases):
+        if index not in finished:
+            skipped = TestCaseResult(
+                id=testcase.id, result='SK', time=None, memory=None,
+                expected_output=testcase.output, output=None,
+                error_details='Skipped after an earlier test case failed'
+            )
+            finished[index] = skipped
+            if on_result:
+                on_result(skipped)
+        results.append(finished[index])
+    return results
 
 def generate_random_test_case_result() -> TestCaseResult:
     status = random.choice(['AC', 'WA', 'TL', 'RE'])
@@ -278,10 +436,10 @@ def generate_random_test_case_result() -> TestCaseResult:
         output=output
     )
 
-async def get_test_case_results(submission: Submission, db: Session) -> List[TestCaseResult]:
+def load_testcases(problem_id: int, db: Session) -> List[TestCaseBase]:
     # 1. Get all test cases for the problem from database
     db_test_cases = db.query(TestCase).filter(
-        TestCase.problem_id == submission.problem_id
+        TestCase.problem_id == problem_id
     ).all()
     
     if not db_test_cases:
@@ -291,7 +449,7 @@ async def get_test_case_results(submission: Submission, db: Session) -> List[Tes
         )
     
     # 2. Convert SQLAlchemy TestCase objects to TestCaseBase objects
-    testcases = [
+    return [
         TestCaseBase(
             id=tc.id,
             input=tc.input,
@@ -299,15 +457,181 @@ async def get_test_case_results(submission: Submission, db: Session) -> List[Tes
             problem_id=tc.problem_id
         ) for tc in db_test_cases
     ]
-    
-    # 3. Evaluate against all test cases using evaluate_testcases
-    results = await evaluate_testcases(
-        source_code=submission.source_code,
-        language=submission.language,
-        testcases=testcases
+
+def results_reusable(results: List[dict]) -> bool:
+    # Skipped cases (fail-fast) and judge failures (no timing at all) must be re-judged
+    return all(
+        result['result'] != 'SK' and (result['time'] is not None or result['result'] == 'CE')
+        for result in results
     )
+
+async def judge_submission(
+    submission: Submission,
+    testcases: List[TestCaseBase],
+    checker: OutputChecker,
+    on_result: Optional[Callable[[TestCaseResult], None]] = None
+) -> List[TestCaseResult]:
+    """
+    Run evaluate_testcases for a submission, unless a byte-identical one was
+    already judged against the same test cases and checker: then its
+    verdicts are reused.
+    """
+    async def evaluate() -> List[dict]:
+        results = await evaluate_testcases(
+            source_code=submission.source_code,
+            language=submission.language,
+            testcases=testcases,
+            on_result=on_result,
+            fail_fast=submission.fail_fast,
+            checker=checker
+        )
+        return [result.dict() for result in results]
+
+    key = submission_cache_key(
+        submission.problem_id,
+        submission.language,
+        submission.source_code,
+        f"{testcase_set_version(testcases)}:{checker.spec}"
+    )
+    raw_results, reused = await submission_cache.get_or_compute(
+        key, submission.problem_id, evaluate, cacheable=results_reusable
+    )
+    results = [TestCaseResult(**result) for result in raw_results]
+    if reused and on_result:
+        for result in results:
+            on_result(result)
+    return results
+
+async def get_test_case_results(submission: Submission, db: Session) -> List[TestCaseResult]:
+    testcases = load_testcases(submission.problem_id, db)
+    checker = load_problem_checker(submission.problem_id, db)
     
-    # 4. Calculate statistics
+    # 3. Evaluate against all test cases (or reuse the verdicts of an identical submission)
+    with execution_context(submission.employee_id, PRIORITY_GRADED):
+        results = await judge_submission(submission, testcases, checker)
+    
+    record_submission(submission, results, db)
+    return results
+
+def start_submission_job(submission: Submission, db: Session) -> SubmissionJob:
+    """
+    Accept a submission without waiting for the judge. Test cases are loaded
+    up front (so a bad problem id still fails the POST); judging and
+    persistence continue in the background while per-testcase results are
+    published on the job's event stream.
+    """
+    testcases = load_testcases(submission.problem_id, db)
+    checker = load_problem_checker(submission.problem_id, db)
+    job = submission_jobs.create(total_testcases=len(testcases))
+    with execution_context(submission.employee_id, PRIORITY_GRADED):
+        job.task = asyncio.create_task(_run_submission_job(job, submission, testcases, checker))
+    return job
+
+async def _run_submission_job(job: SubmissionJob, submission: Submission, testcases: List[TestCaseBase], checker: OutputChecker):
+    job.status = 'running'
+    try:
+        results = await judge_submission(
+            submission,
+            testcases,
+            checker,
+            on_result=lambda result: job.publish('testcase', result.dict())
+        )
+        solution = await asyncio.to_thread(_record_submission_in_new_session, submission, results)
+        job.complete(
+            verdict=solution['status'],
+            solution_id=solution['id'],
+            summary={
+                'submission_id': job.id,
+                'solution_id': solution['id'],
+                'status': solution['status'],
+                'testCasesPassed': solution['testCasesPassed'],
+                'totalTestCases': len(results),
+                'executionTime': solution['executionTime'],
+                'memory': solution['memory']
+            }
+        )
+    except Exception as e:
+        print(f"Submission job {job.id} failed: {e}")
+        job.fail(str(e.detail) if isinstance(e, HTTPException) else str(e))
+
+def _record_submission_in_new_session(submission: Submission, results: List[TestCaseResult]) -> dict:
+    # Background jobs outlive the request, so they cannot use its session
+    db = SessionLocal()
+    try:
+        solution = record_submission(submission, results, db)
+        return {
+            'id': solution.id,
+            'status': solution.status,
+            'testCasesPassed': solution.testCasesPassed,
+            'executionTime': solution.executionTime,
+            'memory': solution.memory
+        }
+    finally:
+        db.close()
+
+def get_execution_scheduler_metrics() -> dict:
+    return execution_scheduler.metrics()
+
+def get_leaderboard_cache_stats() -> dict:
+    return leaderboard_cache.stats()
+
+def get_judge0_pool_status() -> dict:
+    return {**judge0_pool.status(), 'resilience': judge0_resilience.metrics()}
+
+# Stored per-testcase results are kept small: stdout only for WA, errors truncated
+SOLUTION_RESULT_LIMITS = {
+    'output': int(os.getenv('SOLUTION_RESULT_MAX_OUTPUT', '65536')),
+    'error_details': int(os.getenv('SOLUTION_RESULT_MAX_ERROR', '4096')),
+}
+
+def _truncate(text: Optional[str], limit: int) -> Optional[str]:
+    if text is None or len(text) <= limit:
+        return text
+    return text[:limit] + "\n... [truncated]"
+
+def testcase_result_rows(solution_id: int, results: List[TestCaseResult]) -> List[dict]:
+    return [
+        {
+            'solution_id': solution_id,
+            'position': position,
+            'testcase_id': result.id if result.id > 0 else None,
+            'verdict': result.result,
+            'time': float(result.time) if result.time is not None else None,
+            'memory': result.memory,
+            'output': _truncate(result.output, SOLUTION_RESULT_LIMITS['output']) if result.result == 'WA' else None,
+            'error_details': (
+                _truncate(result.error_details, SOLUTION_RESULT_LIMITS['error_details'])
+                if result.result not in ('AC', 'SK') else None
+            )
+        }
+        for position, result in enumerate(results)
+    ]
+
+def get_solution_testcase_results(solution_id: int, db: Session) -> List[dict]:
+    get_solution_by_id(solution_id, db)  # 404 when the solution does not exist
+    rows = (
+        db.query(SolutionTestCaseResult, TestCase.output)
+        .outerjoin(TestCase, TestCase.id == SolutionTestCaseResult.testcase_id)
+        .filter(SolutionTestCaseResult.solution_id == solution_id)
+        .order_by(SolutionTestCaseResult.position)
+        .all()
+    )
+    return [
+        {
+            'position': row.position,
+            'testcase_id': row.testcase_id,
+            'result': row.verdict,
+            'time': row.time,
+            'memory': row.memory,
+            'output': row.output,
+            'expected_output': expected_output if row.verdict == 'WA' else None,
+            'error_details': row.error_details
+        }
+        for row, expected_output in rows
+    ]
+
+def summarize_results(results: List[TestCaseResult]) -> dict:
+    """Solution columns derived from per-testcase results."""
     passed_count = sum(1 for result in results if result.result == 'AC')
     status = "Accepted" if passed_count == len(results) else "Failed"
     
@@ -323,118 +647,114 @@ async def get_test_case_results(submission: Submission, db: Session) -> List[Tes
          if result.memory is not None and result.result == 'AC'),
         default=0
     )
+    return {
+        'status': status,
+        'executionTime': max_execution_time,
+        'memory': max_memory,
+        'testCasesPassed': passed_count
+    }
+
+def record_submission(submission: Submission, results: List[TestCaseResult], db: Session) -> Solution:
+    # 4. Calculate statistics
+    summary = summarize_results(results)
     
-    # 5. Always create new solution
-    solution = create_solution(
-        SolutionCreate(
-            employee_id=submission.employee_id,
-            problem_id=submission.problem_id,
-            status=status,
-            code=submission.source_code,
-            executionTime=max_execution_time,
-            memory=max_memory,
-            inTeam=submission.inTeam,
-            language=submission.language,
-            testCasesPassed=passed_count
-        ),
-        db
-    )
+    # 5-7. Solution row, problem counters and solved marker in one transaction
+    solution = Solution(**SolutionCreate(
+        employee_id=submission.employee_id,
+        problem_id=submission.problem_id,
+        code=submission.source_code,
+        inTeam=submission.inTeam,
+        language=submission.language,
+        **summary
+    ).dict())
     print("this is the solution team: ", submission.inTeam)
-    
-    # 6. Update problem statistics
-    problem = db.query(Problem).filter(Problem.id == submission.problem_id).first()
-    if problem:
-        problem.total_submissions = (problem.total_submissions or 0) + 1
-        if status == "Accepted":
-            problem.successful_submissions = (problem.successful_submissions or 0) + 1
-        db.commit()
-    
-    # 7. If Accepted, insert into Employee_Problem if not already present
-    if status == "Accepted":
-        exists = db.query(EmployeeProblem).filter_by(
-            employee_id=submission.employee_id,
-            problem_id=submission.problem_id
-        ).first()
-        if not exists:
-            new_record = EmployeeProblem(
-                employee_id=submission.employee_id,
-                problem_id=submission.problem_id
+    accepted = summary['status'] == "Accepted"
+
+    try:
+        db.add(solution)
+        db.flush()
+
+        # Per-testcase verdicts go in with the solution (one executemany)
+        if results:
+            db.execute(insert(SolutionTestCaseResult), testcase_result_rows(solution.id, results))
+
+        improved = upsert_best_solution(solution, db)
+
+        # Increment in SQL so concurrent submissions cannot lose updates
+        db.execute(
+            update(Problem)
+            .where(Problem.id == submission.problem_id)
+            .values(
+                total_submissions=func.coalesce(Problem.total_submissions, 0) + 1,
+                successful_submissions=func.coalesce(Problem.successful_submissions, 0) + (1 if accepted else 0)
             )
-            db.add(new_record)
-            try:
-                db.commit()
-            except Exception as e:
-                db.rollback()
-                print("Integrity error:", e)
-                raise HTTPException(status_code=400, detail="Invalid foreign key: employee or problem does not exist.")
-            # db.commit
-            # pass
-    
-    '''
-    if status == "Accepted":
-        pass
-        exists = db.query(EmployeeProblem).filter_by(
-            employee_id=submission.employee_id,
-            problem_id=submission.problem_id
-        ).first()
-
-        if not exists:
-            pass
-            new_record = EmployeeProblem(
-                employee_id=submission.employee_id,
-                problem_id=submission.problem_id
+            .execution_options(synchronize_session=False)
+        )
+
+        if accepted:
+            db.execute(
+                dialect_insert(db, EmployeeProblem)
+                .values(employee_id=submission.employee_id, problem_id=submission.problem_id)
+                .on_conflict_do_nothing()
             )
-            db.add(new_record)
-            db.commit()'''
-    return results
 
-def get_problem_leaderboard_data(problem_id: int, db: Session) -> List[dict]:
-    # Subquery with row_number to rank solutions for each employee
-    ranked_solutions = (
-        db.query(
-            Solution,
-            Employee.profilePicture,
-            Employee.firstName,
-            Employee.lastName,
-            label("rank", func.row_number().over(
-                partition_by=Solution.employee_id,
-                order_by=[
-                    desc(Solution.testCasesPassed),
-                    asc(Solution.executionTime),
-                    asc(Solution.id)
-                ]
-            ))
-        )
-        .join(Employee, Solution.employee_id == Employee.id)
-        .filter(Solution.problem_id == problem_id)
-        .subquery()
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        print("Integrity error:", e)
+        raise HTTPException(status_code=400, detail="Invalid foreign key: employee or problem does not exist.")
+    except Exception:
+        db.rollback()
+        raise
+
+    db.refresh(solution)
+    if improved:
+        leaderboard_changed(solution)
+    return solution
+
+def get_problem_leaderboard_data(problem_id: int, db: Session, limit: int = 100, offset: int = 0) -> List[dict]:
+    # Served from leaderboard_cache; concurrent misses for a page share one query
+    return leaderboard_cache.get_or_compute(
+        problem_id, limit, offset,
+        lambda: _query_problem_leaderboard(problem_id, db, limit, offset)
     )
 
-    # Select only the top-ranked (best) solution per employee
+def _query_problem_leaderboard(problem_id: int, db: Session, limit: int, offset: int) -> List[dict]:
+    # One row per employee, already reduced to their best solution; walks
+    # Problem_Best_Solution_rank_idx in order
     best_solutions = (
         db.query(
-            ranked_solutions.c.profilePicture,
-            ranked_solutions.c.firstName,
-            ranked_solutions.c.lastName,
-            ranked_solutions.c.testCasesPassed,
-            ranked_solutions.c.executionTime
+            Employee.profilePicture,
+            Employee.firstName,
+            Employee.lastName,
+            ProblemBestSolution.testCasesPassed,
+            ProblemBestSolution.executionTime,
+            ProblemBestSolution.employee_id,
+            ProblemBestSolution.solution_id
         )
-        .filter(ranked_solutions.c.rank == 1)
+        .join(Employee, ProblemBestSolution.employee_id == Employee.id)
+        .filter(ProblemBestSolution.problem_id == problem_id)
         .order_by(
-            desc(ranked_solutions.c.testCasesPassed),
-            asc(ranked_solutions.c.executionTime)
+            desc(ProblemBestSolution.testCasesPassed),
+            asc(ProblemBestSolution.executionTime).nulls_last(),
+            asc(ProblemBestSolution.solution_id)
         )
+        .offset(offset)
+        .limit(limit)
         .all()
     )
 
     leaderboard = []
-    for profile_pic, first_name, last_name, test_cases_passed, exec_time in best_solutions:
+    for profile_pic, first_name, last_name, test_cases_passed, exec_time, employee_id, solution_id in best_solutions:
         leaderboard.append({
             "profilePicture": profile_pic,
             "firstName": first_name,
             "lastName": last_name,
             "testCasesPassed": test_cases_passed,
-            "time": exec_time
+            "time": exec_time,
+            # Not part of LeaderboardEntry; lets the cache tell which pages a new best affects
+            "employee_id": employee_id,
+            "solution_id": solution_id
         })
 
-    return leaderboard
\ No newline at end of file
+    return leaderboard
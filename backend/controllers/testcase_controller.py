@@ -1,8 +1,19 @@
+import asyncio
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
+from models.problem import Problem
 from models.testcase import TestCase
-from schemas.testcase import TestCaseCreate, TestCaseUpdate
-from typing import List
+from schemas.testcase import TestCaseCreate, TestCaseGenerationRequest, TestCaseUpdate
+from typing import List, Optional
+from controllers.solution_controller import judge0_result_to_testcase_result, judge_unavailable
+from database import SessionLocal
+from services.executor import get_executor
+from services.execution_scheduler import PRIORITY_PRACTICE, execution_context
+from services.judge0_resilience import JudgeUnavailableError
+from services.reference_cache import reference_cache, reference_cache_key
+from services.submission_cache import submission_cache
+from services.submission_jobs import SubmissionJob, SubmissionJobRegistry
 
 def get_all_testcases(db: Session) -> List[TestCase]:
     return db.query(TestCase).all()
@@ -18,21 +29,144 @@ def create_testcase(data: TestCaseCreate, db: Session) -> TestCase:
     db.add(new_tc)
     db.commit()
     db.refresh(new_tc)
+    submission_cache.invalidate_problem(new_tc.problem_id)
     return new_tc
 
 def update_testcase(testcase_id: int, data: TestCaseUpdate, db: Session) -> TestCase:
     tc = db.query(TestCase).filter(TestCase.id == testcase_id).first()
     if not tc:
         raise HTTPException(status_code=404, detail="TestCase not found")
+    previous_problem_id = tc.problem_id
     for key, value in data.dict(exclude_unset=True).items():
         setattr(tc, key, value)
     db.commit()
     db.refresh(tc)
+    submission_cache.invalidate_problem(previous_problem_id)
+    submission_cache.invalidate_problem(tc.problem_id)
     return tc
 
 def delete_testcase(testcase_id: int, db: Session):
     tc = db.query(TestCase).filter(TestCase.id == testcase_id).first()
     if not tc:
         raise HTTPException(status_code=404, detail="TestCase not found")
+    problem_id = tc.problem_id
     db.delete(tc)
     db.commit()
+    submission_cache.invalidate_problem(problem_id)
+
+# Background jobs that compute expected outputs from a problem's reference solution
+testcase_generation_jobs = SubmissionJobRegistry()
+
+def start_testcase_generation(problem_id: int, data: TestCaseGenerationRequest, db: Session) -> SubmissionJob:
+    """
+    Accept inputs only: the problem's reference solution runs over all of
+    them in the background and the resulting test cases are inserted in a
+    single transaction once every output is known. Progress is published
+    on the job's event stream; if the reference solution fails on any
+    input, nothing is inserted.
+    """
+    problem = db.query(Problem).filter(Problem.id == problem_id).first()
+    if not problem:
+        raise HTTPException(status_code=404, detail="Problem not found")
+    if not problem.solution:
+        raise HTTPException(status_code=400, detail="Problem has no reference solution")
+    if not data.inputs:
+        raise HTTPException(status_code=400, detail="No inputs given")
+
+    job = testcase_generation_jobs.create(total_testcases=len(data.inputs))
+    # Authoring work queues behind graded submissions
+    with execution_context(f"problem-{problem_id}", PRIORITY_PRACTICE):
+        job.task = asyncio.create_task(_run_testcase_generation(
+            job, problem_id, problem.solution, problem.language, data.inputs, data.replace
+        ))
+    return job
+
+async def _run_testcase_generation(job: SubmissionJob, problem_id: int, solution: str, language: str, inputs: List[str], replace: bool):
+    job.status = 'running'
+    outputs: List[Optional[str]] = [None] * len(inputs)
+    keys = [reference_cache_key(problem_id, solution, language, stdin) for stdin in inputs]
+    failures = []
+    failed = asyncio.Event()
+
+    # Inputs already run through test_code (or an earlier generation) are known
+    pending = []
+    for index, key in enumerate(keys):
+        cached = reference_cache.get(key)
+        if cached is None:
+            pending.append(index)
+            continue
+        outputs[index] = cached
+        job.publish('testcase', {'position': index, 'result': 'AC', 'time': None, 'cached': True})
+
+    def collect(position: int, raw: dict):
+        index = pending[position]
+        result = judge0_result_to_testcase_result(raw, None)
+        job.publish('testcase', {'position': index, 'result': result.result, 'time': result.time, 'cached': False})
+        if result.result != 'AC':
+            failures.append(f"input {index + 1}: {result.result} {result.error_details or ''}".strip())
+            failed.set()
+            return
+        outputs[index] = result.output
+        reference_cache.put(keys[index], result.output)
+
+    try:
+        if pending:
+            run = asyncio.create_task(get_executor().execute_many(
+                source_code=solution,
+                language=language,
+                cases=[(inputs[index], None) for index in pending],
+                on_result=collect
+            ))
+            stop = asyncio.create_task(failed.wait())
+            try:
+                await asyncio.wait({run, stop}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                # One failing input fails the job, so the remaining runs are cancelled
+                stop.cancel()
+                if not run.done():
+                    run.cancel()
+                    try:
+                        await run
+                    except asyncio.CancelledError:
+                        pass
+            if not run.cancelled():
+                run.result()
+
+        if failures:
+            raise HTTPException(status_code=400, detail=f"Reference solution failed on {failures[0]}")
+
+        created = await asyncio.to_thread(_insert_generated_testcases, problem_id, solution, inputs, outputs, replace)
+        job.complete(verdict=None, solution_id=None, event='done', summary={
+            'job_id': job.id,
+            'problem_id': problem_id,
+            'created': created,
+            'cached': len(inputs) - len(pending),
+        })
+    except Exception as e:
+        if isinstance(e, JudgeUnavailableError):
+            e = judge_unavailable(e)
+        print(f"Test case generation {job.id} failed: {e}")
+        job.fail(str(e.detail) if isinstance(e, HTTPException) else str(e))
+
+def _insert_generated_testcases(problem_id: int, solution: str, inputs: List[str], outputs: List[str], replace: bool) -> int:
+    db = SessionLocal()
+    try:
+        problem = db.query(Problem).filter(Problem.id == problem_id).first()
+        if not problem:
+            raise HTTPException(status_code=404, detail="Problem not found")
+        if problem.solution != solution:
+            raise HTTPException(status_code=409, detail="The reference solution changed while outputs were generated")
+        if replace:
+            db.query(TestCase).filter(TestCase.problem_id == problem_id).delete(synchronize_session=False)
+        db.execute(insert(TestCase), [
+            {'problem_id': problem_id, 'input': stdin, 'output': output}
+            for stdin, output in zip(inputs, outputs)
+        ])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    submission_cache.invalidate_problem(problem_id)
+    return len(inputs)
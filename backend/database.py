@@ -42,6 +42,17 @@ except Exception as e:
     print(e)
     sys.exit(1)
 
+def dialect_insert(db, model):
+    """
+    INSERT for the session's database that supports on_conflict_do_nothing /
+    on_conflict_do_update (PostgreSQL in production, SQLite in tests).
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(model)
+
 # Dependency for FastAPI
 def get_db():
     db = SessionLocal()
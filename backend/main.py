@@ -1,6 +1,10 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from database import Base, engine
+from services.executor import start_executor, close_executor
+from controllers.regrade_controller import resume_regrade_jobs, stop_regrade_jobs
+from controllers.ranking_controller import start_ranking_index, stop_ranking_index
 
 # Import all routers
 from routes.position_routes import router as position_router
@@ -31,13 +35,29 @@ from routes.users import router as users_router
 from routes.ranking_route import router as ranking_router
 from routes.employee_xp_history_route import router as employee_xp_history_router
 from routes.purchase_routes import router as purchase_router
+from routes.judge0_callback_routes import router as judge0_callback_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Code execution backend (pooled Judge0 client or local sandbox workers)
+    await start_executor()
+    # Bulk regrades interrupted by a restart continue where they stopped
+    await resume_regrade_jobs()
+    # In-memory ranking, kept in sync across workers through LISTEN/NOTIFY
+    await start_ranking_index()
+    yield
+    await stop_ranking_index()
+    await stop_regrade_jobs()
+    await close_executor()
 
 
 # Initialize the FastAPI app
 app = FastAPI(
     title="Code Mahindra API",
     description="Modular backend for managing users, challenges, resources, and more",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Set up CORS (customize this for your frontend)
@@ -76,6 +96,7 @@ app.include_router(users_router)
 app.include_router(ranking_router)
 app.include_router(employee_xp_history_router)
 app.include_router(purchase_router)
+app.include_router(judge0_callback_router)
 
 # Health check route
 @app.get("/")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Date, Boolean, ForeignKey
+from sqlalchemy import Column, String, Integer, Date, Boolean, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -42,3 +42,8 @@ class Employee(Base):
     # Campos para autenticación con Jira
     jira_email = Column(String(255))
     jira_api_token = Column(String(255))
+
+    __table_args__ = (
+        # Ranking order; "my rank" counts the entries ahead on the same index
+        Index("Employee_experience_rank_idx", experience.desc(), id),
+    )
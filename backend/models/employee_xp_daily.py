@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Date, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from database import Base
+
+class EmployeeXPDaily(Base):
+    """
+    Experience gained by an employee per (UTC) day, rolled up from
+    Employee_XP_History as records are written, so windowed leaderboards
+    aggregate a few rows per employee instead of the raw history.
+    """
+    __tablename__ = "Employee_XP_Daily"
+
+    # Day first: a window is a range scan of the primary key
+    day = Column(Date, primary_key=True)
+    employee_id = Column(UUID(as_uuid=True), ForeignKey("Employee.id", ondelete="CASCADE"), primary_key=True)
+    xp = Column(Integer, nullable=False, server_default="0")
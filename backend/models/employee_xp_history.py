@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -11,5 +11,12 @@ class EmployeeXPHistory(Base):
     employee_id = Column(UUID(as_uuid=True), ForeignKey("Employee.id", ondelete="CASCADE"), nullable=False)
     experience = Column(Integer, nullable=False)
     date = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Experience awarded by this record; NULL: the difference with the previous record
+    gained = Column(Integer, nullable=True)
 
     employee = relationship("Employee", back_populates="xp_history")
+
+    __table_args__ = (
+        # Previous/next record lookups when maintaining Employee_XP_Daily
+        Index("Employee_XP_History_employee_date_idx", employee_id, date, id),
+    )
@@ -25,4 +25,6 @@ class Problem(Base):
     solution = Column(Text)
     language = Column(Text, nullable=False)
     was_graded = Column(Boolean, nullable=False, server_default='false')
+    checker = Column(String(10), nullable=False, server_default='lines')  # exact | lines | tokens | float
+    checker_epsilon = Column(Float)  # tolerance for the float checker
     employees = relationship("EmployeeProblem", back_populates="problem")
\ No newline at end of file
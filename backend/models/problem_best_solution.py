@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from database import Base
+
+class ProblemBestSolution(Base):
+    """
+    Best solution of every employee for a problem (most test cases passed,
+    then fastest, then earliest), maintained on write so leaderboards never
+    scan the Solution table.
+    """
+    __tablename__ = "Problem_Best_Solution"
+
+    problem_id = Column(Integer, ForeignKey("Problem.id", ondelete="CASCADE"), primary_key=True)
+    employee_id = Column(UUID(as_uuid=True), ForeignKey("Employee.id", ondelete="CASCADE"), primary_key=True)
+    solution_id = Column(Integer, ForeignKey("Solution.id", ondelete="CASCADE"), nullable=False)
+    testCasesPassed = Column(Integer, nullable=False, server_default="0")
+    executionTime = Column(Float)
+
+    __table_args__ = (
+        # Leaderboard order; solution_id makes pages stable on ties
+        Index(
+            "Problem_Best_Solution_rank_idx",
+            problem_id, testCasesPassed.desc(), executionTime.asc(), solution_id
+        ),
+    )
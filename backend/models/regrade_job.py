@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy.sql import func
+from database import Base
+
+class RegradeJob(Base):
+    """
+    A bulk regrade of one problem's solutions. Progress is committed with
+    every batch of updated solutions, so a job interrupted by a restart
+    resumes after last_solution_id.
+    """
+    __tablename__ = "Regrade_Job"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    problem_id = Column(Integer, ForeignKey("Problem.id", ondelete="CASCADE"), nullable=False)
+    strategy = Column(String(10), nullable=False, server_default="latest")  # latest | best
+    status = Column(String(20), nullable=False, server_default="queued")  # queued | running | completed | failed
+    total = Column(Integer, nullable=False, server_default="0")
+    processed = Column(Integer, nullable=False, server_default="0")
+    changed = Column(Integer, nullable=False, server_default="0")  # solutions whose verdict changed
+    last_solution_id = Column(Integer, nullable=False, server_default="0")
+    error = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+    heartbeat_at = Column(DateTime)  # refreshed by the worker running the job
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Float, ForeignKey, Integer, SmallInteger, String, Text
+from database import Base
+
+class SolutionTestCaseResult(Base):
+    """One row per judged test case of a Solution, written with the solution itself."""
+    __tablename__ = "Solution_TestCase_Result"
+
+    solution_id = Column(Integer, ForeignKey("Solution.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(SmallInteger, primary_key=True)  # order the case was judged in
+    testcase_id = Column(Integer, ForeignKey("TestCase.id", ondelete="SET NULL"), nullable=True)
+    verdict = Column(String(2), nullable=False)  # AC | WA | TL | RE | CE | SK
+    time = Column(Float)
+    memory = Column(Integer)
+    output = Column(Text)         # only kept for WA
+    error_details = Column(Text)  # stderr / compile output, truncated
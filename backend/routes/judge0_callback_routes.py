@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Body, HTTPException, Query, Response
+from services.judge0_callbacks import pending_callbacks
+
+router = APIRouter(prefix="/judge0", tags=["Judge0"])
+
+# Judge0 PUTs the finished submission here when it was created with a
+# callback_url (JUDGE0_EXECUTION_MODE=callback). Internal: not for the frontend.
+@router.put("/callback/{callback_id}", status_code=204, include_in_schema=False)
+async def judge0_callback(callback_id: str, secret: str = Query(None), body: dict = Body(...)):
+    if not pending_callbacks.verify(secret):
+        raise HTTPException(status_code=403, detail="Invalid callback secret")
+    # An unknown id (run already timed out, or submitted by another worker)
+    # is acknowledged anyway so Judge0 does not keep retrying it
+    pending_callbacks.resolve(callback_id, body)
+    return Response(status_code=204)
+
+@router.get("/callbacks/status", include_in_schema=False)
+def judge0_callback_status():
+    return pending_callbacks.status()
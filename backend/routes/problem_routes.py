@@ -16,6 +16,8 @@ from controllers.problem_controller import (
 from schemas.problem import ProblemCreate, ProblemGradingResult, ProblemUpdate, ProblemOut
 from controllers.problem_controller import create_problem_with_testcases
 from schemas.problem_with_testcases import ProblemCreateWithTestCases, ProblemOutWithTestCases
+from controllers.regrade_controller import cancel_regrade, get_regrade_job, start_regrade
+from schemas.regrade_job import RegradeJobOut, RegradeRequest
 
 
 router = APIRouter(prefix="/problems", tags=["Problems"])
@@ -56,6 +58,19 @@ def grade_problem_endpoint(
 ):
     return grade_problem(problem_id, db)
 
+# Re-judge existing solutions after the test cases changed (runs in the background)
+@router.post("/{problem_id}/regrade", response_model=RegradeJobOut, status_code=202)
+async def regrade_problem_endpoint(problem_id: int, data: RegradeRequest = RegradeRequest(), db: Session = Depends(get_db)):
+    return start_regrade(problem_id, data, db)
+
+@router.get("/regrade/{job_id}", response_model=RegradeJobOut)
+def retrieve_regrade_job(job_id: int, db: Session = Depends(get_db)):
+    return get_regrade_job(job_id, db)
+
+@router.post("/regrade/{job_id}/cancel", response_model=RegradeJobOut)
+def cancel_regrade_job(job_id: int, db: Session = Depends(get_db)):
+    return cancel_regrade(job_id, db)
+
 
 @router.get("/problemList/{employee_id}")
 def get_problem_list_with_status(employee_id: UUID, db: Session = Depends(get_db)):
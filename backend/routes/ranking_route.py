@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from database import get_db
-from controllers.ranking_controller import get_employee_ranking
-from schemas.ranking import EmployeeRankingOut
-from typing import List, Optional
+from controllers.ranking_controller import get_employee_ranking, get_employee_ranking_entry, get_ranking_around, get_ranking_index_stats, get_windowed_ranking
+from schemas.ranking import EmployeeRankingOut, EmployeeWindowRankingOut
+from typing import List, Literal, Optional
+from uuid import UUID
 from routes.users import get_current_user
 from models.employee import Employee
 import logging
@@ -18,13 +19,17 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=List[EmployeeRankingOut])
-def list_ranking(db: Session = Depends(get_db)):
+def list_ranking(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
     """
-    Obtener el ranking completo de empleados.
+    Obtener el ranking de empleados, completo o una página (limit/offset).
     No requiere autenticación.
     """
     try:
-        return get_employee_ranking(db)
+        return get_employee_ranking(db, limit, offset)
     except Exception as e:
         logger.error(f"Error obteniendo ranking completo: {str(e)}")
         raise HTTPException(
@@ -32,6 +37,34 @@ def list_ranking(db: Session = Depends(get_db)):
             detail="Error interno del servidor al obtener el ranking"
         )
 
+@router.get("/window/{window}", response_model=List[EmployeeWindowRankingOut])
+def list_windowed_ranking(
+    window: Literal["week", "month"],
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Ranking por experiencia ganada esta semana (desde el lunes) o este mes (UTC).
+    No requiere autenticación.
+    """
+    try:
+        return get_windowed_ranking(db, window, limit, offset)
+    except Exception as e:
+        logger.error(f"Error obteniendo ranking de la ventana {window}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor al obtener el ranking"
+        )
+
+@router.get("/index")
+def ranking_index_stats():
+    """
+    Estado del índice del ranking en memoria de este worker.
+    Mientras no está listo, el ranking se calcula en la base de datos.
+    """
+    return get_ranking_index_stats()
+
 @router.get("/me", response_model=EmployeeRankingOut)
 def get_my_ranking(
     db: Session = Depends(get_db),
@@ -43,56 +76,18 @@ def get_my_ranking(
     """
     try:
         logger.info(f"Obteniendo ranking para usuario: {current_user.id}")
-        
-        # Obtener todos los empleados con experiencia > 0, ordenados por experiencia
-        employees = (
-            db.query(Employee)
-            .filter(Employee.experience > 0)
-            .order_by(Employee.experience.desc())
-            .all()
-        )
-        
-        logger.info(f"Total de empleados en ranking: {len(employees)}")
-        
-        # Buscar al usuario actual en el ranking
-        user_rank = None
-        for index, emp in enumerate(employees):
-            if emp.id == current_user.id:
-                user_rank = index + 1
-                logger.info(f"Usuario encontrado en posición: {user_rank}")
-                
-                return EmployeeRankingOut(
-                    id=emp.id,
-                    name=f"{emp.firstName} {emp.lastName}".strip() or emp.email,
-                    profileEpic=emp.profilePicture,  # Cambiado a profileEpic
-                    experience=emp.experience,
-                    position=emp.position.name if emp.position else None,
-                    team=emp.team.name if emp.team else None,
-                    rank=user_rank,
-                    firstName=emp.firstName,
-                    lastName=emp.lastName,
-                    nationality=emp.nationality
-                )
-        
-        # Si el usuario no está en el ranking (experiencia <= 0)
-        logger.info(f"Usuario no encontrado en ranking activo. Experiencia: {current_user.experience}")
-        
-        # En lugar de devolver 404, devolver al usuario con posición fuera del ranking
-        total_ranked_users = len(employees)
-        
-        return EmployeeRankingOut(
-            id=current_user.id,
-            name=f"{current_user.firstName} {current_user.lastName}".strip() or current_user.email,
-            profileEpic=current_user.profileEpic or current_user.profilePicture,  # Cambiado a profileEpic
-            experience=current_user.experience,
-            position=current_user.position.name if current_user.position else None,
-            team=current_user.team.name if current_user.team else None,
-            rank=total_ranked_users + 1,  # Posición después del último
-            firstName=current_user.firstName,
-            lastName=current_user.lastName,
-            nationality=current_user.nationality
-        )
-        
+
+        entry = get_employee_ranking_entry(db, current_user)
+
+        if (current_user.experience or 0) > 0:
+            logger.info(f"Usuario encontrado en posición: {entry.rank}")
+        else:
+            # Si el usuario no está en el ranking (experiencia <= 0), se devuelve
+            # con la posición después del último en lugar de un 404
+            logger.info(f"Usuario no encontrado en ranking activo. Experiencia: {current_user.experience}")
+
+        return entry
+
     except HTTPException:
         # Re-lanzar errores HTTP específicos (como 401 Unauthorized)
         raise
@@ -101,4 +96,37 @@ def get_my_ranking(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor al obtener tu ranking"
-        )
\ No newline at end of file
+        )
+
+@router.get("/me/around", response_model=List[EmployeeRankingOut])
+def get_my_ranking_around(
+    k: int = Query(5, ge=0, le=50),
+    db: Session = Depends(get_db),
+    current_user: Employee = Depends(get_current_user)
+):
+    """
+    El usuario actual con los k empleados por encima y por debajo en el ranking.
+    Requiere autenticación.
+    """
+    return list_ranking_around(current_user.id, k, db)
+
+@router.get("/around/{employee_id}", response_model=List[EmployeeRankingOut])
+def list_ranking_around(
+    employee_id: UUID,
+    k: int = Query(5, ge=0, le=50),
+    db: Session = Depends(get_db)
+):
+    """
+    Un empleado con los k empleados por encima y por debajo en el ranking.
+    No requiere autenticación.
+    """
+    try:
+        return get_ranking_around(db, employee_id, k)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error obteniendo el ranking alrededor de {employee_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor al obtener el ranking"
+        )
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from typing import List
 from uuid import UUID
 from sqlalchemy.orm import Session
+from models.employee import Employee
 from models.solution import Solution
 from database import get_db
-from schemas.solution import SolutionCreate, SolutionUpdate, SolutionOut, Submission, LeaderboardEntry
+from routes.users import get_current_user
+from schemas.solution import SolutionCreate, SolutionUpdate, SolutionOut, Submission, LeaderboardEntry, SubmissionJobOut, SolutionTestCaseResultOut
 from schemas.testcase import TestCaseResult, TestInput
 from controllers.solution_controller import (
     get_all_solutions,
@@ -15,8 +18,14 @@ from controllers.solution_controller import (
     delete_solution,
     test_code,
     get_test_case_results,
-    get_problem_leaderboard_data
+    get_problem_leaderboard_data,
+    start_submission_job,
+    get_execution_scheduler_metrics,
+    get_judge0_pool_status,
+    get_leaderboard_cache_stats,
+    get_solution_testcase_results
 )
+from services.submission_jobs import SubmissionJob, submission_jobs
 
 
 
@@ -60,14 +69,20 @@ def delete_existing_solution(solution_id: int, db: Session = Depends(get_db)):
 
 # Testing endpoints remain unchanged
 @router.post("/test", response_model=TestCaseResult)
-async def test_solution_code(data: TestInput, db: Session = Depends(get_db)):
+async def test_solution_code(
+    data: TestInput,
+    db: Session = Depends(get_db),
+    current_user: Employee = Depends(get_current_user)
+):
     try:
         return await test_code(
             problem_id=data.problem_id,
             source_code=data.source_code,
             input=data.input,
             language=data.language,
-            db=db
+            db=db,
+            # Practice runs are queued fairly per signed-in employee
+            employee_id=current_user.id
         )
     except HTTPException as he:
         raise he
@@ -81,18 +96,81 @@ async def test_solution_code(data: TestInput, db: Session = Depends(get_db)):
 async def get_submission_test_results(submission: Submission, db: Session = Depends(get_db)):
     try:
         return await get_test_case_results(submission, db)
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error getting test results: {str(e)}"
         )
 
+def _job_out(job: SubmissionJob) -> SubmissionJobOut:
+    return SubmissionJobOut(
+        submission_id=job.id,
+        status=job.status,
+        totalTestCases=job.total_testcases,
+        verdict=job.verdict,
+        solution_id=job.solution_id,
+        error=job.error,
+        results=job.results
+    )
+
+def _get_job_or_404(submission_id: str) -> SubmissionJob:
+    job = submission_jobs.get(submission_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    return job
+
+# Async submissions: returns immediately, results are streamed per test case
+@router.post("/submissions", response_model=SubmissionJobOut, status_code=202)
+async def create_submission_job(submission: Submission, db: Session = Depends(get_db)):
+    return _job_out(start_submission_job(submission, db))
+
+@router.get("/submissions/{submission_id}", response_model=SubmissionJobOut)
+def get_submission_job(submission_id: str):
+    return _job_out(_get_job_or_404(submission_id))
+
+@router.get("/submissions/{submission_id}/events")
+def stream_submission_job(submission_id: str):
+    """
+    Server-Sent Events: one `testcase` event per finished test case, then a
+    final `verdict` event (with the persisted solution id) or an `error` event.
+    """
+    job = _get_job_or_404(submission_id)
+    return StreamingResponse(
+        job.sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/scheduler/metrics")
+def execution_scheduler_metrics():
+    """Queue depth, active runs and wait times of the judge execution scheduler."""
+    return get_execution_scheduler_metrics()
+
+@router.get("/judge0/nodes")
+def judge0_nodes():
+    """Routing state of every Judge0 endpoint plus retry, circuit breaker and hedging metrics."""
+    return get_judge0_pool_status()
+
+@router.get("/leaderboard/cache")
+def leaderboard_cache_stats():
+    """Hit, miss, coalesced and invalidation counts of the problem leaderboard cache."""
+    return get_leaderboard_cache_stats()
+
+@router.get("/{solution_id}/results", response_model=List[SolutionTestCaseResultOut])
+def retrieve_solution_results(solution_id: int, db: Session = Depends(get_db)):
+    """Per-testcase verdicts of a past solution, in the order they were judged."""
+    return get_solution_testcase_results(solution_id, db)
+
 @router.get("/problem/{problem_id}/leaderboard", response_model=List[LeaderboardEntry])
 def get_problem_leaderboard(
     problem_id: int, 
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db)
 ):
-    return get_problem_leaderboard_data(problem_id, db)
+    return get_problem_leaderboard_data(problem_id, db, limit, offset)
 
 
 @router.get("/employee/{employee_id}", response_model=List[SolutionOut])
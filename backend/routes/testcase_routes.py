@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from typing import List
 from sqlalchemy.orm import Session
 from database import get_db
@@ -7,9 +8,12 @@ from controllers.testcase_controller import (
     get_testcase_by_id,
     create_testcase,
     update_testcase,
-    delete_testcase
+    delete_testcase,
+    start_testcase_generation,
+    testcase_generation_jobs
 )
-from schemas.testcase import TestCaseCreate, TestCaseUpdate, TestCaseOut
+from schemas.testcase import TestCaseCreate, TestCaseUpdate, TestCaseOut, TestCaseGenerationRequest, TestCaseGenerationJobOut
+from services.submission_jobs import SubmissionJob
 
 router = APIRouter(prefix="/testcases", tags=["TestCases"])
 
@@ -32,3 +36,41 @@ def update_existing_testcase(testcase_id: int, data: TestCaseUpdate, db: Session
 @router.delete("/{testcase_id}", status_code=204)
 def delete_existing_testcase(testcase_id: int, db: Session = Depends(get_db)):
     delete_testcase(testcase_id, db)
+
+def _generation_job_out(job: SubmissionJob) -> TestCaseGenerationJobOut:
+    return TestCaseGenerationJobOut(
+        job_id=job.id,
+        status=job.status,
+        totalTestCases=job.total_testcases,
+        completed=sum(1 for result in job.results if result['result'] == 'AC'),
+        created=(job.summary or {}).get('created'),
+        error=job.error
+    )
+
+def _get_generation_job_or_404(job_id: str) -> SubmissionJob:
+    job = testcase_generation_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+    return job
+
+# Inputs only: expected outputs come from the problem's reference solution
+@router.post("/problem/{problem_id}/generate", response_model=TestCaseGenerationJobOut, status_code=202)
+async def generate_testcases(problem_id: int, data: TestCaseGenerationRequest, db: Session = Depends(get_db)):
+    return _generation_job_out(start_testcase_generation(problem_id, data, db))
+
+@router.get("/generate/{job_id}", response_model=TestCaseGenerationJobOut)
+def get_testcase_generation(job_id: str):
+    return _generation_job_out(_get_generation_job_or_404(job_id))
+
+@router.get("/generate/{job_id}/events")
+def stream_testcase_generation(job_id: str):
+    """
+    Server-Sent Events: one `testcase` event per input as its output is
+    known, then `done` (with the number of test cases created) or `error`.
+    """
+    job = _get_generation_job_or_404(job_id)
+    return StreamingResponse(
+        job.sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from database import get_db 
 from models.employee import Employee
 from schemas.employee import EmployeeUpdate
+from controllers.ranking_controller import publish_experience_changes
 from fastapi import Body
 
 router = APIRouter()
@@ -75,6 +76,8 @@ def update_current_user(
         current_user.experience = update_data.experience
     db.commit()
     db.refresh(current_user)
+    if update_data.experience is not None:
+        publish_experience_changes(db, {current_user.id: current_user.experience})
 
     return {
         "message": "Usuario actualizado correctamente",
@@ -1,8 +1,11 @@
 from uuid import UUID
 from pydantic import BaseModel
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 
+# How submitted output is compared with the expected output (services/output_checker.py)
+CheckerMode = Literal['exact', 'lines', 'tokens', 'float']
+
 class ProblemBase(BaseModel):
     reward: Optional[int] = None
     name: Optional[str]
@@ -19,6 +22,8 @@ class ProblemBase(BaseModel):
     was_graded: Optional[bool] = False
     successful_submissions: Optional[int] = 0
     total_submissions: Optional[int] = 0
+    checker: Optional[CheckerMode] = 'lines'
+    checker_epsilon: Optional[float] = None
 
 class ProblemCreate(BaseModel):
     reward: int
@@ -34,6 +39,8 @@ class ProblemCreate(BaseModel):
     solution: Optional[str] = None
     language: str
     was_graded: Optional[bool] = False
+    checker: CheckerMode = 'lines'
+    checker_epsilon: Optional[float] = None
 
 class ProblemUpdate(BaseModel):
     reward: Optional[int] = None
@@ -49,6 +56,8 @@ class ProblemUpdate(BaseModel):
     solution: Optional[str] = None
     language: Optional[str] = None
     was_graded: Optional[bool] = None
+    checker: Optional[CheckerMode] = None
+    checker_epsilon: Optional[float] = None
 
 
 class ProblemOut(ProblemBase):
@@ -1,6 +1,7 @@
 # schemas/problem_with_testcases.py
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
+from schemas.problem import CheckerMode
 from datetime import datetime
 
 class TestCaseCreate(BaseModel):
@@ -23,6 +24,8 @@ class ProblemCreateWithTestCases(BaseModel):
     expirationDate: datetime
     solution: str
     language:str
+    checker: CheckerMode = 'lines'
+    checker_epsilon: Optional[float] = None
     testcases: List[TestCaseCreate]
 
 
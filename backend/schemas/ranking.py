@@ -2,6 +2,7 @@
 
 from pydantic import BaseModel
 from typing import Optional
+from datetime import date
 from uuid import UUID
 
 class EmployeeRankingOut(BaseModel):
@@ -18,3 +19,8 @@ class EmployeeRankingOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+class EmployeeWindowRankingOut(EmployeeRankingOut):
+    # Experience gained since windowStart; rank is by this, experience stays the lifetime total
+    gainedExperience: int
+    windowStart: date
@@ -0,0 +1,23 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Literal, Optional
+
+class RegradeRequest(BaseModel):
+    # Which solution of each employee is re-judged: the most recent one, or
+    # the one with the most passed test cases (fastest on ties)
+    strategy: Literal['latest', 'best'] = 'latest'
+
+class RegradeJobOut(BaseModel):
+    id: int
+    problem_id: int
+    strategy: str
+    status: str  # queued | running | completed | failed | cancelled
+    total: int
+    processed: int
+    changed: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
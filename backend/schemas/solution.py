@@ -1,7 +1,8 @@
 from pydantic import BaseModel
 from uuid import UUID
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
+from schemas.testcase import TestCaseResult
 
 class SolutionBase(BaseModel):
     status: Optional[str] = None
@@ -38,5 +39,25 @@ class Submission(BaseModel):
     source_code: str
     language: str # language va a ser o C++, Javascript, Python o Java
     inTeam: bool
+    fail_fast: bool = False  # stop judging at the first non-AC test case
     class Config:
         from_attributes = True
+
+class SubmissionJobOut(BaseModel):
+    submission_id: str
+    status: str  # queued | running | completed | failed
+    totalTestCases: int
+    verdict: Optional[str] = None
+    solution_id: Optional[int] = None
+    error: Optional[str] = None
+    results: List[TestCaseResult] = []
+
+class SolutionTestCaseResultOut(BaseModel):
+    position: int
+    testcase_id: Optional[int] = None
+    result: str
+    time: Optional[float] = None
+    memory: Optional[int] = None
+    output: Optional[str] = None           # only stored for WA
+    expected_output: Optional[str] = None  # only returned for WA
+    error_details: Optional[str] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class TestCaseBase(BaseModel):
     input: str
@@ -31,3 +31,15 @@ class TestInput(BaseModel):
     language: str
     class Config:
         from_attributes = True
+
+class TestCaseGenerationRequest(BaseModel):
+    inputs: List[str]
+    replace: bool = False  # delete the problem's existing test cases in the same transaction
+
+class TestCaseGenerationJobOut(BaseModel):
+    job_id: str
+    status: str  # queued | running | completed | failed
+    totalTestCases: int
+    completed: int  # inputs whose expected output is known so far
+    created: Optional[int] = None
+    error: Optional[str] = None
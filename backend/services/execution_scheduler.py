@@ -0,0 +1,197 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional
+
+# Lower number = served first
+PRIORITY_GRADED = 0     # /solutions/test-results, async submissions
+PRIORITY_PRACTICE = 1   # /solutions/test ("Run" button)
+PRIORITY_REGRADE = 2    # background regrades after test case changes
+
+PRIORITY_NAMES = {
+    PRIORITY_GRADED: 'graded',
+    PRIORITY_PRACTICE: 'practice',
+    PRIORITY_REGRADE: 'regrade',
+}
+
+# Background work only ever gets slots nobody else is waiting for
+BACKGROUND_PRIORITIES = {PRIORITY_REGRADE}
+
+EXECUTION_SCHEDULER_CONFIG = {
+    # Runs in flight across the whole process (one run = one test case execution)
+    'max_concurrency': int(os.getenv('EXECUTION_MAX_CONCURRENCY', '32')),
+    # A lower-priority run that has waited this long is served next anyway
+    'starvation_timeout': float(os.getenv('EXECUTION_STARVATION_TIMEOUT', '10')),
+}
+
+# (submitter, priority) of the code currently being judged. Set once at the
+# controller entry point; tasks created below it inherit the value.
+_execution_context: ContextVar[tuple] = ContextVar('execution_context', default=(None, PRIORITY_GRADED))
+
+
+@contextmanager
+def execution_context(submitter, priority: int):
+    token = _execution_context.set((str(submitter) if submitter is not None else None, priority))
+    try:
+        yield
+    finally:
+        _execution_context.reset(token)
+
+
+class _Waiter:
+    __slots__ = ('future', 'weight', 'priority', 'submitter', 'enqueued_at')
+
+    def __init__(self, future, weight, priority, submitter):
+        self.future = future
+        self.weight = weight
+        self.priority = priority
+        self.submitter = submitter
+        self.enqueued_at = time.monotonic()
+
+
+class ExecutionScheduler:
+    """
+    Global cap on concurrent judge runs. Waiting runs are grouped by priority,
+    and within a priority they are served round-robin across submitters, so
+    one employee with a 200-case problem cannot starve everyone else.
+    A batch can reserve several slots at once (weight), capped at the pool size.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, starvation_timeout: Optional[float] = None):
+        self.max_concurrency = max(1, max_concurrency or EXECUTION_SCHEDULER_CONFIG['max_concurrency'])
+        self.starvation_timeout = (
+            starvation_timeout if starvation_timeout is not None
+            else EXECUTION_SCHEDULER_CONFIG['starvation_timeout']
+        )
+        self._active = 0
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Waiter]]"] = {p: OrderedDict() for p in PRIORITY_NAMES}
+        self._wait_times: Dict[int, Deque[float]] = {p: deque(maxlen=1000) for p in PRIORITY_NAMES}
+        self._dispatched: Dict[int, int] = {p: 0 for p in PRIORITY_NAMES}
+        self._max_wait: Dict[int, float] = {p: 0.0 for p in PRIORITY_NAMES}
+
+    async def acquire(self, weight: int = 1, submitter=None, priority: Optional[int] = None) -> int:
+        """Wait for `weight` slots; returns the number reserved (pass it to release)."""
+        context_submitter, context_priority = _execution_context.get()
+        submitter = str(submitter) if submitter is not None else (context_submitter or 'anonymous')
+        priority = context_priority if priority is None else priority
+        weight = max(1, min(weight, self.max_concurrency))
+
+        if not self._has_waiters() and self._active + weight <= self.max_concurrency:
+            self._active += weight
+            self._record_dispatch(priority, 0.0)
+            return weight
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), weight, priority, submitter)
+        self._queues[priority].setdefault(submitter, deque()).append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Slots were handed over just as we got cancelled
+                self.release(weight)
+            else:
+                self._remove(waiter)
+                self._dispatch()
+            raise
+        return weight
+
+    def release(self, weight: int = 1):
+        self._active = max(0, self._active - weight)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, weight: int = 1):
+        reserved = await self.acquire(weight)
+        try:
+            yield
+        finally:
+            self.release(reserved)
+
+    def _has_waiters(self) -> bool:
+        return any(self._queues[p] for p in PRIORITY_NAMES)
+
+    def queue_depth(self, priority: int) -> int:
+        return sum(len(q) for q in self._queues[priority].values())
+
+    def _remove(self, waiter: _Waiter):
+        queue = self._queues[waiter.priority].get(waiter.submitter)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._queues[waiter.priority][waiter.submitter]
+
+    def _pick_priority(self) -> Optional[int]:
+        now = time.monotonic()
+        priorities = sorted(PRIORITY_NAMES)
+        # Starvation guard: serve a lower priority whose oldest waiter waited too long
+        for priority in priorities[1:]:
+            if priority in BACKGROUND_PRIORITIES:
+                continue
+            queues = self._queues[priority]
+            if queues and now - min(q[0].enqueued_at for q in queues.values()) >= self.starvation_timeout:
+                return priority
+        for priority in priorities:
+            if self._queues[priority]:
+                return priority
+        return None
+
+    def _dispatch(self):
+        while True:
+            priority = self._pick_priority()
+            if priority is None:
+                return
+            queues = self._queues[priority]
+            submitter, queue = next(iter(queues.items()))
+            waiter = queue[0]
+            if self._active > 0 and self._active + waiter.weight > self.max_concurrency:
+                return
+
+            queue.popleft()
+            if queue:
+                queues.move_to_end(submitter)  # round-robin: this submitter goes to the back
+            else:
+                del queues[submitter]
+
+            if waiter.future.done():
+                continue
+            self._active += waiter.weight
+            self._record_dispatch(priority, time.monotonic() - waiter.enqueued_at)
+            waiter.future.set_result(True)
+
+    def _record_dispatch(self, priority: int, waited: float):
+        self._dispatched[priority] += 1
+        self._wait_times[priority].append(waited)
+        self._max_wait[priority] = max(self._max_wait[priority], waited)
+
+    def metrics(self) -> dict:
+        def percentile(values, fraction):
+            if not values:
+                return 0.0
+            ordered = sorted(values)
+            return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+        queues = {}
+        for priority, name in PRIORITY_NAMES.items():
+            waits = list(self._wait_times[priority])
+            queues[name] = {
+                'queue_depth': self.queue_depth(priority),
+                'waiting_submitters': len(self._queues[priority]),
+                'dispatched': self._dispatched[priority],
+                'wait_seconds': {
+                    'avg': sum(waits) / len(waits) if waits else 0.0,
+                    'p50': percentile(waits, 0.5),
+                    'p95': percentile(waits, 0.95),
+                    'max': self._max_wait[priority],
+                },
+            }
+        return {
+            'max_concurrency': self.max_concurrency,
+            'active': self._active,
+            'queues': queues,
+        }
+
+
+execution_scheduler = ExecutionScheduler()
@@ -0,0 +1,125 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+from services.judge0_client import (
+    JUDGE0_EXECUTION_MODE,
+    ResultCallback,
+    language_map,
+    submit_code_to_judge0,
+    submit_batch_to_judge0,
+    submit_cases_to_judge0,
+    run_compiled_on_judge0,
+    run_packed_on_judge0,
+    start_judge0_client,
+    close_judge0_client
+)
+from services.judge0_compile import JUDGE0_COMPILE_ONCE, supports_compile_once
+from services.judge0_packed import JUDGE0_PACKED_TESTS, supports_packing
+
+# Which backend runs submitted code: 'judge0' (remote) or 'local' (sandboxed subprocesses)
+CODE_EXECUTOR = os.getenv('CODE_EXECUTOR', 'judge0').lower()
+
+# Every backend returns Judge0-shaped result dicts so verdicts are mapped the
+# same way regardless of where the code ran:
+#   {'status': {'id': 3}, 'stdout': ..., 'stderr': ..., 'compile_output': ..., 'time': '0.01', 'memory': 1234}
+# or {'timeout': True, 'error': ...} / {'error': ...} when the backend itself failed.
+Case = Tuple[str, Optional[str]]  # (stdin, expected_output)
+
+
+class CodeExecutor(ABC):
+    name = "base"
+
+    @abstractmethod
+    async def execute(self, source_code: str, stdin: str, language: str, expected_output: Optional[str] = None) -> dict:
+        """Run one case and return its Judge0-shaped result."""
+
+    async def execute_many(
+        self,
+        source_code: str,
+        language: str,
+        cases: List[Case],
+        mode: Optional[str] = None,
+        compile_once: Optional[bool] = None,
+        on_result: ResultCallback = None,
+        packed: Optional[bool] = None
+    ) -> List[dict]:
+        """
+        Run every (stdin, expected_output) case and return results in case
+        order. on_result(index, result) fires as each case finishes.
+        """
+        async def run_one(index: int, stdin: str, expected_output: Optional[str]) -> dict:
+            result = await self.execute(source_code, stdin, language, expected_output)
+            if on_result:
+                on_result(index, result)
+            return result
+
+        return await asyncio.gather(*(
+            run_one(index, stdin, expected_output)
+            for index, (stdin, expected_output) in enumerate(cases)
+        ))
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class Judge0Executor(CodeExecutor):
+    name = "judge0"
+
+    async def execute(self, source_code, stdin, language, expected_output=None) -> dict:
+        return await submit_code_to_judge0(source_code, stdin, language, expected_output)
+
+    async def execute_many(self, source_code, language, cases, mode=None, compile_once=None, on_result=None, packed=None) -> List[dict]:
+        mode = mode or JUDGE0_EXECUTION_MODE
+        if compile_once is None:
+            compile_once = JUDGE0_COMPILE_ONCE
+        if packed is None:
+            packed = JUDGE0_PACKED_TESTS
+
+        if compile_once and supports_compile_once(language_map.get(language)):
+            results = await run_compiled_on_judge0(source_code, language, cases, mode, on_result)
+            if results is not None:
+                return results
+
+        # Expected outputs are checked by the caller, so packing only needs the inputs
+        if packed and all(expected is None for _, expected in cases) and supports_packing(language_map.get(language), source_code):
+            return await run_packed_on_judge0(source_code, language, cases, mode, on_result)
+
+        if mode == 'batch':
+            return await submit_batch_to_judge0(source_code, language, cases, on_result)
+
+        return await submit_cases_to_judge0(source_code, language, cases, mode, on_result)
+
+    async def start(self):
+        await start_judge0_client()
+
+    async def close(self):
+        await close_judge0_client()
+
+
+_executor: Optional[CodeExecutor] = None
+
+
+def get_executor() -> CodeExecutor:
+    global _executor
+    if _executor is None:
+        if CODE_EXECUTOR == 'local':
+            from services.local_executor import LocalProcessExecutor
+            _executor = LocalProcessExecutor()
+        else:
+            _executor = Judge0Executor()
+    return _executor
+
+
+async def start_executor():
+    await get_executor().start()
+
+
+async def close_executor():
+    global _executor
+    if _executor is not None:
+        await _executor.close()
+    _executor = None
@@ -0,0 +1,95 @@
+import asyncio
+import base64
+import hmac
+import os
+import secrets
+import uuid
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+JUDGE0_CALLBACK_CONFIG = {
+    # Where Judge0 can reach this API, e.g. http://api:8000/judge0/callback.
+    # It must route back to the same process that submitted the run (with
+    # several workers, give each one its own address); results that land on
+    # another worker are still picked up by the fallback poll below.
+    'url': os.getenv('JUDGE0_CALLBACK_URL', ''),
+    # Shared secret carried in the callback URL; random per process when unset
+    'secret': os.getenv('JUDGE0_CALLBACK_SECRET') or secrets.token_urlsafe(24),
+    # Poll the token once when no callback arrived after this many seconds
+    'fallback_poll_after': float(os.getenv('JUDGE0_CALLBACK_FALLBACK_POLL', '10')),
+}
+
+# Judge0 always base64-encodes these fields in callback bodies
+BASE64_FIELDS = ('stdout', 'stderr', 'compile_output', 'message')
+
+
+def decode_callback_body(body: dict) -> dict:
+    result = dict(body)
+    for field in BASE64_FIELDS:
+        value = result.get(field)
+        if isinstance(value, str):
+            try:
+                result[field] = base64.b64decode(value, validate=False).decode('utf-8', errors='replace')
+            except (ValueError, TypeError):
+                pass
+    return result
+
+
+class PendingCallbacks:
+    """
+    Judge0 runs submitted with a callback_url, waiting for their PUT.
+    Each run is registered under our own id (part of the callback URL)
+    before it is submitted, so a callback can never arrive "too early".
+    """
+
+    def __init__(self, secret: Optional[str] = None):
+        self.secret = secret or JUDGE0_CALLBACK_CONFIG['secret']
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.received = 0
+        self.unmatched = 0
+
+    def register(self) -> str:
+        callback_id = uuid.uuid4().hex
+        self._pending[callback_id] = asyncio.get_running_loop().create_future()
+        return callback_id
+
+    def callback_url(self, callback_id: str, base_url: Optional[str] = None) -> str:
+        base_url = (base_url or JUDGE0_CALLBACK_CONFIG['url']).rstrip('/')
+        return f"{base_url}/{callback_id}?{urlencode({'secret': self.secret})}"
+
+    def verify(self, secret: Optional[str]) -> bool:
+        return secret is not None and hmac.compare_digest(secret, self.secret)
+
+    def resolve(self, callback_id: str, body: dict) -> bool:
+        """Hand a callback body to the waiting run. False when nobody waits for it."""
+        self.received += 1
+        future = self._pending.get(callback_id)
+        if future is None or future.done():
+            self.unmatched += 1
+            return False
+        future.set_result(decode_callback_body(body))
+        return True
+
+    async def wait(self, callback_id: str, timeout: float) -> Optional[dict]:
+        """The decoded result, or None when no callback arrived in time (still pending)."""
+        future = self._pending[callback_id]
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def discard(self, callback_id: str):
+        future = self._pending.pop(callback_id, None)
+        if future is not None and not future.done():
+            future.cancel()
+
+    def status(self) -> dict:
+        return {
+            'configured': bool(JUDGE0_CALLBACK_CONFIG['url']),
+            'pending': len(self._pending),
+            'received': self.received,
+            'unmatched': self.unmatched,
+        }
+
+
+pending_callbacks = PendingCallbacks()
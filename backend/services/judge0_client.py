@@ -0,0 +1,568 @@
+import asyncio
+import os
+import httpx
+from typing import Callable, List, Optional, Tuple
+from dotenv import load_dotenv
+from services.execution_scheduler import execution_scheduler
+from services.judge0_pool import Judge0Node, Judge0Pool, nodes_from_env
+from services.judge0_resilience import JudgeResilience, JudgeUnavailableError
+from services.judge0_callbacks import JUDGE0_CALLBACK_CONFIG, pending_callbacks
+from services.judge0_compile import (
+    MULTI_FILE_LANGUAGE_ID,
+    COMPILE_STEP_LIMITS,
+    build_compile_files,
+    build_run_files
+)
+from services.judge0_packed import (
+    build_packed_source,
+    encode_packed_stdin,
+    new_marker,
+    packed_time_limits,
+    plan_packed_batches,
+    split_packed_output,
+    JUDGE0_PACKED_CONFIG
+)
+
+load_dotenv()
+
+# Updated configuration for self-hosted Judge0
+
+JUDGE0_CONFIG = {
+    'url': os.getenv('SELF_HOSTED_JUDGE0_URL'),
+    'headers': {
+        'content-type': 'application/json'
+    }
+}
+
+# Judge0 endpoints. Several self-hosted nodes can be listed in JUDGE0_ENDPOINTS
+# (comma-separated submissions URLs); the RapidAPI endpoint that used to be
+# swapped in by hand is now an overflow tier (JUDGE0_OVERFLOW_ENABLED=true with
+# JUDGE0_URL / JUDGE0_API_KEY / JUDGE0_API_HOST). See services/judge0_pool.py.
+judge0_pool = Judge0Pool(nodes_from_env(JUDGE0_CONFIG['url'], JUDGE0_CONFIG['headers']))
+
+# Retries, circuit breaker and hedging around every Judge0 call (services/judge0_resilience.py).
+# When the judge cannot be reached, calls raise JudgeUnavailableError instead of
+# returning a result, so the outage is not reported as a runtime error.
+judge0_resilience = JudgeResilience()
+
+# Updated language mappings to match your Judge0 instance
+language_map = {
+    'Python': 71,    # Python 3.8.1
+    'C++': 54,       # C++ (GCC 9.2.0)
+    'Java': 62,      # Java (OpenJDK 13.0.1)
+    'Javascript': 63 # JavaScript (Node.js 12.14.0)
+}
+
+# Connection pool settings for the shared client (all overridable from .env)
+JUDGE0_POOL_CONFIG = {
+    'timeout': float(os.getenv('JUDGE0_TIMEOUT', '30')),
+    'max_connections': int(os.getenv('JUDGE0_MAX_CONNECTIONS', '100')),
+    'max_keepalive_connections': int(os.getenv('JUDGE0_MAX_KEEPALIVE_CONNECTIONS', '20')),
+    'keepalive_expiry': float(os.getenv('JUDGE0_KEEPALIVE_EXPIRY', '30')),
+    'http2': os.getenv('JUDGE0_HTTP2', 'false').lower() == 'true',
+}
+
+# Batch execution settings (/submissions/batch). Judge0 caps a batch at
+# MAX_SUBMISSION_BATCH_SIZE, which is 20 on a default install.
+JUDGE0_BATCH_CONFIG = {
+    'batch_size': int(os.getenv('JUDGE0_BATCH_SIZE', '20')),
+    'poll_interval': float(os.getenv('JUDGE0_POLL_INTERVAL', '0.5')),
+    'max_wait': float(os.getenv('JUDGE0_MAX_WAIT', '60')),
+}
+
+# 'single' = one synchronous POST per test case, 'batch' = /submissions/batch,
+# 'callback' = one POST per test case with wait=false, Judge0 PUTs the result
+# back to JUDGE0_CALLBACK_URL (see services/judge0_callbacks.py)
+JUDGE0_EXECUTION_MODE = os.getenv('JUDGE0_EXECUTION_MODE', 'single')
+
+_client: httpx.AsyncClient | None = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    http2 = JUDGE0_POOL_CONFIG['http2']
+    if http2:
+        try:
+            import h2  # noqa: F401  (httpx only needs it to be importable)
+        except ImportError:
+            print("⚠️ JUDGE0_HTTP2=true but the 'h2' package is not installed, falling back to HTTP/1.1")
+            http2 = False
+
+    return httpx.AsyncClient(
+        headers=JUDGE0_CONFIG['headers'],
+        timeout=JUDGE0_POOL_CONFIG['timeout'],
+        limits=httpx.Limits(
+            max_connections=JUDGE0_POOL_CONFIG['max_connections'],
+            max_keepalive_connections=JUDGE0_POOL_CONFIG['max_keepalive_connections'],
+            keepalive_expiry=JUDGE0_POOL_CONFIG['keepalive_expiry'],
+        ),
+        http2=http2,
+    )
+
+
+def get_judge0_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide Judge0 client.
+    The app lifespan opens it on startup; it is created lazily when the
+    lifespan did not run (scripts, TestClient used without a context manager).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def start_judge0_client():
+    get_judge0_client()
+    judge0_pool.start_health_checks(get_judge0_client)
+
+
+async def close_judge0_client():
+    global _client
+    await judge0_pool.stop_health_checks()
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+# Called as on_result(case_index, result) as soon as each case finishes
+ResultCallback = Optional[Callable[[int, dict], None]]
+
+# Judge0 status ids 1 (In Queue) and 2 (Processing) mean the run is not finished
+JUDGE0_PENDING_STATUSES = {1, 2}
+
+JUDGE0_RESULT_FIELDS = "token,stdout,stderr,compile_output,message,status,time,memory"
+
+
+def build_judge0_payload(source_code, stdin, language_id, expected_output=None, additional_files=None) -> dict:
+    payload = {
+        "language_id": language_id,
+        "stdin": stdin,
+        "cpu_time_limit": 5,    # Added time limit (seconds)
+        "memory_limit": 128000  # Added memory limit (KB)
+    }
+
+    # Multi-file programs carry their sources in additional_files instead
+    if source_code is not None:
+        payload["source_code"] = source_code
+
+    if expected_output is not None:
+        payload["expected_output"] = expected_output
+
+    if additional_files is not None:
+        payload["additional_files"] = additional_files
+
+    return payload
+
+
+async def submit_code_to_judge0(source_code, stdin, language, expected_output=None, mode=None):
+    if language not in language_map:
+        return {'result': 'Language Not Supported'}
+
+    payload = build_judge0_payload(source_code, stdin, language_map[language], expected_output)
+    return await execute_judge0_payload(payload, mode)
+
+
+async def submit_cases_to_judge0(
+    source_code: str,
+    language: str,
+    cases: List[Tuple[str, Optional[str]]],
+    mode: Optional[str] = None,
+    on_result: ResultCallback = None
+) -> List[dict]:
+    """One submission per (stdin, expected_output) case, in 'single' or 'callback' mode."""
+    if language not in language_map:
+        results = [{'result': 'Language Not Supported'} for _ in cases]
+        for index, result in enumerate(results):
+            if on_result:
+                on_result(index, result)
+        return results
+
+    language_id = language_map[language]
+    return await run_payloads([
+        build_judge0_payload(source_code, stdin, language_id, expected_output)
+        for stdin, expected_output in cases
+    ], on_result, mode)
+
+
+_callback_mode_warned = False
+
+
+def uses_callbacks(mode: Optional[str] = None) -> bool:
+    global _callback_mode_warned
+    if (mode or JUDGE0_EXECUTION_MODE) != 'callback':
+        return False
+    if not JUDGE0_CALLBACK_CONFIG['url']:
+        if not _callback_mode_warned:
+            print("⚠️ Judge0 callback mode needs JUDGE0_CALLBACK_URL, waiting synchronously instead")
+            _callback_mode_warned = True
+        return False
+    return True
+
+
+async def execute_judge0_payload(payload: dict, mode: Optional[str] = None) -> dict:
+    if uses_callbacks(mode):
+        return await post_judge0_with_callback(payload)
+    return await post_judge0_submission(payload)
+
+
+async def post_judge0_submission(payload: dict) -> dict:
+    client = get_judge0_client()
+
+    async def attempt(tried):
+        async with judge0_pool.lease(exclude=tried) as node:
+            tried.add(node.name)
+            return await _judge0_request(client, node, "POST", node.submissions_url, json=payload)
+
+    try:
+        async with execution_scheduler.slot():
+            # A read timeout is not retried (the run may still be going) and is graded TL below
+            response = await judge0_resilience.call(attempt, idempotent=False)
+        return response.json()
+    except JudgeUnavailableError:
+        raise
+    except httpx.TimeoutException as e:
+        return {'timeout': True, 'error': str(e)}
+    except Exception as e:
+        return {'error': str(e)}
+
+
+async def post_judge0_with_callback(payload: dict) -> dict:
+    """
+    Submit without waiting (wait=false) and let Judge0 PUT the result to our
+    callback endpoint, so no connection stays open while the case runs.
+    If no callback shows up, the token is polled every
+    JUDGE0_CALLBACK_FALLBACK_POLL seconds until JUDGE0_MAX_WAIT.
+    """
+    client = get_judge0_client()
+    loop = asyncio.get_running_loop()
+    callback_id = pending_callbacks.register()
+    created_on: List[Judge0Node] = []
+
+    async def create(tried):
+        async with judge0_pool.lease(exclude=tried) as node:
+            tried.add(node.name)
+            created_on[:] = [node]
+            return await _judge0_request(
+                client, node, "POST", f"{node.base_url}/submissions",
+                params={"base64_encoded": "false", "wait": "false"},
+                json={**payload, "callback_url": pending_callbacks.callback_url(callback_id)}
+            )
+
+    try:
+        # The scheduler slot is held until the result arrives; the socket is not
+        async with execution_scheduler.slot():
+            try:
+                created = (await judge0_resilience.call(create, idempotent=False)).json()
+            except JudgeUnavailableError:
+                raise
+            except httpx.TimeoutException as e:
+                return {'timeout': True, 'error': str(e)}
+            except Exception as e:
+                return {'error': str(e)}
+
+            token = created.get('token')
+            if not token:
+                return {'error': str(created)}
+
+            node = created_on[0]
+            deadline = loop.time() + JUDGE0_BATCH_CONFIG['max_wait']
+            while True:
+                timeout = max(0.0, min(JUDGE0_CALLBACK_CONFIG['fallback_poll_after'], deadline - loop.time()))
+                result = await pending_callbacks.wait(callback_id, timeout)
+                if result is not None:
+                    return result
+
+                # No callback yet (lost, or delivered to another worker): ask the node
+                try:
+                    fetched = await _fetch_judge0_submission(client, node, token)
+                except JudgeUnavailableError:
+                    raise
+                except Exception:
+                    fetched = None
+                if fetched and fetched.get('status', {}).get('id') not in JUDGE0_PENDING_STATUSES:
+                    return fetched
+                if loop.time() >= deadline:
+                    return {'timeout': True, 'error': 'No Judge0 callback received in time'}
+    finally:
+        pending_callbacks.discard(callback_id)
+
+
+async def _fetch_judge0_submission(client: httpx.AsyncClient, node: Judge0Node, token: str) -> dict:
+    response = await judge0_resilience.call(lambda tried: _judge0_request(
+        client, node, "GET", f"{node.base_url}/submissions/{token}",
+        params={"base64_encoded": "false", "fields": JUDGE0_RESULT_FIELDS}
+    ), hedge=True)
+    return response.json()
+
+
+async def _judge0_request(client: httpx.AsyncClient, node: Judge0Node, method: str, url: str, **kwargs) -> httpx.Response:
+    try:
+        response = await client.request(method, url, headers=node.headers, **kwargs)
+    except Exception as e:
+        judge0_pool.record(node, error=e)
+        raise
+    judge0_pool.record(node, response=response)
+    response.raise_for_status()
+    return response
+
+
+async def _gather_or_cancel(coroutines) -> list:
+    # Like gather, but a failure (e.g. JudgeUnavailableError) cancels the siblings
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def _create_judge0_batch(client: httpx.AsyncClient, node: Judge0Node, payloads: List[dict]) -> List[dict]:
+    response = await _judge0_request(
+        client, node, "POST", f"{node.base_url}/submissions/batch",
+        params={"base64_encoded": "false"},
+        json={"submissions": payloads}
+    )
+    return response.json()
+
+
+async def _fetch_judge0_batch(client: httpx.AsyncClient, node: Judge0Node, tokens: List[str]) -> List[dict]:
+    # Tokens only exist on the node that created them, so retries stay there
+    response = await judge0_resilience.call(lambda tried: _judge0_request(
+        client, node, "GET", f"{node.base_url}/submissions/batch",
+        params={
+            "tokens": ",".join(tokens),
+            "base64_encoded": "false",
+            "fields": JUDGE0_RESULT_FIELDS
+        }
+    ), hedge=True)
+    return response.json().get("submissions", [])
+
+
+async def submit_batch_to_judge0(
+    source_code: str,
+    language: str,
+    cases: List[Tuple[str, Optional[str]]],
+    on_result: ResultCallback = None
+) -> List[dict]:
+    """
+    Run the same source against many (stdin, expected_output) pairs through
+    /submissions/batch, JUDGE0_BATCH_SIZE cases per request, polling each
+    request's tokens together. Returns one Judge0-style result dict per case,
+    in input order, shaped like submit_code_to_judge0.
+    """
+    if language not in language_map:
+        results = [{'result': 'Language Not Supported'} for _ in cases]
+        for index, result in enumerate(results):
+            if on_result:
+                on_result(index, result)
+        return results
+
+    language_id = language_map[language]
+    return await submit_payloads_batch([
+        build_judge0_payload(source_code, stdin, language_id, expected_output)
+        for stdin, expected_output in cases
+    ], on_result)
+
+
+async def submit_payloads_batch(payloads: List[dict], on_result: ResultCallback = None) -> List[dict]:
+    batch_size = max(1, JUDGE0_BATCH_CONFIG['batch_size'])
+    results: List[Optional[dict]] = [None] * len(payloads)
+    client = get_judge0_client()
+
+    def finish(index: int, result: dict):
+        results[index] = result
+        if on_result:
+            on_result(index, result)
+
+    async def run_chunk(indexes: List[int]):
+        # The chunk holds one scheduler slot per case until all of them finish,
+        # and stays on one node: tokens can only be polled where they were created
+        weight = len(indexes)
+        chosen: List[Judge0Node] = []
+
+        async def create(tried):
+            async with judge0_pool.lease(weight, exclude=tried) as node:
+                tried.add(node.name)
+                chosen[:] = [node]
+                return await _create_judge0_batch(client, node, [payloads[i] for i in indexes])
+
+        async with execution_scheduler.slot(weight=weight):
+            # 1. Create the chunk's submissions in a single request
+            try:
+                created = await judge0_resilience.call(create, idempotent=False)
+            except JudgeUnavailableError:
+                raise
+            except httpx.TimeoutException as e:
+                for index in indexes:
+                    finish(index, {'timeout': True, 'error': str(e)})
+                return
+            except Exception as e:
+                for index in indexes:
+                    finish(index, {'error': str(e)})
+                return
+            node = chosen[0]
+
+            pending = {}  # token -> case index
+            for index, item in zip(indexes, created):
+                if item.get('token'):
+                    pending[item['token']] = index
+                else:
+                    # Judge0 returns the validation errors of a rejected entry in place of its token
+                    finish(index, {'error': str(item)})
+
+            # 2. Poll the chunk's tokens together until all of them are finished
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + JUDGE0_BATCH_CONFIG['max_wait']
+            while pending:
+                await asyncio.sleep(JUDGE0_BATCH_CONFIG['poll_interval'])
+                try:
+                    async with judge0_pool.lease(weight, node=node):
+                        submissions = await _fetch_judge0_batch(client, node, list(pending))
+                except JudgeUnavailableError:
+                    raise
+                except Exception as e:
+                    for index in pending.values():
+                        finish(index, {'error': str(e)})
+                    return
+
+                for item in submissions:
+                    if not item or item.get('token') not in pending:
+                        continue
+                    if item.get('status', {}).get('id') in JUDGE0_PENDING_STATUSES:
+                        continue
+                    finish(pending.pop(item['token']), item)
+
+                if pending and loop.time() >= deadline:
+                    for index in pending.values():
+                        finish(index, {'timeout': True, 'error': 'Judge0 batch polling timed out'})
+                    return
+
+    chunks = [list(range(i, min(i + batch_size, len(payloads)))) for i in range(0, len(payloads), batch_size)]
+    await _gather_or_cancel(run_chunk(chunk) for chunk in chunks)
+    return results
+
+
+async def run_compiled_on_judge0(
+    source_code: str,
+    language: str,
+    cases: List[Tuple[str, Optional[str]]],
+    mode: str,
+    on_result: ResultCallback = None
+) -> Optional[List[dict]]:
+    """
+    Compile-once, run-many for compiled languages. One multi-file submission
+    compiles the source and returns the build output; every case then runs
+    that artifact without recompiling. Returns None when the artifact could
+    not be produced, so the caller falls back to the regular path.
+    """
+    language_id = language_map[language]
+    compile_payload = build_judge0_payload(
+        source_code=None,
+        stdin="",
+        language_id=MULTI_FILE_LANGUAGE_ID,
+        additional_files=build_compile_files(language_id, source_code)
+    )
+    compile_payload.update(COMPILE_STEP_LIMITS)
+    compiled = await execute_judge0_payload(compile_payload, mode)
+
+    if compiled.get('timeout') or compiled.get('error'):
+        return None
+
+    status_id = compiled.get('status', {}).get('id', 0)
+    if status_id == 6:
+        # Compilation error: every case gets the same CE verdict
+        for index in range(len(cases)):
+            if on_result:
+                on_result(index, compiled)
+        return [compiled for _ in cases]
+    if status_id != 3:
+        return None
+
+    try:
+        run_files = build_run_files(language_id, compiled.get('stdout') or '')
+    except ValueError:
+        return None
+
+    payloads = [
+        build_judge0_payload(None, stdin, MULTI_FILE_LANGUAGE_ID, expected_output, additional_files=run_files)
+        for stdin, expected_output in cases
+    ]
+    if mode == 'batch':
+        return await submit_payloads_batch(payloads, on_result)
+    return await run_payloads(payloads, on_result, mode)
+
+
+async def run_packed_on_judge0(
+    source_code: str,
+    language: str,
+    cases: List[Tuple[str, Optional[str]]],
+    mode: Optional[str] = None,
+    on_result: ResultCallback = None
+) -> List[dict]:
+    """
+    Packed multi-test execution (see services/judge0_packed.py): small cases
+    share one submission, so interpreter startup is paid once per batch.
+    Cases whose output frame is missing (the batch crashed or timed out)
+    or that ran past the per-case time limit are run again on their own,
+    as are inputs too large to pack.
+    """
+    language_id = language_map[language]
+    batches, singles = plan_packed_batches([stdin for stdin, _ in cases])
+    packed_source = build_packed_source(language_id, source_code)
+    results: List[Optional[dict]] = [None] * len(cases)
+
+    def finish(index: int, result: dict):
+        results[index] = result
+        if on_result:
+            on_result(index, result)
+
+    async def run_alone(indices: List[int]):
+        if not indices:
+            return
+        subset = [cases[i] for i in indices]
+
+        def forward(position: int, result: dict):
+            finish(indices[position], result)
+
+        if mode == 'batch':
+            await submit_batch_to_judge0(source_code, language, subset, forward)
+        else:
+            await submit_cases_to_judge0(source_code, language, subset, mode, forward)
+
+    async def run_batch(batch: List[int]):
+        marker = new_marker()
+        payload = build_judge0_payload(packed_source, encode_packed_stdin(marker, [cases[i][0] for i in batch]), language_id)
+        payload.update(packed_time_limits(len(batch)))
+        # Batch mode would wait for the slowest chunk; a packed run is one submission anyway
+        packed = await execute_judge0_payload(payload, None if mode == 'batch' else mode)
+
+        frames = split_packed_output(packed.get('stdout'), marker, len(batch)) if 'status' in packed else {}
+        leftover = []
+        for position, index in enumerate(batch):
+            frame = frames.get(position)
+            if frame is None or frame[1] > JUDGE0_PACKED_CONFIG['case_time_limit']:
+                leftover.append(index)
+                continue
+            output, seconds = frame
+            finish(index, {
+                'status': {'id': 3}, 'stdout': output, 'stderr': None, 'compile_output': None,
+                'message': None, 'time': f"{seconds:.3f}", 'memory': packed.get('memory'),
+            })
+        if leftover:
+            print(f"⚠️ Packed run finished {len(batch) - len(leftover)}/{len(batch)} cases, running the rest one by one")
+        await run_alone(leftover)
+
+    await _gather_or_cancel([run_alone(singles)] + [run_batch(batch) for batch in batches])
+    return results
+
+
+async def run_payloads(payloads: List[dict], on_result: ResultCallback = None, mode: Optional[str] = None) -> List[dict]:
+    async def run_one(index: int, payload: dict) -> dict:
+        result = await execute_judge0_payload(payload, mode)
+        if on_result:
+            on_result(index, result)
+        return result
+
+    return await _gather_or_cancel(run_one(i, p) for i, p in enumerate(payloads))
@@ -0,0 +1,76 @@
+import base64
+import io
+import os
+import zipfile
+
+# Judge0 "Multi-file program": the submission ships a zip (additional_files)
+# with optional `compile` and `run` bash scripts instead of source_code.
+MULTI_FILE_LANGUAGE_ID = 89
+
+# How to build and start each compiled language inside the Judge0 image.
+# Paths match the compilers behind language ids 54 and 62.
+COMPILED_LANGUAGES = {
+    54: {  # C++ (GCC 9.2.0)
+        'source_file': 'main.cpp',
+        'compile': '/usr/local/gcc-9.2.0/bin/g++ -O2 -o a.out main.cpp',
+        'artifacts': 'a.out',
+        'run': 'LD_LIBRARY_PATH=/usr/local/gcc-9.2.0/lib64 ./a.out',
+    },
+    62: {  # Java (OpenJDK 13.0.1)
+        'source_file': 'Main.java',
+        'compile': '/usr/local/openjdk13/bin/javac Main.java',
+        'artifacts': '*.class',
+        'run': '/usr/local/openjdk13/bin/java Main',
+    },
+}
+
+ARTIFACT_FILE = 'artifact.tar.gz'
+
+JUDGE0_COMPILE_ONCE = os.getenv('JUDGE0_COMPILE_ONCE', 'false').lower() == 'true'
+
+# Limits for the single compile step; the artifact comes back base64-encoded
+# on stdout, so max_file_size (KB) must fit it.
+COMPILE_STEP_LIMITS = {
+    'cpu_time_limit': 15,
+    'wall_time_limit': 20,
+    'memory_limit': 512000,
+    'max_file_size': 4096,
+}
+
+
+def supports_compile_once(language_id) -> bool:
+    return language_id in COMPILED_LANGUAGES
+
+
+def _zip_base64(files: dict) -> str:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def build_compile_files(language_id: int, source_code: str) -> str:
+    """
+    additional_files for the compile step: compiles the source and prints
+    the build output as a base64 tarball on stdout.
+    """
+    config = COMPILED_LANGUAGES[language_id]
+    return _zip_base64({
+        config['source_file']: source_code,
+        'compile': config['compile'] + '\n',
+        'run': f"tar -czf - {config['artifacts']} | base64 -w 0\n",
+    })
+
+
+def build_run_files(language_id: int, artifact: str) -> str:
+    """
+    additional_files for every test case run: ships the compiled artifact
+    and a run script only, so Judge0 skips compilation entirely.
+    Raises ValueError when `artifact` is not valid base64.
+    """
+    config = COMPILED_LANGUAGES[language_id]
+    return _zip_base64({
+        ARTIFACT_FILE: base64.b64decode(artifact.strip(), validate=True),
+        'run': f"tar -xzf {ARTIFACT_FILE} && {config['run']}\n",
+    })
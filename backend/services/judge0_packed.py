@@ -0,0 +1,164 @@
+import os
+import re
+import secrets
+from typing import Dict, List, Optional, Tuple
+
+# Packed execution: many small test cases run inside a single Judge0
+# submission. A harness wrapped around the user's program reads all inputs
+# from one framed stdin, runs the program once per case with its own
+# stdin/stdout, and writes every case's output behind a header line:
+#
+#   stdin:  <marker>\n<count>\n  then per case  <byte length>\n<input bytes>
+#   stdout: per case  <marker> <index> <char length> <cpu seconds>\n<output>
+#
+# Cases without a complete frame (the batch crashed or timed out) are run
+# again one by one, so a failing case never decides the verdict of another.
+JUDGE0_PACKED_TESTS = os.getenv('JUDGE0_PACKED_TESTS', 'false').lower() == 'true'
+
+JUDGE0_PACKED_CONFIG = {
+    # Only inputs up to this size are packed; bigger ones run on their own
+    'max_case_bytes': int(os.getenv('JUDGE0_PACKED_MAX_CASE_BYTES', '4096')),
+    'max_batch_cases': int(os.getenv('JUDGE0_PACKED_MAX_CASES', '50')),
+    'max_batch_bytes': int(os.getenv('JUDGE0_PACKED_MAX_BATCH_BYTES', '65536')),
+    # Per-case limit, as for unpacked runs; a case over it is re-run alone
+    'case_time_limit': 5,
+    # Judge0's default max_cpu_time_limit / max_wall_time_limit
+    'max_cpu_time_limit': float(os.getenv('JUDGE0_PACKED_MAX_CPU_TIME', '15')),
+    'max_wall_time_limit': float(os.getenv('JUDGE0_PACKED_MAX_WALL_TIME', '20')),
+}
+
+PYTHON_HARNESS = '''\
+import io
+import sys
+import time
+
+_SOURCE = {source!r}
+
+
+def _run_packed():
+    real_stdin = sys.stdin.buffer
+    real_stdout = sys.stdout
+    marker = real_stdin.readline().decode().rstrip("\\n")
+    count = int(real_stdin.readline())
+    program = compile(_SOURCE, "main.py", "exec")
+    for index in range(count):
+        data = real_stdin.read(int(real_stdin.readline()))
+        output = io.BytesIO()
+        captured = io.TextIOWrapper(output, encoding="utf-8", write_through=True)
+        sys.stdin = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")
+        sys.stdout = captured
+        started = time.process_time()
+        try:
+            exec(program, {{"__name__": "__main__", "__builtins__": __builtins__}})
+        except SystemExit as stop:
+            if stop.code not in (None, 0):
+                raise
+        captured.flush()
+        elapsed = time.process_time() - started
+        sys.stdout = real_stdout
+        text = output.getvalue().decode("utf-8", errors="replace")
+        real_stdout.write("%s %d %d %.4f\\n" % (marker, index, len(text), elapsed))
+        real_stdout.write(text)
+        real_stdout.flush()
+
+
+_run_packed()
+'''
+
+# Programs that reach past sys.stdin/sys.stdout (raw file descriptors,
+# background threads, forks) would read or write other cases' data
+UNPACKABLE_PYTHON = re.compile(
+    r"open\(\s*[012]\s*[,)]|/dev/std|__std(in|out|err)__|fileno\(|\bos\.(read|write|_exit|fork|dup)"
+    r"|\b(fileinput|threading|_thread|multiprocessing|subprocess)\b"
+)
+
+PACKED_LANGUAGES = {
+    71: {  # Python (3.8.1)
+        'harness': PYTHON_HARNESS,
+        'unpackable': UNPACKABLE_PYTHON,
+    },
+}
+
+
+def supports_packing(language_id, source_code: str) -> bool:
+    spec = PACKED_LANGUAGES.get(language_id)
+    return spec is not None and not spec['unpackable'].search(source_code or '')
+
+
+def build_packed_source(language_id: int, source_code: str) -> str:
+    return PACKED_LANGUAGES[language_id]['harness'].format(source=source_code)
+
+
+def plan_packed_batches(inputs: List[str]) -> Tuple[List[List[int]], List[int]]:
+    """
+    Group case indices into batches of small inputs. Returns (batches,
+    singles): singles are too big to pack, as is a batch of one case.
+    """
+    config = JUDGE0_PACKED_CONFIG
+    batches: List[List[int]] = []
+    singles: List[int] = []
+    current: List[int] = []
+    current_bytes = 0
+    for index, stdin in enumerate(inputs):
+        size = len((stdin or '').encode('utf-8'))
+        if size > config['max_case_bytes']:
+            singles.append(index)
+            continue
+        if current and (len(current) >= config['max_batch_cases'] or current_bytes + size > config['max_batch_bytes']):
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(index)
+        current_bytes += size
+    if current:
+        batches.append(current)
+
+    singles.extend(batch[0] for batch in batches if len(batch) == 1)
+    return [batch for batch in batches if len(batch) > 1], sorted(singles)
+
+
+def new_marker() -> str:
+    return f"#packed-{secrets.token_hex(8)}"
+
+
+def encode_packed_stdin(marker: str, inputs: List[str]) -> str:
+    parts = [f"{marker}\n{len(inputs)}\n"]
+    for stdin in inputs:
+        stdin = stdin or ''
+        parts.append(f"{len(stdin.encode('utf-8'))}\n{stdin}")
+    return ''.join(parts)
+
+
+def packed_time_limits(case_count: int) -> dict:
+    config = JUDGE0_PACKED_CONFIG
+    cpu = min(config['max_cpu_time_limit'], config['case_time_limit'] * case_count)
+    return {
+        'cpu_time_limit': cpu,
+        'wall_time_limit': min(config['max_wall_time_limit'], cpu * 2),
+    }
+
+
+def split_packed_output(stdout: Optional[str], marker: str, count: int) -> Dict[int, Tuple[str, float]]:
+    """
+    {case position: (output, cpu seconds)} for every complete frame, in
+    order. Parsing stops at the first frame that is missing or malformed.
+    """
+    frames: Dict[int, Tuple[str, float]] = {}
+    stdout = stdout or ''
+    position = 0
+    for index in range(count):
+        if not stdout.startswith(marker + ' ', position):
+            break
+        header_end = stdout.find('\n', position)
+        if header_end < 0:
+            break
+        try:
+            _, frame_index, length, seconds = stdout[position:header_end].split(' ')
+            frame_index, length, seconds = int(frame_index), int(length), float(seconds)
+        except ValueError:
+            break
+        start = header_end + 1
+        if frame_index != index or start + length > len(stdout):
+            break
+        frames[index] = (stdout[start:start + length], seconds)
+        position = start + length
+    return frames
@@ -0,0 +1,257 @@
+import asyncio
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Collection, Dict, List, Optional
+
+import httpx
+
+TIER_PRIMARY = 'primary'
+TIER_OVERFLOW = 'overflow'
+
+JUDGE0_NODE_CONFIG = {
+    # In-flight requests a primary node takes before traffic spills to the overflow tier
+    'max_outstanding': int(os.getenv('JUDGE0_NODE_MAX_OUTSTANDING', '16')),
+    # Consecutive failures that eject a node from rotation
+    'eject_after': int(os.getenv('JUDGE0_EJECT_AFTER_FAILURES', '3')),
+    # Minimum time an ejected node stays out (doubles on repeated ejections)
+    'ejection_time': float(os.getenv('JUDGE0_EJECTION_TIME', '15')),
+    'max_ejection_time': float(os.getenv('JUDGE0_MAX_EJECTION_TIME', '300')),
+    # Active health checks: GET <base url><path> on every node
+    'health_interval': float(os.getenv('JUDGE0_HEALTH_INTERVAL', '10')),
+    'health_timeout': float(os.getenv('JUDGE0_HEALTH_TIMEOUT', '3')),
+    'health_path': os.getenv('JUDGE0_HEALTH_PATH', '/about'),
+}
+
+
+def _base_url(submissions_url: str) -> str:
+    url = (submissions_url or '').split('?')[0]
+    if '/submissions' in url:
+        url = url[:url.index('/submissions')]
+    return url.rstrip('/')
+
+
+class Judge0Node:
+    def __init__(self, name: str, submissions_url: str, headers: Dict[str, str], tier: str = TIER_PRIMARY, base_url: Optional[str] = None):
+        self.name = name
+        self.submissions_url = submissions_url
+        # Root of the API (without /submissions), used for batch, health and callback calls
+        self.base_url = (base_url or _base_url(submissions_url)).rstrip('/')
+        self.headers = headers
+        self.tier = tier
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_until > time.monotonic()
+
+    def record_success(self):
+        if self.ejected_until:
+            self.readmit()
+        self.consecutive_failures = 0
+        self.ejections = 0
+
+    def record_failure(self, error: str, eject_after: int, ejection_time: float, max_ejection_time: float):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = error
+        if self.consecutive_failures >= eject_after and not self.ejected:
+            self.ejections += 1
+            duration = min(max_ejection_time, ejection_time * 2 ** (self.ejections - 1))
+            self.ejected_until = time.monotonic() + duration
+            print(f"⚠️ Judge0 node {self.name} ejected for {duration:.0f}s: {error}")
+
+    def readmit(self):
+        if self.ejected:
+            print(f"✅ Judge0 node {self.name} re-admitted")
+        self.ejected_until = 0.0
+        self.consecutive_failures = 0
+
+    def status(self) -> dict:
+        return {
+            'name': self.name,
+            'url': self.base_url,
+            'tier': self.tier,
+            'healthy': not self.ejected,
+            'outstanding': self.outstanding,
+            'requests': self.requests,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'ejections': self.ejections,
+            'ejected_for': max(0.0, self.ejected_until - time.monotonic()),
+            'last_error': self.last_error,
+        }
+
+
+class NoJudge0NodeAvailable(Exception):
+    pass
+
+
+def is_node_failure(response: Optional[httpx.Response] = None, error: Optional[BaseException] = None) -> bool:
+    """Transport errors, 5xx and 429 count against the node; other 4xx are the request's fault."""
+    if error is not None:
+        return isinstance(error, httpx.TransportError)
+    return response is not None and (response.status_code >= 500 or response.status_code == 429)
+
+
+class Judge0Pool:
+    """
+    Judge0 endpoints behind one facade. Requests go to the healthy primary
+    node with the fewest outstanding requests; the overflow tier (e.g.
+    RapidAPI) is only used when every primary is ejected or saturated.
+    Nodes are ejected after consecutive failures and re-admitted by the
+    periodic health check, or on probation once the ejection expires.
+    """
+
+    def __init__(self, nodes: List[Judge0Node], **config):
+        self.nodes = nodes
+        self.config = {**JUDGE0_NODE_CONFIG, **config}
+        self._rotation = itertools.count()
+        self._health_task: Optional[asyncio.Task] = None
+
+    def _candidates(self, tier: str, exclude: Collection[str] = ()) -> List[Judge0Node]:
+        nodes = [node for node in self.nodes if node.tier == tier and not node.ejected]
+        # Prefer nodes this call has not used yet, but never exclude everything
+        return [node for node in nodes if node.name not in exclude] or nodes
+
+    def pick(self, weight: int = 1, exclude: Collection[str] = ()) -> Judge0Node:
+        primaries = self._candidates(TIER_PRIMARY, exclude)
+        limit = self.config['max_outstanding']
+        # Rotate the starting point so equally loaded nodes share the traffic
+        if primaries:
+            offset = next(self._rotation) % len(primaries)
+            primaries = primaries[offset:] + primaries[:offset]
+        open_primaries = [node for node in primaries if node.outstanding + weight <= limit or node.outstanding == 0]
+
+        if open_primaries:
+            return min(open_primaries, key=lambda node: node.outstanding)
+        overflow = self._candidates(TIER_OVERFLOW, exclude)
+        if overflow:
+            return min(overflow, key=lambda node: node.outstanding)
+        if primaries:
+            return min(primaries, key=lambda node: node.outstanding)
+
+        # Everything is ejected: try the node that comes back soonest rather than failing outright
+        configured = [node for node in self.nodes if node.tier == TIER_PRIMARY] or self.nodes
+        if not configured:
+            raise NoJudge0NodeAvailable("No Judge0 endpoint configured")
+        return min(configured, key=lambda node: node.ejected_until)
+
+    @asynccontextmanager
+    async def lease(self, weight: int = 1, node: Optional[Judge0Node] = None, exclude: Collection[str] = ()):
+        """Reserve `weight` outstanding requests on a node (picked when not given)."""
+        node = node or self.pick(weight, exclude)
+        node.outstanding += weight
+        node.requests += 1
+        try:
+            yield node
+        finally:
+            node.outstanding -= weight
+
+    def record(self, node: Judge0Node, response: Optional[httpx.Response] = None, error: Optional[BaseException] = None):
+        if is_node_failure(response, error):
+            detail = str(error) if error is not None else f"HTTP {response.status_code}"
+            node.record_failure(
+                detail or type(error).__name__,
+                self.config['eject_after'],
+                self.config['ejection_time'],
+                self.config['max_ejection_time']
+            )
+        else:
+            node.record_success()
+
+    async def check_node(self, client: httpx.AsyncClient, node: Judge0Node) -> bool:
+        try:
+            response = await client.get(
+                f"{node.base_url}{self.config['health_path']}",
+                headers=node.headers,
+                timeout=self.config['health_timeout']
+            )
+            healthy = response.status_code < 500 and response.status_code != 429
+            if not healthy:
+                node.last_error = f"health check returned HTTP {response.status_code}"
+        except Exception as e:
+            healthy = False
+            node.last_error = str(e) or type(e).__name__
+        if healthy:
+            node.readmit()
+        else:
+            # A failed probe is enough to take the node out of rotation
+            node.record_failure(
+                node.last_error or 'health check failed',
+                1,
+                self.config['ejection_time'],
+                self.config['max_ejection_time']
+            )
+        return healthy
+
+    async def check_all(self, client: httpx.AsyncClient):
+        # The overflow tier is usually metered (RapidAPI), so only probe it while ejected
+        await asyncio.gather(*(
+            self.check_node(client, node) for node in self.nodes
+            if node.tier == TIER_PRIMARY or node.ejected
+        ))
+
+    def start_health_checks(self, client_factory):
+        if self._health_task is not None or self.config['health_interval'] <= 0 or not self.nodes:
+            return
+
+        async def loop():
+            while True:
+                await asyncio.sleep(self.config['health_interval'])
+                try:
+                    await self.check_all(client_factory())
+                except Exception as e:
+                    print(f"Judge0 health check failed: {e}")
+
+        self._health_task = asyncio.create_task(loop())
+
+    async def stop_health_checks(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+    def status(self) -> dict:
+        return {
+            'max_outstanding_per_node': self.config['max_outstanding'],
+            'nodes': [node.status() for node in self.nodes],
+        }
+
+
+def nodes_from_env(primary_url: Optional[str], primary_headers: Dict[str, str]) -> List[Judge0Node]:
+    """
+    JUDGE0_ENDPOINTS: comma-separated submissions URLs of self-hosted nodes
+    (defaults to SELF_HOSTED_JUDGE0_URL). JUDGE0_OVERFLOW_ENABLED=true adds
+    the RapidAPI endpoint (JUDGE0_URL / JUDGE0_API_KEY / JUDGE0_API_HOST)
+    as overflow tier.
+    """
+    urls = [url.strip() for url in os.getenv('JUDGE0_ENDPOINTS', '').split(',') if url.strip()]
+    if urls:
+        nodes = [
+            Judge0Node(f"judge0-{index}", url, primary_headers, TIER_PRIMARY)
+            for index, url in enumerate(urls, start=1)
+        ]
+    elif primary_url:
+        # Single node: JUDGE0_BASE_URL still overrides the derived API root
+        nodes = [Judge0Node('judge0-1', primary_url, primary_headers, TIER_PRIMARY, os.getenv('JUDGE0_BASE_URL'))]
+    else:
+        nodes = []
+
+    if os.getenv('JUDGE0_OVERFLOW_ENABLED', 'false').lower() == 'true' and os.getenv('JUDGE0_URL'):
+        nodes.append(Judge0Node('rapidapi', os.getenv('JUDGE0_URL'), {
+            'content-type': 'application/json',
+            'x-rapidapi-key': os.getenv('JUDGE0_API_KEY') or '',
+            'x-rapidapi-host': os.getenv('JUDGE0_API_HOST') or ''
+        }, TIER_OVERFLOW))
+    return nodes
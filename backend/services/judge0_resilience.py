@@ -0,0 +1,302 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, Set
+
+import httpx
+
+JUDGE0_RESILIENCE_CONFIG = {
+    # Extra attempts after the first one, for failures that are safe to repeat
+    'max_retries': int(os.getenv('JUDGE0_MAX_RETRIES', '2')),
+    'backoff_base': float(os.getenv('JUDGE0_BACKOFF_BASE', '0.2')),
+    'backoff_max': float(os.getenv('JUDGE0_BACKOFF_MAX', '2')),
+    # Retry budget: each request earns this fraction of a retry, so retries stay
+    # a bounded share of traffic while the judge is struggling
+    'retry_budget_ratio': float(os.getenv('JUDGE0_RETRY_BUDGET_RATIO', '0.2')),
+    'retry_budget_min': float(os.getenv('JUDGE0_RETRY_BUDGET_MIN', '10')),
+    # Circuit breaker: opens when the failure rate over the window is too high
+    'breaker_window': int(os.getenv('JUDGE0_BREAKER_WINDOW', '20')),
+    'breaker_failure_rate': float(os.getenv('JUDGE0_BREAKER_FAILURE_RATE', '0.5')),
+    'breaker_min_calls': int(os.getenv('JUDGE0_BREAKER_MIN_CALLS', '10')),
+    'breaker_cooldown': float(os.getenv('JUDGE0_BREAKER_COOLDOWN', '15')),
+    # Hedging: repeat an idempotent call (token or batch poll) that is slower than
+    # their p99 latency. Submissions are never hedged: that would create a second run
+    'hedge_enabled': os.getenv('JUDGE0_HEDGE_ENABLED', 'false').lower() == 'true',
+    'hedge_min_delay': float(os.getenv('JUDGE0_HEDGE_MIN_DELAY', '1')),
+    'hedge_min_samples': int(os.getenv('JUDGE0_HEDGE_MIN_SAMPLES', '50')),
+    'hedge_max_ratio': float(os.getenv('JUDGE0_HEDGE_MAX_RATIO', '0.1')),
+}
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Non-idempotent requests (creating submissions) are only repeated when the
+# judge provably never accepted them: the connection was never made, or the
+# judge turned the request away
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+REJECTED_STATUS_CODES = {429, 503}
+
+# Slow rather than broken: the judge (or our connection pool) is busy. These are
+# counted apart from connection failures and 5xx so a load spike on healthy
+# nodes does not open the circuit breaker
+SLOW_ERRORS = (httpx.ReadTimeout, httpx.WriteTimeout, httpx.PoolTimeout)
+
+
+class JudgeUnavailableError(Exception):
+    """The judge could not be reached (circuit open or retries exhausted); nothing was judged."""
+
+
+def is_retryable(error: BaseException, idempotent: bool = True) -> bool:
+    if not idempotent:
+        if isinstance(error, UNSENT_ERRORS):
+            return True
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in REJECTED_STATUS_CODES
+        return False
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, window: int, failure_rate: float, min_calls: int, cooldown: float):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.opens = 0
+        self.short_circuited = 0
+        self.timeouts = 0
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            # Let one trial call through; its outcome closes or re-opens the breaker
+            self._probe_in_flight = True
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record(self, success: bool):
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = False
+            if success:
+                self.state = self.CLOSED
+                self._outcomes.clear()
+            else:
+                self._open()
+            return
+        self._outcomes.append(success)
+        failures = self._outcomes.count(False)
+        if (
+            self.state == self.CLOSED
+            and len(self._outcomes) >= self.min_calls
+            and failures / len(self._outcomes) >= self.failure_rate
+        ):
+            self._open()
+
+    def record_timeout(self):
+        # Says nothing about the judge's health: not an outcome in the window,
+        # and a timed-out trial call lets the next one probe
+        self.timeouts += 1
+        self.release_probe()
+
+    def release_probe(self):
+        # The trial call was cancelled before it told us anything
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = False
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.opens += 1
+        self._outcomes.clear()
+        print(f"⚠️ Judge0 circuit breaker opened for {self.cooldown:.0f}s")
+
+    def status(self) -> dict:
+        return {
+            'state': self.state,
+            'opens': self.opens,
+            'short_circuited': self.short_circuited,
+            'timeouts': self.timeouts,
+            'retry_in': max(0.0, self.cooldown - (time.monotonic() - self.opened_at)) if self.state == self.OPEN else 0.0,
+        }
+
+
+class LatencyTracker:
+    def __init__(self, size: int = 500):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, fraction: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# One attempt: receives the names of the nodes already used by this call (it adds
+# the one it picks, so retries and hedges go elsewhere) and returns a response
+# that has passed raise_for_status
+Attempt = Callable[[Set[str]], Awaitable[httpx.Response]]
+
+
+class JudgeResilience:
+    """
+    Wraps every Judge0 HTTP call: circuit breaker first, then the attempt with
+    bounded, jittered retries for failures that are safe to repeat, and
+    optionally a hedged duplicate when an idempotent call runs past their
+    observed p99 latency.
+
+    Idempotent calls (polls, fetches) retry transport errors and 429/5xx.
+    Non-idempotent ones (creating submissions) only retry when the request
+    never reached the judge (connect errors, pool timeouts, 429/503). A
+    timeout after sending is raised as is, since the run may still be going;
+    any other judge failure becomes JudgeUnavailableError right away.
+    Timeouts on a sent request do not count against the circuit breaker.
+    """
+
+    def __init__(self, **config):
+        self.config = {**JUDGE0_RESILIENCE_CONFIG, **config}
+        self.breaker = CircuitBreaker(
+            self.config['breaker_window'],
+            self.config['breaker_failure_rate'],
+            self.config['breaker_min_calls'],
+            self.config['breaker_cooldown']
+        )
+        self.latency = LatencyTracker()
+        self.retry_tokens = self.config['retry_budget_min']
+        self.counters = {
+            'calls': 0,
+            'failures': 0,
+            'timeouts': 0,
+            'retries': 0,
+            'retry_budget_exhausted': 0,
+            'hedges': 0,
+            'hedges_won': 0,
+        }
+
+    def _earn_retry_token(self):
+        cap = max(self.config['retry_budget_min'], 1.0)
+        self.retry_tokens = min(cap, self.retry_tokens + self.config['retry_budget_ratio'])
+
+    def _spend_retry_token(self) -> bool:
+        if self.retry_tokens >= 1:
+            self.retry_tokens -= 1
+            return True
+        self.counters['retry_budget_exhausted'] += 1
+        return False
+
+    def backoff(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, min(max, base * 2^attempt)]
+        ceiling = min(self.config['backoff_max'], self.config['backoff_base'] * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.config['hedge_enabled'] or len(self.latency) < self.config['hedge_min_samples']:
+            return None
+        if self.counters['hedges'] >= self.config['hedge_max_ratio'] * max(1, self.counters['calls']):
+            return None
+        return max(self.config['hedge_min_delay'], self.latency.percentile(0.99))
+
+    async def call(self, attempt: Attempt, hedge: bool = False, idempotent: bool = True) -> httpx.Response:
+        # A duplicate of a non-idempotent call would be a second submission
+        hedge = hedge and idempotent
+        self.counters['calls'] += 1
+        self._earn_retry_token()
+        tried: Set[str] = set()
+        retries = 0
+        while True:
+            if not self.breaker.allow():
+                raise JudgeUnavailableError("Judge0 is unavailable (circuit breaker open), try again shortly")
+            started = time.monotonic()
+            try:
+                response = await (self._hedged(attempt, tried) if hedge else attempt(tried))
+            except asyncio.CancelledError:
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                # Judge-side failures count against the breaker whether or not they can be retried
+                judge_failure = is_retryable(e)
+                if not judge_failure:
+                    self.breaker.record(True)
+                    raise
+                if isinstance(e, SLOW_ERRORS):
+                    self.breaker.record_timeout()
+                    self.counters['timeouts'] += 1
+                else:
+                    self.breaker.record(False)
+                    self.counters['failures'] += 1
+                if not is_retryable(e, idempotent):
+                    if isinstance(e, httpx.TimeoutException):
+                        raise
+                    raise JudgeUnavailableError(f"Judge0 is unavailable: {e or type(e).__name__}") from e
+                if retries >= self.config['max_retries'] or not self._spend_retry_token():
+                    raise JudgeUnavailableError(f"Judge0 is unavailable: {e or type(e).__name__}") from e
+                retries += 1
+                self.counters['retries'] += 1
+                await asyncio.sleep(self.backoff(retries))
+                continue
+            self.breaker.record(True)
+            if idempotent:
+                # Only hedgeable calls set the hedge delay; a wait=true run takes as long as the program
+                self.latency.add(time.monotonic() - started)
+            return response
+
+    async def _hedged(self, attempt: Attempt, tried: Set[str]) -> httpx.Response:
+        delay = self.hedge_delay()
+        primary = asyncio.ensure_future(attempt(tried))
+        if delay is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        self.counters['hedges'] += 1
+        backup = asyncio.ensure_future(attempt(set(tried)))
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.counters['hedges_won'] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def metrics(self) -> dict:
+        return {
+            **self.counters,
+            'retry_tokens': round(self.retry_tokens, 2),
+            'circuit_breaker': self.breaker.status(),
+            'latency_seconds': {
+                'samples': len(self.latency),
+                'p50': self.latency.percentile(0.5),
+                'p99': self.latency.percentile(0.99),
+            },
+            'hedge_after_seconds': self.hedge_delay(),
+        }
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+LEADERBOARD_CACHE_CONFIG = {
+    # Seconds a page is served from memory. Writes in this worker invalidate
+    # it right away; the TTL bounds staleness from writes in other workers.
+    'ttl': float(os.getenv('LEADERBOARD_CACHE_TTL', '10')),
+    'max_problems': int(os.getenv('LEADERBOARD_CACHE_MAX_PROBLEMS', '256')),
+    'enabled': os.getenv('LEADERBOARD_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+}
+
+Page = Tuple[int, int]  # (limit, offset)
+
+
+def _rank_key(tests_passed: Optional[int], execution_time: Optional[float], solution_id: int) -> tuple:
+    # Leaderboard order: most test cases passed, then fastest, then earliest
+    return (-(tests_passed or 0), execution_time if execution_time is not None else float('inf'), solution_id)
+
+
+class _Flight:
+    __slots__ = ('done', 'rows', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.rows: Optional[List[dict]] = None
+        self.error: Optional[BaseException] = None
+
+
+class LeaderboardCache:
+    """
+    Pages of problem leaderboards, per problem. Concurrent misses for the
+    same page share one query (single-flight): the first request computes,
+    the others wait for its result. Rows must carry employee_id,
+    solution_id, testCasesPassed and time so a new best solution can tell
+    which cached pages it affects.
+
+    Leaderboard endpoints are sync (they run in the threadpool), so the
+    cache is guarded by a lock rather than built on asyncio.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_problems: Optional[int] = None):
+        self.ttl = LEADERBOARD_CACHE_CONFIG['ttl'] if ttl is None else ttl
+        self.max_problems = max_problems or LEADERBOARD_CACHE_CONFIG['max_problems']
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._pages: "OrderedDict[int, Dict[Page, Tuple[float, List[dict]]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[int, Page], _Flight] = {}
+        # Bumped on invalidation, so a query that started before it is not stored
+        self._generations: Dict[int, int] = {}
+
+    def get_or_compute(self, problem_id: int, limit: int, offset: int, compute: Callable[[], List[dict]]) -> List[dict]:
+        if not LEADERBOARD_CACHE_CONFIG['enabled'] or self.ttl <= 0:
+            return compute()
+
+        page = (limit, offset)
+        with self._lock:
+            entry = self._pages.get(problem_id, {}).get(page)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self.hits += 1
+                self._pages.move_to_end(problem_id)
+                return entry[1]
+            flight = self._inflight.get((problem_id, page))
+            leader = flight is None
+            if leader:
+                self.misses += 1
+                flight = self._inflight[(problem_id, page)] = _Flight()
+                generation = self._generations.get(problem_id, 0)
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.rows
+
+        try:
+            rows = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            flight.rows = rows
+            with self._lock:
+                if self._generations.get(problem_id, 0) == generation:
+                    self._pages.setdefault(problem_id, {})[page] = (time.monotonic(), rows)
+                    self._pages.move_to_end(problem_id)
+                    while len(self._pages) > self.max_problems:
+                        self._pages.popitem(last=False)
+            return rows
+        finally:
+            with self._lock:
+                self._inflight.pop((problem_id, page), None)
+            flight.done.set()
+
+    def invalidate_problem(self, problem_id: int):
+        with self._lock:
+            self._pages.pop(problem_id, None)
+            self._generations[problem_id] = self._generations.get(problem_id, 0) + 1
+            self.invalidations += 1
+
+    def best_solution_changed(self, problem_id: int, employee_id, tests_passed: Optional[int], execution_time: Optional[float], solution_id: int):
+        """
+        An employee has a new best solution: drop the cached pages it
+        changes (pages the employee is on, pages it now ranks into or
+        ahead of, and short last pages it may join). Other pages stay.
+        """
+        new_key = _rank_key(tests_passed, execution_time, solution_id)
+        with self._lock:
+            # A page of this problem may be computing right now; it must not be stored stale
+            self._generations[problem_id] = self._generations.get(problem_id, 0) + 1
+            pages = self._pages.get(problem_id, {})
+            for page, (_, rows) in list(pages.items()):
+                limit, _ = page
+                if (
+                    len(rows) < limit
+                    or any(str(row['employee_id']) == str(employee_id) for row in rows)
+                    or new_key < _rank_key(rows[-1]['testCasesPassed'], rows[-1]['time'], rows[-1]['solution_id'])
+                ):
+                    del pages[page]
+                    self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'problems': len(self._pages),
+                'pages': sum(len(pages) for pages in self._pages.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'invalidations': self.invalidations,
+                'ttl': self.ttl,
+            }
+
+
+leaderboard_cache = LeaderboardCache()
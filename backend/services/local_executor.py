@@ -0,0 +1,411 @@
+import asyncio
+import math
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Optional
+from services.executor import CodeExecutor
+from services.execution_scheduler import execution_scheduler
+
+# Local sandbox settings. Defaults mirror the limits sent to Judge0.
+LOCAL_EXECUTOR_CONFIG = {
+    'max_workers': int(os.getenv('LOCAL_EXECUTOR_WORKERS', str(os.cpu_count() or 2))),
+    'cpu_time_limit': float(os.getenv('LOCAL_EXECUTOR_CPU_TIME_LIMIT', '5')),        # seconds
+    'wall_time_limit': float(os.getenv('LOCAL_EXECUTOR_WALL_TIME_LIMIT', '10')),     # seconds
+    'memory_limit': int(os.getenv('LOCAL_EXECUTOR_MEMORY_LIMIT', '128000')),         # KB
+    'compile_time_limit': float(os.getenv('LOCAL_EXECUTOR_COMPILE_TIME_LIMIT', '15')),
+    'max_output': int(os.getenv('LOCAL_EXECUTOR_MAX_OUTPUT', str(4 * 1024 * 1024))), # bytes
+    # 'required': refuse to run without a private network namespace,
+    # 'best-effort': run anyway if namespaces are unavailable, 'off': never isolate
+    'network_isolation': os.getenv('LOCAL_EXECUTOR_NETWORK_ISOLATION', 'required'),
+    # When the API runs as root, sandboxed programs drop to this uid/gid (nobody)
+    'sandbox_uid': int(os.getenv('LOCAL_EXECUTOR_UID', '65534')),
+}
+
+# How each language is compiled and started. '{memory_mb}' is replaced with
+# the memory limit for runtimes that reserve more address space than they use
+# (JVM, V8); those get a heap flag instead of RLIMIT_AS.
+LOCAL_LANGUAGES = {
+    'Python': {
+        'source_file': 'main.py',
+        'run': ['python3', 'main.py'],
+        'limit_address_space': True,
+    },
+    'C++': {
+        'source_file': 'main.cpp',
+        'compile': ['g++', '-O2', '-std=c++17', '-o', 'a.out', 'main.cpp'],
+        'run': ['./a.out'],
+        'limit_address_space': True,
+    },
+    'Java': {
+        'source_file': 'Main.java',
+        'compile': ['javac', 'Main.java'],
+        'run': ['java', '-Xmx{memory_mb}m', '-cp', '.', 'Main'],
+        'limit_address_space': False,
+    },
+    'Javascript': {
+        'source_file': 'main.js',
+        'run': ['node', '--max-old-space-size={memory_mb}', 'main.js'],
+        'limit_address_space': False,
+    },
+}
+
+# Judge0 status ids, so evaluate_code maps verdicts the same way for both backends
+STATUS_ACCEPTED = 3
+STATUS_WRONG_ANSWER = 4
+STATUS_TIME_LIMIT = 5
+STATUS_COMPILATION_ERROR = 6
+STATUS_RUNTIME_ERROR_NZEC = 11
+STATUS_RUNTIME_ERROR_OTHER = 12
+STATUS_INTERNAL_ERROR = 13
+
+SIGNAL_STATUSES = {
+    signal.SIGSEGV: 7,
+    signal.SIGXFSZ: 8,
+    signal.SIGFPE: 9,
+    signal.SIGABRT: 10,
+}
+
+# Network namespaces tried in order: root (or CAP_SYS_ADMIN) can create one
+# directly, unprivileged workers need a user namespace around it
+UNSHARE_COMMANDS = (['unshare', '--net'], ['unshare', '--user', '--net'])
+
+_unshare_prefix: Optional[List[str]] = None
+_unshare_probed = False
+_unshare_lock = threading.Lock()
+
+
+def _network_isolation_prefix() -> Optional[List[str]]:
+    # Probed once: the first unshare command that works on this host
+    global _unshare_prefix, _unshare_probed
+    with _unshare_lock:
+        if not _unshare_probed:
+            for command in UNSHARE_COMMANDS:
+                if shutil.which(command[0]) is None:
+                    break
+                probe = subprocess.run(command + ['true'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                if probe.returncode == 0:
+                    _unshare_prefix = command
+                    break
+            _unshare_probed = True
+        return _unshare_prefix
+
+
+def sandbox_argv(argv: List[str], cpu_seconds: float, memory_bytes: Optional[int], max_output: int, isolation: str, sandbox_uid: int) -> List[str]:
+    """
+    Wrap `argv` in the commands that sandbox it: unshare (private network),
+    setpriv (drop to the sandbox uid when running as root) and prlimit
+    (rlimits). Each one execs the next in the same process, so the sandbox is
+    set up after exec instead of in a preexec_fn, which is unsafe to run from
+    the executor's worker threads.
+    """
+    wrapped = []
+    if isolation != 'off':
+        prefix = _network_isolation_prefix()
+        if prefix is not None:
+            wrapped += prefix
+        elif isolation == 'required':
+            raise OSError("network isolation unavailable: unshare failed")
+    if os.geteuid() == 0:
+        wrapped += ['setpriv', f'--reuid={sandbox_uid}', f'--regid={sandbox_uid}', '--clear-groups', '--']
+    cpu = max(1, math.ceil(cpu_seconds))
+    wrapped += ['prlimit', f'--cpu={cpu}:{cpu + 1}', f'--fsize={max_output}', '--core=0']
+    if memory_bytes:
+        wrapped.append(f'--as={memory_bytes}')
+    return wrapped + ['--'] + argv
+
+
+def _read_capped(stream, limit: int, sink: list, exceeded: threading.Event, on_exceeded):
+    size = 0
+    while True:
+        chunk = stream.read(65536)
+        if not chunk:
+            break
+        if size < limit:
+            sink.append(chunk[:limit - size])
+        size += len(chunk)
+        if size > limit and not exceeded.is_set():
+            exceeded.set()
+            on_exceeded()
+    stream.close()
+
+
+def _feed_stdin(stream, data: bytes):
+    try:
+        if data:
+            stream.write(data)
+    except (BrokenPipeError, OSError):
+        pass
+    finally:
+        try:
+            stream.close()
+        except OSError:
+            pass
+
+
+def _group_running(pgid: int) -> bool:
+    # Zombies still count as members for killpg() but no longer use the workdir
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                fields = f.read().rsplit(b')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[2]) == pgid and fields[0] != b'Z':
+            return True
+    return False
+
+
+def _wait_for_group_exit(pgid: int, timeout: float = 1.0):
+    # Leftover processes were re-parented (not our children), so poll the group
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            os.killpg(pgid, 0)
+        except (ProcessLookupError, PermissionError):
+            return
+        if not _group_running(pgid):
+            return
+        time.sleep(0.01)
+
+
+def run_sandboxed(
+    argv: List[str],
+    cwd: str,
+    stdin: bytes,
+    cpu_time_limit: float,
+    wall_time_limit: float,
+    memory_limit_kb: Optional[int],
+    max_output: int,
+    isolation: str,
+    sandbox_uid: int,
+    stop: Optional[threading.Event] = None
+) -> dict:
+    """
+    Run one process under rlimits and a private network namespace. Blocking;
+    LocalProcessExecutor calls it from its worker pool. Uses wait4() so CPU
+    time and peak RSS are measured for this child only. Setting `stop` kills
+    the process early (used when the caller is cancelled).
+    """
+    stop = stop or threading.Event()
+    env = {
+        'PATH': os.environ.get('PATH', '/usr/bin:/bin'),
+        'HOME': cwd,
+        'TMPDIR': cwd,
+        'LANG': 'C.UTF-8',
+    }
+    memory_bytes = memory_limit_kb * 1024 if memory_limit_kb else None
+
+    try:
+        proc = subprocess.Popen(
+            sandbox_argv(argv, cpu_time_limit, memory_bytes, max_output, isolation, sandbox_uid),
+            cwd=cwd,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        return {'internal_error': str(e)}
+
+    timed_out = threading.Event()
+    output_exceeded = threading.Event()
+
+    def kill_group():
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    finished = threading.Event()
+
+    def watchdog():
+        if not stop.wait(wall_time_limit):
+            timed_out.set()
+            kill_group()
+        elif not finished.is_set():
+            kill_group()
+
+    stdout_chunks, stderr_chunks = [], []
+    threads = [
+        threading.Thread(target=_feed_stdin, args=(proc.stdin, stdin), daemon=True),
+        threading.Thread(target=_read_capped, args=(proc.stdout, max_output, stdout_chunks, output_exceeded, kill_group), daemon=True),
+        threading.Thread(target=_read_capped, args=(proc.stderr, max_output, stderr_chunks, threading.Event(), lambda: None), daemon=True),
+    ]
+    threads.append(threading.Thread(target=watchdog, daemon=True))
+    for thread in threads:
+        thread.start()
+
+    _, wait_status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(wait_status)
+    finished.set()
+    stop.set()
+    # Kill anything the program left behind in its session, and wait until
+    # it is gone so the workdir is no longer in use once this returns
+    kill_group()
+    _wait_for_group_exit(proc.pid)
+    for thread in threads:
+        thread.join()
+
+    return {
+        'returncode': proc.returncode,
+        'stdout': b''.join(stdout_chunks),
+        'stderr': b''.join(stderr_chunks),
+        'timed_out': timed_out.is_set(),
+        'output_exceeded': output_exceeded.is_set(),
+        'cpu_time': usage.ru_utime + usage.ru_stime,
+        'memory': usage.ru_maxrss,  # KB on Linux
+    }
+
+
+def outputs_match(stdout: Optional[str], expected_output: Optional[str]) -> bool:
+    # Same leniency as Judge0: ignore trailing whitespace and trailing blank lines
+    def normalize(text):
+        return [line.rstrip() for line in (text or '').strip().splitlines()]
+    return normalize(stdout) == normalize(expected_output)
+
+
+def _to_judge0_result(raw: dict, cpu_time_limit: float, expected_output: Optional[str]) -> dict:
+    if raw.get('internal_error'):
+        return {'status': {'id': STATUS_INTERNAL_ERROR}, 'error': raw['internal_error']}
+
+    stdout = raw['stdout'].decode('utf-8', errors='replace')
+    stderr = raw['stderr'].decode('utf-8', errors='replace') or None
+    returncode = raw['returncode']
+    result = {
+        'stdout': stdout,
+        'stderr': stderr,
+        'compile_output': None,
+        'time': f"{raw['cpu_time']:.3f}",
+        'memory': raw['memory'],
+    }
+
+    cpu_exhausted = raw['cpu_time'] >= cpu_time_limit
+    if raw['timed_out'] or returncode == -signal.SIGXCPU or (returncode == -signal.SIGKILL and cpu_exhausted):
+        status_id = STATUS_TIME_LIMIT
+    elif raw['output_exceeded']:
+        status_id = STATUS_RUNTIME_ERROR_OTHER
+        result['stderr'] = 'Output limit exceeded'
+    elif returncode < 0:
+        status_id = SIGNAL_STATUSES.get(-returncode, STATUS_RUNTIME_ERROR_OTHER)
+    elif returncode > 0:
+        status_id = STATUS_RUNTIME_ERROR_NZEC
+    elif expected_output is not None and not outputs_match(stdout, expected_output):
+        status_id = STATUS_WRONG_ANSWER
+    else:
+        status_id = STATUS_ACCEPTED
+
+    result['status'] = {'id': status_id}
+    return result
+
+
+class LocalProcessExecutor(CodeExecutor):
+    """
+    Runs submissions in sandboxed subprocesses on this machine: one compile
+    per submission, then every case in parallel, bounded by max_workers.
+    Returns Judge0-shaped results so verdicts (AC/WA/TL/CE/RE) are unchanged.
+    """
+    name = "local"
+
+    def __init__(self, max_workers: Optional[int] = None, network_isolation: Optional[str] = None, **limits):
+        self.config = {**LOCAL_EXECUTOR_CONFIG, **limits}
+        if max_workers is not None:
+            self.config['max_workers'] = max_workers
+        if network_isolation is not None:
+            self.config['network_isolation'] = network_isolation
+        self._pool = ThreadPoolExecutor(max_workers=self.config['max_workers'], thread_name_prefix="sandbox")
+
+    async def _run(self, argv, cwd, stdin: str, cpu_time_limit, wall_time_limit, memory_limit_kb) -> dict:
+        stop = threading.Event()
+        async with execution_scheduler.slot():
+            future = self._pool.submit(partial(
+                run_sandboxed,
+                argv,
+                cwd,
+                (stdin or '').encode('utf-8'),
+                cpu_time_limit,
+                wall_time_limit,
+                memory_limit_kb,
+                self.config['max_output'],
+                self.config['network_isolation'],
+                self.config['sandbox_uid'],
+                stop,
+            ))
+            try:
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                # A queued run is dropped; a running one is killed, and waited
+                # for until reaped so the caller can remove its workdir
+                stop.set()
+                if not future.cancel():
+                    await asyncio.wait({asyncio.wrap_future(future)})
+                raise
+
+    async def execute(self, source_code, stdin, language, expected_output=None) -> dict:
+        results = await self.execute_many(source_code, language, [(stdin, expected_output)])
+        return results[0]
+
+    async def execute_many(self, source_code, language, cases, mode=None, compile_once=None, on_result=None, packed=None) -> List[dict]:
+        def finish(index: int, result: dict) -> dict:
+            if on_result:
+                on_result(index, result)
+            return result
+
+        if language not in LOCAL_LANGUAGES:
+            return [finish(i, {'result': 'Language Not Supported'}) for i in range(len(cases))]
+
+        spec = LOCAL_LANGUAGES[language]
+        memory_kb = self.config['memory_limit']
+        workdir = tempfile.mkdtemp(prefix="cm-sandbox-")
+        try:
+            with open(os.path.join(workdir, spec['source_file']), 'w', encoding='utf-8') as f:
+                f.write(source_code)
+
+            # Owned by the sandbox uid while compiling, then taken back so
+            # the runs can't write to it and cases can't interfere
+            if os.geteuid() == 0:
+                os.chown(workdir, self.config['sandbox_uid'], self.config['sandbox_uid'])
+            if spec.get('compile'):
+                compiled = await self._run(
+                    spec['compile'], workdir, '',
+                    self.config['compile_time_limit'], self.config['compile_time_limit'] * 2, None
+                )
+                if compiled.get('internal_error'):
+                    return [finish(i, _to_judge0_result(compiled, 0, None)) for i in range(len(cases))]
+                if compiled['timed_out'] or compiled['returncode'] != 0:
+                    compile_output = (compiled['stderr'] + compiled['stdout']).decode('utf-8', errors='replace')
+                    return [
+                        finish(i, {'status': {'id': STATUS_COMPILATION_ERROR}, 'compile_output': compile_output or 'Compilation failed'})
+                        for i in range(len(cases))
+                    ]
+            for path in [os.path.join(workdir, name) for name in os.listdir(workdir)] + [workdir]:
+                if os.geteuid() == 0:
+                    os.chown(path, 0, 0)
+                os.chmod(path, 0o755)
+
+            memory_mb = str(max(16, memory_kb // 1024))
+            argv = [arg.replace('{memory_mb}', memory_mb) for arg in spec['run']]
+            run_memory_kb = memory_kb if spec['limit_address_space'] else None
+            cpu_limit = self.config['cpu_time_limit']
+
+            async def run_case(index, stdin, expected_output):
+                raw = await self._run(argv, workdir, stdin, cpu_limit, self.config['wall_time_limit'], run_memory_kb)
+                return finish(index, _to_judge0_result(raw, cpu_limit, expected_output))
+
+            return await asyncio.gather(*(
+                run_case(index, stdin, expected) for index, (stdin, expected) in enumerate(cases)
+            ))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    async def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
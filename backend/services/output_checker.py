@@ -0,0 +1,194 @@
+import math
+import os
+import re
+from itertools import zip_longest
+from typing import IO, Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+
+# exact  - byte-for-byte (after decoding)
+# lines  - ignores trailing whitespace on each line and blank lines at the
+#          start/end of the output (what Judge0's expected_output check did)
+# tokens - compares whitespace-separated tokens, layout is ignored
+# float  - like tokens, numbers may differ by checker_epsilon (absolute or relative)
+CHECKER_MODES = ('exact', 'lines', 'tokens', 'float')
+
+OUTPUT_CHECKER_CONFIG = {
+    'default_mode': os.getenv('OUTPUT_CHECKER_DEFAULT', 'lines'),
+    'default_epsilon': float(os.getenv('OUTPUT_CHECKER_EPSILON', '1e-6')),
+    # Outputs are consumed in chunks of this many characters
+    'chunk_size': int(os.getenv('OUTPUT_CHECKER_CHUNK_SIZE', '65536')),
+    # Longest token/line quoted in a difference report
+    'report_width': int(os.getenv('OUTPUT_CHECKER_REPORT_WIDTH', '40')),
+}
+
+Source = Union[str, IO[str], Iterable[str], None]
+
+_TOKEN = re.compile(r'\S+|\n')
+
+
+class CheckResult(NamedTuple):
+    ok: bool
+    message: Optional[str] = None  # first difference, truncated
+
+
+def _chunks(source: Source, size: int) -> Iterator[str]:
+    """Yield the output piece by piece; strings are sliced, streams are read."""
+    if source is None:
+        return
+    if isinstance(source, str):
+        for start in range(0, len(source), size):
+            yield source[start:start + size]
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = source.read(size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        yield from source
+
+
+def _split_stream(chunks: Iterator[str], separator: str) -> Iterator[str]:
+    # Pieces between separators, without holding more than one chunk (plus a partial piece)
+    carry = ''
+    for chunk in chunks:
+        text = carry + chunk
+        cut = text.rfind(separator)
+        if cut < 0:
+            carry = text
+            continue
+        yield from text[:cut].split(separator)
+        carry = text[cut + 1:]
+    yield carry
+
+
+def _tokens(source: Source, size: int) -> Iterator[Tuple[str, int]]:
+    """(token, line number) pairs."""
+    line = 1
+    carry = ''
+    for chunk in _chunks(source, size):
+        text = carry + chunk
+        # A token may continue in the next chunk unless the chunk ends in whitespace
+        cut = len(text)
+        while cut > 0 and not text[cut - 1].isspace():
+            cut -= 1
+        carry = text[cut:]
+        for match in _TOKEN.finditer(text, 0, cut):
+            token = match.group()
+            if token == '\n':
+                line += 1
+            else:
+                yield token, line
+    if carry:
+        yield carry, line
+
+
+def _lines(source: Source, size: int) -> Iterator[Tuple[str, int]]:
+    """(line without trailing whitespace, line number), blank lines at both ends dropped."""
+    pending_blank = 0
+    started = False
+    for number, line in enumerate(_split_stream(_chunks(source, size), '\n'), start=1):
+        line = line.rstrip()
+        if not line:
+            pending_blank += 1
+            continue
+        if not started:
+            started = True
+            line = line.lstrip()
+        else:
+            for offset in range(pending_blank, 0, -1):
+                yield '', number - offset
+        pending_blank = 0
+        yield line, number
+
+
+def _numbers_close(expected: str, actual: str, epsilon: float) -> bool:
+    try:
+        a, b = float(actual), float(expected)
+    except ValueError:
+        return False
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    if math.isinf(a) or math.isinf(b):
+        return a == b
+    return abs(a - b) <= epsilon or abs(a - b) <= epsilon * abs(b)
+
+
+class OutputChecker:
+    """
+    Compares a program's output with the expected output without loading
+    more than a chunk of either at a time. check() returns a CheckResult
+    whose message describes the first difference.
+    """
+
+    def __init__(self, mode: Optional[str] = None, epsilon: Optional[float] = None):
+        self.mode = mode or OUTPUT_CHECKER_CONFIG['default_mode']
+        if self.mode not in CHECKER_MODES:
+            raise ValueError(f"Unknown checker mode '{self.mode}', expected one of {', '.join(CHECKER_MODES)}")
+        self.epsilon = OUTPUT_CHECKER_CONFIG['default_epsilon'] if epsilon is None else epsilon
+        self.chunk_size = OUTPUT_CHECKER_CONFIG['chunk_size']
+
+    @property
+    def spec(self) -> str:
+        """Identifies the comparison rules (part of cache keys)."""
+        return f"float:{self.epsilon!r}" if self.mode == 'float' else self.mode
+
+    def check(self, actual: Source, expected: Source) -> CheckResult:
+        if self.mode == 'exact':
+            return self._check_exact(actual, expected)
+        if self.mode == 'lines':
+            return self._check_items(_lines(actual, self.chunk_size), _lines(expected, self.chunk_size), 'line')
+        return self._check_items(_tokens(actual, self.chunk_size), _tokens(expected, self.chunk_size), 'token')
+
+    def _quote(self, text: str) -> str:
+        width = OUTPUT_CHECKER_CONFIG['report_width']
+        return repr(text if len(text) <= width else text[:width] + '...')
+
+    def _check_items(self, actual: Iterator, expected: Iterator, unit: str) -> CheckResult:
+        position = 0
+        for got, want in zip_longest(actual, expected):
+            position += 1
+            if want is None:
+                return CheckResult(False, f"Extra output at line {got[1]}: {self._quote(got[0])}")
+            if got is None:
+                return CheckResult(False, f"Output ended early, expected {self._quote(want[0])} at line {want[1]}")
+            if got[0] == want[0]:
+                continue
+            if self.mode == 'float' and _numbers_close(want[0], got[0], self.epsilon):
+                continue
+            where = f"line {want[1]}" if unit == 'line' else f"{unit} {position} (line {want[1]})"
+            return CheckResult(False, f"Mismatch at {where}: expected {self._quote(want[0])}, found {self._quote(got[0])}")
+        return CheckResult(True)
+
+    def _check_exact(self, actual: Source, expected: Source) -> CheckResult:
+        line, offset, line_start = 1, 0, 0  # offsets count characters consumed so far
+        got_chunks = _chunks(actual, self.chunk_size)
+        want_chunks = _chunks(expected, self.chunk_size)
+        got, want = '', ''
+        while True:
+            if not got:
+                got = next(got_chunks, '')
+            if not want:
+                want = next(want_chunks, '')
+            if not got and not want:
+                return CheckResult(True)
+            if not got:
+                return CheckResult(False, f"Output ended early at line {line}, expected {self._quote(want)}")
+            if not want:
+                return CheckResult(False, f"Extra output at line {line}: {self._quote(got)}")
+            length = min(len(got), len(want))
+            if got[:length] != want[:length]:
+                index = next(i for i in range(length) if got[i] != want[i])
+                newline = want.rfind('\n', 0, index)
+                if newline >= 0:
+                    line += want.count('\n', 0, index)
+                    line_start = offset + newline + 1
+                return CheckResult(False, (
+                    f"Mismatch at line {line}, column {offset + index - line_start + 1}: "
+                    f"expected {self._quote(want[index:])}, found {self._quote(got[index:])}"
+                ))
+            newline = want.rfind('\n', 0, length)
+            if newline >= 0:
+                line += want.count('\n', 0, length)
+                line_start = offset + newline + 1
+            offset += length
+            got, want = got[length:], want[length:]
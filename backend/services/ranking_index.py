@@ -0,0 +1,336 @@
+import os
+import random
+import select
+import threading
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+RANKING_INDEX_CONFIG = {
+    'enabled': os.getenv('RANKING_INDEX_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+    # Postgres LISTEN/NOTIFY channel shared by every worker
+    'channel': os.getenv('RANKING_INDEX_CHANNEL', 'ranking_index'),
+    # Seconds between checks of the stop flag while waiting for notifications
+    'poll_interval': float(os.getenv('RANKING_INDEX_POLL_INTERVAL', '1')),
+    # Seconds before reconnecting a dropped listener (the index is rebuilt after)
+    'reconnect_delay': float(os.getenv('RANKING_INDEX_RECONNECT_DELAY', '5')),
+}
+
+# NOTIFY payloads are limited to 8000 bytes; ids are sent in chunks below that
+MAX_NOTIFY_IDS = 200
+
+Key = Tuple[int, str]  # (-experience, employee id)
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, levels: int):
+        self.key = key
+        self.next: List[Optional[_Node]] = [None] * levels
+        # Positions skipped by each link; a link to None reaches one past the end
+        self.width: List[int] = [1] * levels
+
+
+class IndexableSkipList:
+    """
+    Sorted keys with O(log n) insert, remove, position lookup (count of
+    smaller keys) and access by position: every link also stores how many
+    positions it skips.
+    """
+
+    MAX_LEVELS = 32
+
+    def __init__(self, seed=None):
+        self.size = 0
+        self._head = _Node(None, self.MAX_LEVELS)
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < self.MAX_LEVELS and self._random.random() < 0.5:
+            level += 1
+        return level
+
+    def _predecessors(self, key) -> Tuple[List[_Node], List[int]]:
+        # Last node before `key` on every level, and the positions walked on each
+        chain: List[_Node] = [self._head] * self.MAX_LEVELS
+        steps = [0] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+        return chain, steps
+
+    def insert(self, key):
+        chain, steps_at_level = self._predecessors(key)
+        levels = self._random_level()
+        new = _Node(key, levels)
+        steps = 0
+        for level in range(levels):
+            previous = chain[level]
+            new.next[level] = previous.next[level]
+            previous.next[level] = new
+            new.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain, _ = self._predecessors(key)
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        for level in range(len(target.next)):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+        for level in range(len(target.next), self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def bisect_left(self, key) -> int:
+        """Number of keys smaller than `key`."""
+        _, steps = self._predecessors(key)
+        return sum(steps)
+
+    def _node_at(self, index: int) -> _Node:
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        node = self._head
+        remaining = index + 1
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node
+
+    def __getitem__(self, index: int):
+        return self._node_at(index).key
+
+    def slice(self, start: int, count: int) -> list:
+        """Up to `count` keys from position `start` on."""
+        if count <= 0 or start >= self.size:
+            return []
+        node = self._node_at(max(start, 0))
+        keys = []
+        while node is not None and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+def _key(employee_id, experience: int) -> Key:
+    return (-experience, str(employee_id))
+
+
+class RankingIndex:
+    """
+    In-memory copy of the employee ranking: employees with experience > 0,
+    ordered like the SQL ranking (experience desc, then id). Positions use
+    rank() semantics: one more than the number of employees with more
+    experience.
+
+    Not ready until loaded, and again whenever updates may have been missed
+    (the notification listener dropped); callers fall back to SQL then.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._list = IndexableSkipList()
+        self._experience: Dict[str, int] = {}
+        self.ready = False
+        # Updates made while a load reads the database, replayed on top of it
+        self._replay: Optional[Dict[str, Optional[int]]] = None
+        self.loads = 0
+        self.updates = 0
+        # Identifies this worker's notifications, which it has already applied
+        self.token = uuid.uuid4().hex[:12]
+
+    def load(self, rows: Iterable[Tuple[UUID, int]]):
+        """Replace the contents with (employee id, experience) rows (read lazily)."""
+        with self._lock:
+            self._replay = {}
+        skip_list = IndexableSkipList()
+        experience = {}
+        try:
+            for employee_id, value in rows:
+                if value and value > 0:
+                    experience[str(employee_id)] = value
+                    skip_list.insert(_key(employee_id, value))
+        except BaseException:
+            with self._lock:
+                self._replay = None
+            raise
+        with self._lock:
+            replay, self._replay = self._replay, None
+            self._list = skip_list
+            self._experience = experience
+            for employee_key, value in replay.items():
+                self._set(employee_key, value)
+            self.ready = True
+            self.loads += 1
+
+    def invalidate(self):
+        with self._lock:
+            self.ready = False
+
+    def update(self, employee_id, experience: Optional[int]):
+        """Set an employee's experience; None (deleted) or <= 0 drops them from the ranking."""
+        employee_key = str(employee_id)
+        with self._lock:
+            if self._replay is not None:
+                self._replay[employee_key] = experience
+            self._set(employee_key, experience)
+            self.updates += 1
+
+    def _set(self, employee_key: str, experience: Optional[int]):
+        current = self._experience.pop(employee_key, None)
+        if current is not None:
+            self._list.remove((-current, employee_key))
+        if experience and experience > 0:
+            self._experience[employee_key] = experience
+            self._list.insert((-experience, employee_key))
+
+    def __len__(self) -> int:
+        return len(self._list)
+
+    def rank_for_experience(self, experience: Optional[int]) -> int:
+        """Position an employee with this experience has (after the last one when unranked)."""
+        with self._lock:
+            if not experience or experience <= 0:
+                return len(self._list) + 1
+            return self._list.bisect_left((-experience,)) + 1
+
+    def rank_of(self, employee_id) -> Optional[int]:
+        with self._lock:
+            experience = self._experience.get(str(employee_id))
+            if experience is None:
+                return None
+            return self._list.bisect_left((-experience,)) + 1
+
+    def page(self, limit: int, offset: int = 0) -> List[Tuple[UUID, int, int]]:
+        """(employee id, experience, rank) for `limit` entries from position `offset`."""
+        with self._lock:
+            keys = self._list.slice(offset, limit)
+            return self._ranked(keys, offset)
+
+    def around(self, employee_id, k: int) -> List[Tuple[UUID, int, int]]:
+        """
+        The employee with up to `k` entries above and below. An unranked
+        employee is not in the index: the last `k` ranked entries are returned.
+        """
+        with self._lock:
+            employee_key = str(employee_id)
+            experience = self._experience.get(employee_key)
+            if experience is None:
+                start = max(len(self._list) - k, 0)
+                return self._ranked(self._list.slice(start, k), start)
+            position = self._list.bisect_left((-experience, employee_key))
+            start = max(position - k, 0)
+            return self._ranked(self._list.slice(start, position - start + k + 1), start)
+
+    def _ranked(self, keys: List[Key], start: int) -> List[Tuple[UUID, int, int]]:
+        entries = []
+        rank = None
+        previous = None
+        for position, (negative_experience, employee_key) in enumerate(keys, start=start):
+            if negative_experience != previous:
+                # Ties share the rank of their first member, which may be on an earlier page
+                rank = position + 1 if rank is not None else self._list.bisect_left((negative_experience,)) + 1
+                previous = negative_experience
+            entries.append((UUID(employee_key), -negative_experience, rank))
+        return entries
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'employees': len(self._list),
+                'loads': self.loads,
+                'updates': self.updates,
+            }
+
+
+def encode_notifications(token: str, employee_ids: Iterable) -> List[str]:
+    ids = [str(employee_id) for employee_id in employee_ids]
+    return [
+        f"{token} {','.join(ids[start:start + MAX_NOTIFY_IDS])}"
+        for start in range(0, len(ids), MAX_NOTIFY_IDS)
+    ]
+
+
+def decode_notification(payload: str) -> Tuple[str, List[UUID]]:
+    token, _, ids = payload.partition(' ')
+    return token, [UUID(employee_id) for employee_id in ids.split(',') if employee_id]
+
+
+class NotificationListener:
+    """
+    Background thread LISTENing on a Postgres channel. `connect` returns a
+    psycopg2 connection; `on_connect` runs after every (re)connection, once
+    LISTEN is active, so nothing sent while disconnected is lost;
+    `on_disconnect` runs when the connection drops.
+    """
+
+    def __init__(
+        self,
+        connect: Callable,
+        channel: str,
+        on_notify: Callable[[str], None],
+        on_connect: Callable[[], None],
+        on_disconnect: Callable[[], None]
+    ):
+        self.connect = connect
+        self.channel = channel
+        self.on_notify = on_notify
+        self.on_connect = on_connect
+        self.on_disconnect = on_disconnect
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"listen-{self.channel}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=RANKING_INDEX_CONFIG['poll_interval'] * 2)
+
+    def _run(self):
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self.connect()
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                self.on_connect()
+                while not self._stop.is_set():
+                    readable, _, _ = select.select([connection], [], [], RANKING_INDEX_CONFIG['poll_interval'])
+                    if not readable:
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self.on_notify(connection.notifies.pop(0).payload)
+            except Exception as e:
+                print(f"⚠️ Ranking index listener disconnected: {e}")
+                self.on_disconnect()
+                self._stop.wait(RANKING_INDEX_CONFIG['reconnect_delay'])
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+
+ranking_index = RankingIndex()
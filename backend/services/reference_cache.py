@@ -0,0 +1,118 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+REFERENCE_CACHE_CONFIG = {
+    # Entries kept in memory (least recently used are evicted first)
+    'max_entries': int(os.getenv('REFERENCE_CACHE_MAX_ENTRIES', '5000')),
+    # Outputs larger than this are not cached at all
+    'max_output_bytes': int(os.getenv('REFERENCE_CACHE_MAX_OUTPUT_BYTES', str(256 * 1024))),
+    # Optional sqlite file so the cache survives restarts; empty = memory only
+    'path': os.getenv('REFERENCE_CACHE_PATH', ''),
+}
+
+CacheKey = Tuple[int, str, str]
+
+
+def _digest(*parts: Optional[str]) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update((part or '').encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def reference_cache_key(problem_id: int, solution: str, language: str, stdin: str) -> CacheKey:
+    # The solution hash covers the language too: same code, other compiler, other output
+    return (problem_id, _digest(language, solution), _digest(stdin))
+
+
+class ReferenceOutputCache:
+    """
+    Expected outputs of a problem's reference solution for custom inputs,
+    so a "Run" click only has to execute the user's code.
+    Bounded LRU in memory, optionally written through to a sqlite file.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_output_bytes: Optional[int] = None, path: Optional[str] = None):
+        self.max_entries = max_entries or REFERENCE_CACHE_CONFIG['max_entries']
+        self.max_output_bytes = max_output_bytes or REFERENCE_CACHE_CONFIG['max_output_bytes']
+        self.path = REFERENCE_CACHE_CONFIG['path'] if path is None else path
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[CacheKey, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if self.path:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS reference_output ('
+                ' problem_id INTEGER NOT NULL, solution_hash TEXT NOT NULL, input_hash TEXT NOT NULL,'
+                ' output TEXT NOT NULL, PRIMARY KEY (problem_id, solution_hash, input_hash))'
+            )
+            self._db.commit()
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        with self._lock:
+            output = self._entries.get(key)
+            if output is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return output
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT output FROM reference_output WHERE problem_id = ? AND solution_hash = ? AND input_hash = ?',
+                    key
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    self.hits += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key: CacheKey, output: Optional[str]):
+        output = output or ''
+        if len(output.encode('utf-8')) > self.max_output_bytes:
+            return
+        with self._lock:
+            self._remember(key, output)
+            if self._db is not None:
+                self._db.execute('INSERT OR REPLACE INTO reference_output VALUES (?, ?, ?, ?)', (*key, output))
+                self._db.commit()
+
+    def invalidate_problem(self, problem_id: int):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == problem_id]:
+                del self._entries[key]
+            if self._db is not None:
+                self._db.execute('DELETE FROM reference_output WHERE problem_id = ?', (problem_id,))
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM reference_output')
+                self._db.commit()
+
+    def _remember(self, key: CacheKey, output: str):
+        self._entries[key] = output
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'persistent': self._db is not None,
+        }
+
+
+reference_cache = ReferenceOutputCache()
@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+SUBMISSION_CACHE_CONFIG = {
+    'max_entries': int(os.getenv('SUBMISSION_CACHE_MAX_ENTRIES', '2000')),
+    # Seconds a verdict set stays reusable; 0 disables expiry
+    'ttl': float(os.getenv('SUBMISSION_CACHE_TTL', '3600')),
+    'enabled': os.getenv('SUBMISSION_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+}
+
+
+def _digest(*parts) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part if part is not None else '').encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def testcase_set_version(testcases: Iterable) -> str:
+    """Content hash of a problem's test cases: any added, edited or removed case changes it."""
+    return _digest(*(
+        _digest(tc.id, tc.input, tc.output)
+        for tc in sorted(testcases, key=lambda tc: tc.id)
+    ))
+
+
+def submission_cache_key(problem_id: int, language: str, source_code: str, testcases_version: str) -> str:
+    return _digest(problem_id, language, source_code, testcases_version)
+
+
+class SubmissionResultCache:
+    """
+    Per-testcase verdicts of already judged submissions, addressed by the
+    hash of (problem, language, source, test case set). Byte-identical
+    resubmissions reuse them instead of going back to the judge, and
+    identical submissions arriving together share a single evaluation.
+    Results are stored as plain dicts; callers rebuild their own models.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_entries = max_entries or SUBMISSION_CACHE_CONFIG['max_entries']
+        self.ttl = SUBMISSION_CACHE_CONFIG['ttl'] if ttl is None else ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[int, float, List[dict]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        _, stored_at, results = entry
+        if self.ttl and time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return [dict(result) for result in results]
+
+    def put(self, key: str, problem_id: int, results: List[dict]):
+        self._entries[key] = (problem_id, time.monotonic(), [dict(result) for result in results])
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        problem_id: int,
+        compute: Callable[[], Awaitable[List[dict]]],
+        cacheable: Callable[[List[dict]], bool] = lambda results: True
+    ) -> Tuple[List[dict], bool]:
+        """Returns (results, reused). Only results accepted by `cacheable` are stored."""
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached, True
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            try:
+                results = await asyncio.shield(pending)
+            except Exception:
+                pass  # The leader's run cannot be shared; judge this one ourselves
+            else:
+                self.hits += 1
+                return [dict(result) for result in results], True
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            results = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody is waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if cacheable(results):
+            self.put(key, problem_id, results)
+            future.set_result(results)
+        else:
+            # Followers must not reuse a partial or infrastructure-failed run
+            future.set_exception(_NotReusable())
+            future.exception()
+        return results, False
+
+    def invalidate_problem(self, problem_id: int):
+        for key in [k for k, entry in self._entries.items() if entry[0] == problem_id]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'inflight': len(self._inflight),
+        }
+
+
+class _NotReusable(Exception):
+    pass
+
+
+submission_cache = SubmissionResultCache()
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional
+
+# Finished jobs stay queryable (and their event streams replayable) this long
+SUBMISSION_JOB_TTL = float(os.getenv('SUBMISSION_JOB_TTL', '900'))
+
+TERMINAL_EVENTS = {'verdict', 'done', 'error'}
+
+
+class SubmissionJob:
+    """
+    In-process state of one asynchronous submission (or other background
+    judge job, e.g. test case generation). Every event is kept so a client
+    that connects late (or reconnects) gets the full stream replayed.
+    Jobs live in the worker that accepted the POST.
+    """
+
+    def __init__(self, total_testcases: int = 0):
+        self.id = uuid.uuid4().hex
+        self.status = 'queued'
+        self.total_testcases = total_testcases
+        self.results: List[dict] = []
+        self.verdict: Optional[str] = None
+        self.solution_id: Optional[int] = None
+        self.error: Optional[str] = None
+        self.summary: Optional[dict] = None
+        self.created_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._events: List[dict] = []
+        self._subscribers: List[asyncio.Queue] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('completed', 'failed')
+
+    def publish(self, event: str, data: dict):
+        message = {'event': event, 'data': data}
+        self._events.append(message)
+        if event == 'testcase':
+            self.results.append(data)
+        for queue in self._subscribers:
+            queue.put_nowait(message)
+
+    def complete(self, verdict: Optional[str], solution_id: Optional[int], summary: dict, event: str = 'verdict'):
+        self.status = 'completed'
+        self.verdict = verdict
+        self.solution_id = solution_id
+        self.summary = summary
+        self.finished_at = time.monotonic()
+        self.publish(event, summary)
+
+    def fail(self, error: str):
+        self.status = 'failed'
+        self.error = error
+        self.finished_at = time.monotonic()
+        self.publish('error', {'detail': error})
+
+    async def events(self) -> AsyncIterator[dict]:
+        queue: asyncio.Queue = asyncio.Queue()
+        for message in self._events:
+            queue.put_nowait(message)
+        self._subscribers.append(queue)
+        try:
+            while True:
+                message = await queue.get()
+                yield message
+                if message['event'] in TERMINAL_EVENTS:
+                    return
+        finally:
+            self._subscribers.remove(queue)
+
+    async def sse(self) -> AsyncIterator[str]:
+        """Server-Sent Events framing for StreamingResponse."""
+        async for message in self.events():
+            yield f"event: {message['event']}\ndata: {json.dumps(message['data'], default=str)}\n\n"
+
+
+class SubmissionJobRegistry:
+    def __init__(self, ttl: float = SUBMISSION_JOB_TTL):
+        self.ttl = ttl
+        self._jobs: Dict[str, SubmissionJob] = {}
+
+    def create(self, total_testcases: int = 0) -> SubmissionJob:
+        self.purge_expired()
+        job = SubmissionJob(total_testcases)
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[SubmissionJob]:
+        return self._jobs.get(job_id)
+
+    def purge_expired(self):
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and now - job.finished_at > self.ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+submission_jobs = SubmissionJobRegistry()
@@ -0,0 +1,43 @@
+import os
+import tempfile
+
+# database.py builds its engine at import time, so the URL is set before any app import
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "codemahindra-tests.db"))
+
+import pytest
+
+
+@pytest.fixture
+def app_db():
+    """
+    Session on the app's own engine (the one SessionLocal uses), for code
+    that opens its own sessions. Tables are created and dropped per test,
+    so it only runs against the throwaway SQLite database.
+    """
+    import main  # noqa: F401  (registers every model so relationships resolve)
+    from database import Base, SessionLocal, engine
+    from models.employee import Employee
+    from models.employee_problem import EmployeeProblem
+    from models.employee_xp_daily import EmployeeXPDaily
+    from models.employee_xp_history import EmployeeXPHistory
+    from models.position import Position
+    from models.problem import Problem
+    from models.problem_best_solution import ProblemBestSolution
+    from models.regrade_job import RegradeJob
+    from models.solution import Solution
+    from models.solution_testcase_result import SolutionTestCaseResult
+    from models.team import Team
+    from models.testcase import TestCase
+
+    if engine.dialect.name != "sqlite":
+        pytest.skip("needs the throwaway SQLite test database")
+    tables = [model.__table__ for model in (
+        Position, Team, Employee, Problem, TestCase, Solution, EmployeeProblem, EmployeeXPHistory,
+        EmployeeXPDaily, SolutionTestCaseResult, RegradeJob, ProblemBestSolution
+    )]
+    Base.metadata.drop_all(engine, tables=tables)
+    Base.metadata.create_all(engine, tables=tables)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine, tables=tables)
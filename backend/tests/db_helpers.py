@@ -0,0 +1,41 @@
+"""Rows for tests that run against the `app_db` fixture."""
+import uuid
+from controllers.solution_controller import TestCaseResult
+from models.employee import Employee
+from models.problem import Problem
+from models.solution import Solution
+
+
+def make_employee(db, experience=0, **fields) -> Employee:
+    employee = Employee(id=uuid.uuid4(), email=f"{uuid.uuid4().hex[:8]}@x.com", password="x",
+                        firstName="Test", lastName="User", experience=experience, **fields)
+    db.add(employee)
+    db.commit()
+    return employee
+
+
+def make_problem(db, **fields) -> Problem:
+    fields = {"name": "double", "input_format": "n", "output_format": "2n", "sample_input": "1", "sample_output": "2",
+              "language": "Python", "solution": "print(int(input())*2)", "difficulty": "Easy",
+              "total_submissions": 0, "successful_submissions": 0, **fields}
+    problem = Problem(**fields)
+    db.add(problem)
+    db.commit()
+    return problem
+
+
+def make_solution(db, employee, problem, status="Accepted", passed=3, time=0.1) -> Solution:
+    solution = Solution(employee_id=employee.id, problem_id=problem.id, code="print(1)", language="Python",
+                        status=status, testCasesPassed=passed, executionTime=time, inTeam=False)
+    db.add(solution)
+    db.commit()
+    return solution
+
+
+def results(*verdicts, time="0.010") -> list:
+    """Per-testcase results with the given verdicts ('AC', 'WA', ...)."""
+    return [
+        TestCaseResult(id=-1, result=verdict, time=time if verdict == 'AC' else None, memory=1024,
+                       expected_output="2", output="2" if verdict == 'AC' else "3")
+        for verdict in verdicts
+    ]
@@ -0,0 +1,95 @@
+"""
+In-process stand-in for a Judge0 server, for tests that exercise the HTTP
+client without a real judge. Mount `transport` on the judge0 httpx client.
+
+Runs are "executed" by `runner(source_code, stdin) -> (status_id, stdout)`
+(default: echo stdin). Submissions created with wait=false and a
+callback_url get their result PUT to that URL after `delay` seconds through
+`callback_transport` (an ASGI transport to the app under test), just like
+Judge0 does: base64-encoded, with the token in the body.
+"""
+import asyncio
+import base64
+import json
+import uuid
+from typing import Callable, Dict, Optional, Tuple
+
+import httpx
+
+
+def echo_runner(source_code: str, stdin: str) -> Tuple[int, str]:
+    return 3, stdin
+
+
+class FakeJudge0:
+    def __init__(
+        self,
+        runner: Callable[[str, str], Tuple[int, str]] = echo_runner,
+        callback_transport: Optional[httpx.AsyncBaseTransport] = None,
+        delay: float = 0.01,
+        drop_callbacks: bool = False
+    ):
+        self.runner = runner
+        self.callback_transport = callback_transport
+        self.delay = delay
+        self.drop_callbacks = drop_callbacks
+        self.submissions: Dict[str, dict] = {}
+        self.callbacks_sent = 0
+        self.max_open_waits = 0
+        self._open_waits = 0
+        self._tasks = set()
+        self.transport = httpx.MockTransport(self.handle)
+
+    def _run(self, payload: dict) -> dict:
+        status_id, stdout = self.runner(payload.get('source_code') or '', payload.get('stdin') or '')
+        expected = payload.get('expected_output')
+        if status_id == 3 and expected is not None and stdout.strip() != expected.strip():
+            status_id = 4
+        return {'status': {'id': status_id}, 'stdout': stdout, 'stderr': None,
+                'compile_output': None, 'message': None, 'time': '0.010', 'memory': 1024}
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if request.method == 'GET' and path == '/about':
+            return httpx.Response(200, json={'version': 'fake'})
+
+        if request.method == 'POST' and path == '/submissions':
+            payload = json.loads(request.content)
+            token = uuid.uuid4().hex
+            result = {**self._run(payload), 'token': token}
+            if request.url.params.get('wait') == 'false':
+                self.submissions[token] = {'status': {'id': 2}, 'token': token}
+                task = asyncio.ensure_future(self._finish(token, result, payload.get('callback_url')))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                return httpx.Response(201, json={'token': token})
+            # wait=true: the connection stays open while the case "runs"
+            self._open_waits += 1
+            self.max_open_waits = max(self.max_open_waits, self._open_waits)
+            try:
+                await asyncio.sleep(self.delay)
+            finally:
+                self._open_waits -= 1
+            self.submissions[token] = result
+            return httpx.Response(201, json=result)
+
+        if request.method == 'GET' and path.startswith('/submissions/'):
+            token = path.rsplit('/', 1)[-1]
+            if token not in self.submissions:
+                return httpx.Response(404, json={'error': 'Not found'})
+            return httpx.Response(200, json=self.submissions[token])
+
+        return httpx.Response(404)
+
+    async def _finish(self, token: str, result: dict, callback_url: Optional[str]):
+        await asyncio.sleep(self.delay)
+        self.submissions[token] = result
+        if not callback_url or self.drop_callbacks or self.callback_transport is None:
+            return
+        body = dict(result)
+        for field in ('stdout', 'stderr', 'compile_output', 'message'):
+            if body.get(field) is not None:
+                body[field] = base64.b64encode(body[field].encode()).decode()
+        async with httpx.AsyncClient(transport=self.callback_transport) as client:
+            await client.put(callback_url, json=body)
+        self.callbacks_sent += 1
@@ -0,0 +1,71 @@
+from controllers.solution_controller import delete_solution, rebuild_best_solutions, upsert_best_solution
+from models.problem_best_solution import ProblemBestSolution
+from tests.db_helpers import make_employee, make_problem, make_solution
+
+
+def submit(db, employee, problem, passed, time):
+    solution = make_solution(db, employee, problem, passed=passed, time=time)
+    improved = upsert_best_solution(solution, db)
+    db.commit()
+    return solution, improved
+
+
+def best_of(db, employee, problem):
+    db.expire_all()
+    best = db.query(ProblemBestSolution).filter(
+        ProblemBestSolution.problem_id == problem.id,
+        ProblemBestSolution.employee_id == employee.id
+    ).one()
+    return best.solution_id, best.testCasesPassed, best.executionTime
+
+
+def test_upsert_keeps_the_best_submission(app_db):
+    db = app_db
+    problem, employee = make_problem(db), make_employee(db)
+
+    first, improved = submit(db, employee, problem, passed=2, time=None)
+    assert improved and best_of(db, employee, problem) == (first.id, 2, None)
+
+    # As many cases with a time beats no time; more cases beat any time
+    timed, improved = submit(db, employee, problem, passed=2, time=0.5)
+    assert improved and best_of(db, employee, problem) == (timed.id, 2, 0.5)
+    complete, improved = submit(db, employee, problem, passed=3, time=0.9)
+    assert improved and best_of(db, employee, problem) == (complete.id, 3, 0.9)
+
+    # Fewer cases, a slower run or a tie on time leave the best alone
+    for passed, time in ((2, 0.1), (3, 1.2), (3, 0.9), (3, None)):
+        _, improved = submit(db, employee, problem, passed=passed, time=time)
+        assert not improved
+    assert best_of(db, employee, problem) == (complete.id, 3, 0.9)
+
+    faster, improved = submit(db, employee, problem, passed=3, time=0.4)
+    assert improved and best_of(db, employee, problem) == (faster.id, 3, 0.4)
+
+
+def test_rebuild_matches_the_upsert_order(app_db):
+    db = app_db
+    problem, employee = make_problem(db), make_employee(db)
+    make_solution(db, employee, problem, passed=3, time=None)
+    tied = make_solution(db, employee, problem, passed=3, time=0.5)
+    make_solution(db, employee, problem, passed=3, time=0.5)
+    make_solution(db, employee, problem, passed=2, time=0.1)
+
+    rebuild_best_solutions(problem.id, db)
+    db.commit()
+    # Untimed runs rank last among equal passes; ties go to the earlier solution
+    assert best_of(db, employee, problem) == (tied.id, 3, 0.5)
+
+
+def test_deleting_the_best_promotes_the_next_one(app_db):
+    db = app_db
+    problem, employee = make_problem(db), make_employee(db)
+    runner_up, _ = submit(db, employee, problem, passed=3, time=0.8)
+    best, _ = submit(db, employee, problem, passed=3, time=0.2)
+    assert best_of(db, employee, problem) == (best.id, 3, 0.2)
+
+    delete_solution(best.id, db)
+    assert best_of(db, employee, problem) == (runner_up.id, 3, 0.8)
+
+    delete_solution(runner_up.id, db)
+    db.expire_all()
+    assert db.query(ProblemBestSolution).count() == 0
@@ -0,0 +1,78 @@
+import asyncio
+from services.execution_scheduler import (
+    ExecutionScheduler,
+    PRIORITY_GRADED,
+    PRIORITY_PRACTICE,
+    PRIORITY_REGRADE,
+)
+
+
+def test_round_robin_across_submitters_and_priorities():
+    async def scenario():
+        scheduler = ExecutionScheduler(max_concurrency=1, starvation_timeout=60)
+        order = []
+        blocker = await scheduler.acquire(submitter="holder")
+
+        async def run(name, submitter, priority):
+            reserved = await scheduler.acquire(submitter=submitter, priority=priority)
+            order.append(name)
+            scheduler.release(reserved)
+
+        tasks = [
+            asyncio.create_task(run("practice", "carol", PRIORITY_PRACTICE)),
+            asyncio.create_task(run("alice-1", "alice", PRIORITY_GRADED)),
+            asyncio.create_task(run("alice-2", "alice", PRIORITY_GRADED)),
+            asyncio.create_task(run("alice-3", "alice", PRIORITY_GRADED)),
+            asyncio.create_task(run("bob-1", "bob", PRIORITY_GRADED)),
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.metrics()["queues"]["graded"]["queue_depth"] == 4
+        scheduler.release(blocker)
+        await asyncio.gather(*tasks)
+        return order, scheduler.metrics()
+
+    order, metrics = asyncio.run(scenario())
+    assert order == ["alice-1", "bob-1", "alice-2", "alice-3", "practice"]
+    assert metrics["active"] == 0
+    assert metrics["queues"]["practice"]["dispatched"] == 1
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = ExecutionScheduler(max_concurrency=1)
+        held = await scheduler.acquire(submitter="a")
+        waiter = asyncio.create_task(scheduler.acquire(submitter="b"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        scheduler.release(held)
+        return scheduler.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["active"] == 0
+    assert metrics["queues"]["graded"]["queue_depth"] == 0
+
+
+def test_regrades_are_never_promoted_over_live_runs():
+    async def scenario():
+        # starvation_timeout=0: every waiting practice run counts as starved
+        scheduler = ExecutionScheduler(max_concurrency=1, starvation_timeout=0)
+        order = []
+        blocker = await scheduler.acquire(submitter="holder")
+
+        async def run(name, submitter, priority):
+            reserved = await scheduler.acquire(submitter=submitter, priority=priority)
+            order.append(name)
+            scheduler.release(reserved)
+
+        tasks = [
+            asyncio.create_task(run("regrade", "job", PRIORITY_REGRADE)),
+            asyncio.create_task(run("practice", "carol", PRIORITY_PRACTICE)),
+            asyncio.create_task(run("graded", "alice", PRIORITY_GRADED)),
+        ]
+        await asyncio.sleep(0)
+        scheduler.release(blocker)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["practice", "graded", "regrade"]
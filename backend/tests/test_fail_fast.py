@@ -0,0 +1,47 @@
+import asyncio
+
+from controllers import solution_controller
+from controllers.solution_controller import TestCaseBase, evaluate_testcases
+
+
+class ScriptedExecutor:
+    """Answers cases in order with the given outputs; None never finishes."""
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.cancelled = False
+
+    async def execute_many(self, source_code, language, cases, on_result=None, **options):
+        try:
+            for index, stdout in enumerate(self.outputs):
+                if stdout is None:
+                    await asyncio.sleep(60)
+                on_result(index, {'status': {'id': 3}, 'stdout': stdout, 'time': '0.010', 'memory': 1})
+                await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+def evaluate(monkeypatch, outputs, fail_fast=True):
+    executor = ScriptedExecutor(outputs)
+    monkeypatch.setattr(solution_controller, "get_executor", lambda: executor)
+    testcases = [TestCaseBase(id=n, input=str(n), output=str(n * 2), problem_id=1) for n in range(1, len(outputs) + 1)]
+    streamed = []
+    results = asyncio.run(evaluate_testcases("code", "Python", testcases, on_result=streamed.append, fail_fast=fail_fast))
+    return executor, results, streamed
+
+
+def test_cases_after_the_first_failure_are_skipped(monkeypatch):
+    executor, results, streamed = evaluate(monkeypatch, ["2", "5", "6", None])
+
+    assert [result.result for result in results] == ['AC', 'WA', 'SK', 'SK']
+    assert [result.id for result in results] == [1, 2, 3, 4]
+    assert executor.cancelled
+    # Every case is streamed once, skipped ones included
+    assert sorted(result.id for result in streamed) == [1, 2, 3, 4]
+
+
+def test_without_fail_fast_every_case_is_judged(monkeypatch):
+    _, results, _ = evaluate(monkeypatch, ["2", "5", "6"], fail_fast=False)
+    assert [result.result for result in results] == ['AC', 'WA', 'AC']
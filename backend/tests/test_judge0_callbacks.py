@@ -0,0 +1,58 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+
+import services.judge0_client as judge0_client
+from routes.judge0_callback_routes import router as judge0_callback_router
+from services.judge0_callbacks import JUDGE0_CALLBACK_CONFIG, pending_callbacks
+from services.judge0_pool import Judge0Node
+from tests.fake_judge0 import FakeJudge0
+
+
+def double_runner(source_code, stdin):
+    return 3, str(int(stdin) * 2)
+
+
+@pytest.fixture
+def fake_judge(monkeypatch):
+    app = FastAPI()
+    app.include_router(judge0_callback_router)
+    fake = FakeJudge0(runner=double_runner, callback_transport=httpx.ASGITransport(app=app))
+    monkeypatch.setitem(JUDGE0_CALLBACK_CONFIG, "url", "http://api/judge0/callback")
+    monkeypatch.setattr(judge0_client.judge0_pool, "nodes", [Judge0Node("fake", "http://judge/submissions?wait=true", {})])
+    monkeypatch.setattr(judge0_client, "_client", httpx.AsyncClient(transport=fake.transport))
+    return fake
+
+
+def run_cases(cases):
+    return asyncio.run(judge0_client.submit_cases_to_judge0("code", "Python", cases, mode="callback"))
+
+
+def test_results_arrive_through_callbacks(fake_judge):
+    cases = [(str(i), str(i * 2)) for i in range(25)] + [("7", "15")]
+    results = run_cases(cases)
+    assert [r["status"]["id"] for r in results] == [3] * 25 + [4]
+    assert results[0]["stdout"] == "0"
+    assert fake_judge.callbacks_sent == len(cases)
+    assert fake_judge.max_open_waits == 0
+    assert pending_callbacks.status()["pending"] == 0
+
+
+def test_lost_callbacks_fall_back_to_polling(fake_judge, monkeypatch):
+    fake_judge.drop_callbacks = True
+    monkeypatch.setitem(JUDGE0_CALLBACK_CONFIG, "fallback_poll_after", 0.05)
+    results = run_cases([("2", "4"), ("3", "6")])
+    assert [r["status"]["id"] for r in results] == [3, 3]
+    assert fake_judge.callbacks_sent == 0
+
+
+def test_callback_requires_secret():
+    app = FastAPI()
+    app.include_router(judge0_callback_router)
+
+    async def put():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as client:
+            return await client.put("/judge0/callback/abc?secret=wrong", json={})
+
+    assert asyncio.run(put()).status_code == 403
@@ -0,0 +1,87 @@
+import asyncio
+import subprocess
+import sys
+
+import httpx
+import pytest
+
+import services.judge0_client as judge0_client
+from services.judge0_packed import (
+    JUDGE0_PACKED_CONFIG,
+    build_packed_source,
+    encode_packed_stdin,
+    plan_packed_batches,
+    split_packed_output,
+    supports_packing
+)
+from services.judge0_pool import Judge0Node
+from tests.fake_judge0 import FakeJudge0
+
+PROGRAM = """
+import sys
+n = int(input())
+if n < 0:
+    raise ValueError("negative")
+rest = sys.stdin.read().split()
+print(n * 2, *rest, end="")
+"""
+
+
+def python_runner(source_code, stdin):
+    done = subprocess.run([sys.executable, "-c", source_code], input=stdin, capture_output=True, text=True, timeout=30)
+    return (3 if done.returncode == 0 else 11), done.stdout
+
+
+def run_harness(inputs):
+    marker = "#m"
+    status, stdout = python_runner(build_packed_source(71, PROGRAM), encode_packed_stdin(marker, inputs))
+    return status, split_packed_output(stdout, marker, len(inputs))
+
+
+def test_harness_gives_each_case_its_own_stdin_and_stdout():
+    status, frames = run_harness(["1\na b", "2", "3\nü\r\n"])
+    assert status == 3
+    assert [frames[i][0] for i in range(3)] == ["2 a b", "4", "6 ü"]
+
+
+def test_crash_keeps_the_frames_written_before_it():
+    status, frames = run_harness(["1", "-1", "3"])
+    assert status == 11
+    assert list(frames) == [0]
+
+
+def test_plan_and_unpackable_sources(monkeypatch):
+    monkeypatch.setitem(JUDGE0_PACKED_CONFIG, "max_batch_cases", 2)
+    monkeypatch.setitem(JUDGE0_PACKED_CONFIG, "max_case_bytes", 3)
+    batches, singles = plan_packed_batches(["1", "2", "3", "toolong", "5"])
+    assert batches == [[0, 1], [2, 4]]
+    assert singles == [3]
+    assert supports_packing(71, PROGRAM)
+    assert not supports_packing(71, "print(open(0).read())")
+    assert not supports_packing(54, PROGRAM)
+
+
+@pytest.fixture
+def fake_judge(monkeypatch):
+    fake = FakeJudge0(runner=python_runner)
+    monkeypatch.setattr(judge0_client.judge0_pool, "nodes", [Judge0Node("fake", "http://judge/submissions?wait=true", {})])
+    monkeypatch.setattr(judge0_client, "_client", httpx.AsyncClient(transport=fake.transport))
+    return fake
+
+
+def run_packed(cases):
+    return asyncio.run(judge0_client.run_packed_on_judge0(PROGRAM, "Python", cases, "single"))
+
+
+def test_packed_run_uses_one_submission(fake_judge):
+    results = run_packed([(str(i), None) for i in range(10)])
+    assert [r["stdout"] for r in results] == [str(i * 2) for i in range(10)]
+    assert len(fake_judge.submissions) == 1
+
+
+def test_crashed_batch_falls_back_to_single_runs(fake_judge):
+    results = run_packed([("1", None), ("-1", None), ("3", None), ("4", None)])
+    assert [r["status"]["id"] for r in results] == [3, 11, 3, 3]
+    assert results[3]["stdout"] == "8"
+    # the packed run, then cases 2-4 on their own
+    assert len(fake_judge.submissions) == 4
@@ -0,0 +1,42 @@
+import asyncio
+import httpx
+from services.judge0_pool import Judge0Node, Judge0Pool, TIER_OVERFLOW
+
+
+def make_pool(**config):
+    nodes = [
+        Judge0Node("a", "http://a/submissions?wait=true", {}),
+        Judge0Node("b", "http://b/submissions?wait=true", {}),
+        Judge0Node("rapid", "http://rapid/submissions", {}, TIER_OVERFLOW),
+    ]
+    config.setdefault("health_interval", 0)
+    return Judge0Pool(nodes, **config)
+
+
+def test_least_outstanding_then_overflow():
+    pool = make_pool(max_outstanding=1)
+    a, b, rapid = pool.nodes
+    a.outstanding = 1
+    assert pool.pick() is b
+    b.outstanding = 1
+    assert pool.pick() is rapid
+    assert a.base_url == "http://a"
+
+
+def test_ejection_and_readmission():
+    pool = make_pool(eject_after=2, ejection_time=60)
+    a, b, _ = pool.nodes
+    error = httpx.ConnectError("refused")
+    pool.record(a, error=error)
+    assert not a.ejected
+    pool.record(a, error=error)
+    assert a.ejected
+    assert all(pool.pick() is not a for _ in range(5))
+
+    # 4xx answers are the request's fault, not the node's
+    pool.record(b, response=httpx.Response(422))
+    assert b.consecutive_failures == 0
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={})))
+    assert asyncio.run(pool.check_node(client, a))
+    assert not a.ejected
@@ -0,0 +1,141 @@
+import asyncio
+import httpx
+import pytest
+from services.judge0_resilience import JudgeResilience, JudgeUnavailableError
+
+
+def response(status_code=200):
+    return httpx.Response(status_code, request=httpx.Request("POST", "http://judge/submissions"))
+
+
+def failing(status_code):
+    async def attempt(tried):
+        raise httpx.HTTPStatusError("judge error", request=response().request, response=response(status_code))
+    return attempt
+
+
+def test_retries_transient_failures():
+    calls = []
+
+    async def attempt(tried):
+        calls.append(1)
+        if len(calls) < 3:
+            raise httpx.ConnectError("refused")
+        return response()
+
+    layer = JudgeResilience(max_retries=2, backoff_base=0.001)
+    assert asyncio.run(layer.call(attempt)).status_code == 200
+    assert layer.counters["retries"] == 2
+
+
+def test_client_errors_are_not_retried():
+    layer = JudgeResilience(max_retries=2, backoff_base=0.001)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(layer.call(failing(422)))
+    assert layer.counters["retries"] == 0
+
+
+def test_breaker_opens_and_fails_fast():
+    layer = JudgeResilience(max_retries=0, breaker_min_calls=3, breaker_window=3, breaker_cooldown=60)
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(JudgeUnavailableError):
+                await layer.call(failing(503))
+        with pytest.raises(JudgeUnavailableError, match="circuit breaker"):
+            await layer.call(failing(503))
+
+    asyncio.run(scenario())
+    assert layer.breaker.state == "open"
+    assert layer.breaker.short_circuited == 1
+
+
+def test_hedged_request_wins_over_straggler():
+    layer = JudgeResilience(hedge_enabled=True, hedge_min_samples=1, hedge_min_delay=0.01, hedge_max_ratio=1)
+    layer.latency.add(0.001)
+
+    async def attempt(tried):
+        first = not tried
+        tried.add("node-%d" % len(tried))
+        await asyncio.sleep(1 if first else 0)
+        return response(201 if first else 200)
+
+    assert asyncio.run(layer.call(attempt, hedge=True)).status_code == 200
+    assert layer.counters["hedges_won"] == 1
+
+
+def counting(error):
+    calls = []
+
+    async def attempt(tried):
+        calls.append(1)
+        raise error
+    return attempt, calls
+
+
+def test_submissions_are_resent_only_when_the_judge_never_got_them():
+    layer = JudgeResilience(max_retries=2, backoff_base=0.001)
+    attempt, calls = counting(httpx.ConnectError("refused"))
+    with pytest.raises(JudgeUnavailableError):
+        asyncio.run(layer.call(attempt, idempotent=False))
+    assert len(calls) == 3
+
+    attempt, calls = counting(httpx.HTTPStatusError("busy", request=response().request, response=response(429)))
+    with pytest.raises(JudgeUnavailableError):
+        asyncio.run(layer.call(attempt, idempotent=False))
+    assert len(calls) == 3
+
+
+def test_submission_read_timeout_is_raised_without_resending():
+    layer = JudgeResilience(max_retries=2, backoff_base=0.001)
+    attempt, calls = counting(httpx.ReadTimeout("slow run"))
+    # Left to the caller, which grades it as a time limit
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(layer.call(attempt, idempotent=False))
+    assert len(calls) == 1
+
+    # Polls are safe to repeat
+    attempt, calls = counting(httpx.ReadTimeout("slow poll"))
+    with pytest.raises(JudgeUnavailableError):
+        asyncio.run(layer.call(attempt))
+    assert len(calls) == 3
+
+
+def test_submission_server_error_is_not_resent():
+    layer = JudgeResilience(max_retries=2, backoff_base=0.001)
+    attempt, calls = counting(httpx.HTTPStatusError("bad gateway", request=response().request, response=response(502)))
+    with pytest.raises(JudgeUnavailableError):
+        asyncio.run(layer.call(attempt, idempotent=False))
+    assert len(calls) == 1
+    assert layer.counters["failures"] == 1
+
+
+def test_submissions_are_never_hedged():
+    layer = JudgeResilience(hedge_enabled=True, hedge_min_samples=1, hedge_min_delay=0.01, hedge_max_ratio=1)
+    layer.latency.add(0.001)
+    calls = []
+
+    async def attempt(tried):
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return response(201)
+
+    assert asyncio.run(layer.call(attempt, hedge=True, idempotent=False)).status_code == 201
+    assert len(calls) == 1 and layer.counters["hedges"] == 0
+
+
+def test_timeouts_do_not_open_the_breaker():
+    layer = JudgeResilience(max_retries=0, breaker_min_calls=3, breaker_window=3, breaker_cooldown=60)
+
+    async def scenario():
+        for _ in range(5):
+            with pytest.raises(httpx.ReadTimeout):
+                await layer.call(counting(httpx.ReadTimeout("busy"))[0], idempotent=False)
+        for _ in range(3):
+            with pytest.raises(JudgeUnavailableError):
+                await layer.call(counting(httpx.ConnectError("down"))[0])
+
+    asyncio.run(scenario())
+    assert layer.counters["timeouts"] == 5 and layer.counters["failures"] == 3
+    # Only the connection failures opened it
+    assert layer.breaker.state == "open" and layer.breaker.opens == 1
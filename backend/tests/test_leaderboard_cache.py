@@ -0,0 +1,73 @@
+import threading
+import time
+from services.leaderboard_cache import LeaderboardCache
+
+
+def row(employee_id, passed, exec_time, solution_id):
+    return {"employee_id": employee_id, "testCasesPassed": passed, "time": exec_time, "solution_id": solution_id}
+
+
+def test_concurrent_misses_share_one_query():
+    cache = LeaderboardCache(ttl=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return [row(1, 5, 0.1, 1)]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute(1, 10, 0, compute))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 8 and all(r == results[0] for r in results)
+    assert cache.get_or_compute(1, 10, 0, compute) == results[0]
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] + cache.stats()["misses"] == 8
+
+
+def test_entries_expire_after_ttl():
+    cache = LeaderboardCache(ttl=0.02)
+    calls = []
+    compute = lambda: calls.append(1) or []
+    cache.get_or_compute(1, 10, 0, compute)
+    cache.get_or_compute(1, 10, 0, compute)
+    time.sleep(0.03)
+    cache.get_or_compute(1, 10, 0, compute)
+    assert len(calls) == 2
+
+
+def test_new_best_drops_only_affected_pages():
+    cache = LeaderboardCache(ttl=60)
+    first = [row(1, 5, 0.1, 1), row(2, 5, 0.2, 2)]
+    second = [row(3, 4, 0.1, 3), row(4, 3, 0.1, 4)]
+    third = [row(5, 1, 0.1, 5)]
+    cache.get_or_compute(1, 2, 0, lambda: first)
+    cache.get_or_compute(1, 2, 2, lambda: second)
+    cache.get_or_compute(1, 2, 4, lambda: third)
+    cache.get_or_compute(2, 2, 0, lambda: first)
+
+    # Employee 5 climbs into the second page: it and the short last page change, the first does not
+    cache.best_solution_changed(1, 5, 4, 0.05, 9)
+    pages = cache._pages[1]
+    assert set(pages) == {(2, 0)}
+    assert (2, 0) in cache._pages[2]
+
+    # Anyone appearing on a page drops it, even without moving ahead of its last row
+    cache.best_solution_changed(2, 2, 5, 0.15, 10)
+    assert 2 not in cache._pages or not cache._pages[2]
+
+
+def test_invalidation_during_query_is_not_stored():
+    cache = LeaderboardCache(ttl=60)
+
+    def compute():
+        cache.invalidate_problem(1)
+        return [row(1, 1, 1.0, 1)]
+
+    cache.get_or_compute(1, 10, 0, compute)
+    assert cache.stats()["pages"] == 0
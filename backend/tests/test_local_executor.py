@@ -0,0 +1,112 @@
+import asyncio
+import os
+import shutil
+import socket
+import sys
+import pytest
+from services import local_executor
+from services.local_executor import LocalProcessExecutor, _network_isolation_prefix
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="sandbox uses Linux rlimits/namespaces")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def executor():
+    ex = LocalProcessExecutor(max_workers=4, network_isolation="best-effort", cpu_time_limit=1, wall_time_limit=3)
+    yield ex
+    run(ex.close())
+
+
+def status_ids(results):
+    return [r["status"]["id"] for r in results]
+
+
+def test_python_accepted_and_wrong_answer(executor):
+    results = run(executor.execute_many("print(int(input()) * 2)", "Python", [("3\n", "6\n"), ("4", "9")]))
+    assert status_ids(results) == [3, 4]
+    assert results[0]["stdout"].strip() == "6"
+
+
+def test_time_limit(executor):
+    result = run(executor.execute("while True: pass", "", "Python"))
+    assert result["status"]["id"] == 5
+
+
+def test_runtime_error(executor):
+    result = run(executor.execute("raise ValueError('boom')", "", "Python"))
+    assert result["status"]["id"] == 11
+    assert "ValueError" in result["stderr"]
+
+
+@pytest.mark.skipif(shutil.which("g++") is None, reason="g++ not installed")
+def test_cpp_compiles_once_and_reports_compile_errors(executor):
+    source = "#include <iostream>\nint main(){int a; std::cin >> a; std::cout << a + 1;}"
+    assert status_ids(run(executor.execute_many(source, "C++", [("1", "2"), ("5", "6")]))) == [3, 3]
+    result = run(executor.execute("int main(){ oops }", "", "C++"))
+    assert result["status"]["id"] == 6
+    assert result["compile_output"]
+
+
+def test_unsupported_language(executor):
+    assert run(executor.execute("x", "", "Cobol")) == {"result": "Language Not Supported"}
+
+
+def test_runs_cannot_write_to_the_workdir(executor):
+    source = "import os\ntry:\n    open('scratch', 'w')\n    print('written')\nexcept OSError:\n    print('read-only')"
+    result = run(executor.execute(source, "", "Python"))
+    if os.geteuid() == 0:
+        assert result["stdout"].strip() == "read-only"
+    assert result["status"]["id"] == 3
+
+
+@pytest.mark.skipif(_network_isolation_prefix() is None, reason="unshare cannot create a network namespace here")
+def test_required_isolation_blocks_the_network():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    source = (
+        "import socket\n"
+        "try:\n"
+        f"    socket.create_connection(('127.0.0.1', {listener.getsockname()[1]}), timeout=1)\n"
+        "    print('connected')\n"
+        "except OSError:\n"
+        "    print('isolated')"
+    )
+    try:
+        for isolation, expected in (("off", "connected"), ("required", "isolated")):
+            ex = LocalProcessExecutor(max_workers=1, network_isolation=isolation)
+            try:
+                assert run(ex.execute(source, "", "Python"))["stdout"].strip() == expected
+            finally:
+                run(ex.close())
+    finally:
+        listener.close()
+
+
+def test_cancelled_run_is_reaped_before_the_workdir_goes(executor, monkeypatch):
+    workdirs = []
+
+    def mkdtemp(**kwargs):
+        workdirs.append(local_executor_mkdtemp(**kwargs))
+        return workdirs[-1]
+    local_executor_mkdtemp = local_executor.tempfile.mkdtemp
+    monkeypatch.setattr(local_executor.tempfile, "mkdtemp", mkdtemp)
+
+    async def scenario():
+        task = asyncio.create_task(executor.execute("while True: pass", "", "Python"))
+        await asyncio.sleep(0.3)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    run(scenario())
+    assert not os.path.exists(workdirs[0])
+    for entry in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            assert not os.readlink(f"/proc/{entry}/cwd").startswith(workdirs[0])
+        except OSError:
+            pass
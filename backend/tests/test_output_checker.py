@@ -0,0 +1,49 @@
+import io
+
+import pytest
+
+from services import output_checker
+from services.output_checker import OutputChecker
+
+
+def test_lines_mode_ignores_trailing_whitespace_and_blank_edges():
+    checker = OutputChecker('lines')
+    assert checker.check("\n1 2  \n3\n\n", "1 2\n3").ok
+    result = checker.check("1 2\n4\n", "1 2\n3\n")
+    assert not result.ok
+    assert result.message == "Mismatch at line 2: expected '3', found '4'"
+
+
+def test_tokens_and_float_modes():
+    assert OutputChecker('tokens').check("1\n2   3", "1 2 3\n").ok
+    assert not OutputChecker('tokens').check("1 2", "1 2 3").ok
+    checker = OutputChecker('float', 1e-3)
+    assert checker.check("0.3334 1000.4", "0.3333 1000").ok  # absolute, then relative
+    assert not checker.check("0.34", "0.3333").ok
+    assert not checker.check("abc", "1.0").ok
+
+
+def test_exact_mode_reports_line_and_column():
+    checker = OutputChecker('exact')
+    assert checker.check("a\nb\n", "a\nb\n").ok
+    assert not checker.check("a\nb", "a\nb\n").ok
+    result = checker.check("ab\ncx\n", "ab\ncd\n")
+    assert "line 2, column 2" in result.message
+
+
+@pytest.mark.parametrize('mode', ['exact', 'lines', 'tokens'])
+def test_results_do_not_depend_on_chunk_boundaries(monkeypatch, mode):
+    monkeypatch.setitem(output_checker.OUTPUT_CHECKER_CONFIG, 'chunk_size', 3)
+    expected = "".join(f"{i} {i * i}\n" for i in range(50))
+    checker = OutputChecker(mode)
+    assert checker.check(io.StringIO(expected), expected).ok
+    wrong = expected.replace("17 289", "17 288")
+    message = checker.check(wrong, io.StringIO(expected)).message
+    assert "line 18" in message
+
+
+def test_spec_and_unknown_mode():
+    assert OutputChecker('float', 0.01).spec == "float:0.01"
+    assert OutputChecker('lines', 0.01).spec == "lines"
+    with pytest.raises(ValueError):
+        OutputChecker('regex')
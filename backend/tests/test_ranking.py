@@ -0,0 +1,253 @@
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import main  # noqa: F401  (registers every model so relationships resolve)
+from database import Base
+from datetime import datetime, timedelta
+from models.employee import Employee
+from models.employee_xp_daily import EmployeeXPDaily
+from models.employee_xp_history import EmployeeXPHistory
+from models.position import Position
+from models.team import Team
+from schemas.employee_xp_history import EmployeeXPHistoryUpdate
+from controllers.employee_xp_history_controller import add_xp_record, delete_xp_record, roll_up_xp_record, update_xp_record
+from controllers.ranking_controller import (
+    get_employee_ranking,
+    get_employee_ranking_entry,
+    get_employee_rank,
+    get_ranking_around,
+    get_windowed_ranking,
+    window_start
+)
+from services.ranking_index import ranking_index
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[
+        Position.__table__, Team.__table__, Employee.__table__, EmployeeXPHistory.__table__, EmployeeXPDaily.__table__
+    ])
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def add_employees(db, *experiences, position=None, team=None):
+    employees = []
+    for index, experience in enumerate(experiences):
+        employee = Employee(id=uuid.uuid4(), email=f"e{index}@x.com", password="x",
+                            firstName=f"E{index}", lastName="Test", experience=experience,
+                            position=position, team=team)
+        db.add(employee)
+        employees.append(employee)
+    db.commit()
+    return employees
+
+
+def test_ranking_ties_share_a_rank_across_pages(db):
+    add_employees(db, 50, 40, 40, 40, 10, 0)
+
+    full = get_employee_ranking(db, limit=10)
+    assert [entry.rank for entry in full] == [1, 2, 2, 2, 5]
+
+    pages = get_employee_ranking(db, limit=2) + get_employee_ranking(db, limit=2, offset=2) + get_employee_ranking(db, limit=2, offset=4)
+    assert [(entry.id, entry.rank) for entry in pages] == [(entry.id, entry.rank) for entry in full]
+
+
+
+def test_ranking_without_a_limit_is_the_whole_ranking(db):
+    add_employees(db, *range(1, 121), 0)
+    full = get_employee_ranking(db)
+    assert len(full) == 120 and full[-1].rank == 120
+
+    ranking_index.load(db.query(Employee.id, Employee.experience))
+    try:
+        assert get_employee_ranking(db) == full
+    finally:
+        ranking_index.invalidate()
+
+def test_my_rank_counts_employees_ahead(db):
+    top, tied, _, low, idle = add_employees(db, 50, 40, 40, 10, 0)
+
+    assert get_employee_rank(db, top) == 1
+    assert get_employee_rank(db, tied) == 2
+    assert get_employee_rank(db, low) == 4
+    # Unranked employees come right after the last ranked one
+    assert get_employee_rank(db, idle) == 5
+
+
+def test_in_memory_index_serves_the_same_ranking(db):
+    employees = add_employees(db, 50, 40, 40, 40, 10, 0)
+    from_sql = get_employee_ranking(db, limit=3, offset=2)
+    ranks_from_sql = [get_employee_rank(db, employee) for employee in employees]
+
+    ranking_index.load(db.query(Employee.id, Employee.experience))
+    try:
+        assert get_employee_ranking(db, limit=3, offset=2) == from_sql
+        assert [get_employee_rank(db, employee) for employee in employees] == ranks_from_sql
+    finally:
+        ranking_index.invalidate()
+
+
+@contextmanager
+def count_queries(db):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.mark.parametrize("use_index", [False, True])
+def test_ranking_query_count_does_not_grow_with_employees(db, use_index):
+    position = Position(positionName="Engineer")
+    team = Team(name="Core")
+    employees = add_employees(db, *range(1, 61), position=position, team=team)
+    if use_index:
+        ranking_index.load(db.query(Employee.id, Employee.experience))
+
+    try:
+        counts = []
+        for limit in (5, 60):
+            db.expire_all()
+            with count_queries(db) as statements:
+                page = get_employee_ranking(db, limit=limit)
+            assert len(page) == limit
+            assert {(entry.position, entry.team) for entry in page} == {("Engineer", "Core")}
+            counts.append(len(statements))
+        assert counts[0] == counts[1] == 1
+
+        db.expire_all()
+        employee = db.get(Employee, employees[0].id)
+        with count_queries(db) as statements:
+            entry = get_employee_ranking_entry(db, employee)
+        assert (entry.rank, entry.position, entry.team) == (60, "Engineer", "Core")
+        assert len(statements) == (1 if use_index else 2)
+    finally:
+        ranking_index.invalidate()
+
+
+def daily_xp(db):
+    return {(row.employee_id, row.day): row.xp for row in db.query(EmployeeXPDaily) if row.xp}
+
+
+def test_daily_rollups_follow_history_writes(db):
+    employee, = add_employees(db, 0)
+    monday = datetime(2026, 3, 2, 12)
+    add_xp_record(db, employee.id, 40, monday - timedelta(days=1))
+    add_xp_record(db, employee.id, 100, monday)
+    add_xp_record(db, employee.id, 250, monday + timedelta(days=2))
+    # Written late: worth 50 on Tuesday, which leaves Wednesday's record worth 100
+    late = add_xp_record(db, employee.id, 150, monday + timedelta(days=1))
+    db.commit()
+    assert daily_xp(db) == {
+        (employee.id, monday.date()): 60,
+        (employee.id, monday.date() + timedelta(days=1)): 50,
+        (employee.id, monday.date() + timedelta(days=2)): 100,
+    }
+
+    roll_up_xp_record(db, late, sign=-1)
+    db.delete(late)
+    db.commit()
+    assert daily_xp(db) == {
+        (employee.id, monday.date()): 60,
+        (employee.id, monday.date() + timedelta(days=2)): 150,
+    }
+
+
+def test_first_history_record_is_not_a_lifetime_gain(db):
+    veteran, = add_employees(db, 0)
+    monday = datetime(2026, 3, 2, 12)
+    # Seeded total, no record before it: nothing was gained that day
+    add_xp_record(db, veteran.id, 5000, monday)
+    # First reward of a veteran whose earlier experience was never recorded
+    add_xp_record(db, veteran.id, 5080, monday + timedelta(days=1), gained=80)
+    db.commit()
+    assert daily_xp(db) == {(veteran.id, monday.date() + timedelta(days=1)): 80}
+
+    # A record written before the first one makes the first worth its difference
+    earlier = add_xp_record(db, veteran.id, 4900, monday - timedelta(days=1))
+    db.commit()
+    assert daily_xp(db) == {
+        (veteran.id, monday.date()): 100,
+        (veteran.id, monday.date() + timedelta(days=1)): 80,
+    }
+
+    roll_up_xp_record(db, earlier, sign=-1)
+    db.delete(earlier)
+    db.commit()
+    assert daily_xp(db) == {(veteran.id, monday.date() + timedelta(days=1)): 80}
+
+
+
+def test_awarded_experience_is_withdrawn_with_its_record(db):
+    employee, = add_employees(db, 0)
+    monday = datetime(2026, 3, 2, 12)
+    reward = add_xp_record(db, employee.id, 5100, monday, gained=100)
+    following = add_xp_record(db, employee.id, 5150, monday + timedelta(days=1), gained=50)
+    db.commit()
+    assert daily_xp(db) == {(employee.id, monday.date()): 100, (employee.id, monday.date() + timedelta(days=1)): 50}
+
+    # Set by hand, the first record is a starting total again
+    update_xp_record(db, reward.id, EmployeeXPHistoryUpdate(experience=5000))
+    assert daily_xp(db) == {(employee.id, monday.date() + timedelta(days=1)): 50}
+
+    delete_xp_record(db, following.id)
+    delete_xp_record(db, reward.id)
+    assert daily_xp(db) == {}
+
+    first = add_xp_record(db, employee.id, 5100, monday, gained=100)
+    db.commit()
+    delete_xp_record(db, first.id)
+    assert daily_xp(db) == {}
+
+
+def test_windowed_ranking_counts_only_experience_gained_in_the_window(db):
+    steady, newcomer, idle, veteran = add_employees(db, 0, 0, 0, 0)
+    week = datetime.combine(window_start("week"), datetime.min.time())
+    add_xp_record(db, steady.id, 1000, week - timedelta(days=40))
+    add_xp_record(db, steady.id, 1100, week + timedelta(hours=1))
+    add_xp_record(db, newcomer.id, 300, week + timedelta(hours=2), gained=300)
+    add_xp_record(db, idle.id, 5000, week - timedelta(days=40))
+    # First record this week, but only the reward was gained
+    add_xp_record(db, veteran.id, 9050, week + timedelta(hours=3), gained=50)
+    db.commit()
+
+    board = get_windowed_ranking(db, "week")
+    assert [(entry.id, entry.gainedExperience, entry.rank) for entry in board] == [
+        (newcomer.id, 300, 1), (steady.id, 100, 2), (veteran.id, 50, 3)
+    ]
+    assert board[0].windowStart == window_start("week")
+
+
+@pytest.mark.parametrize("use_index", [False, True])
+def test_ranking_around_matches_the_full_ranking(db, use_index):
+    employees = add_employees(db, 90, 80, 80, 80, 70, 60, 50, 0)
+    full = get_employee_ranking(db, limit=100)
+    if use_index:
+        ranking_index.load(db.query(Employee.id, Employee.experience))
+
+    try:
+        for position in (0, 2, 3, 6):
+            around = get_ranking_around(db, full[position].id, k=2)
+            assert around == full[max(position - 2, 0):position + 3]
+
+        # Unranked: after the last ranked employees
+        around = get_ranking_around(db, employees[-1].id, k=2)
+        assert around[:2] == full[-2:]
+        assert (around[-1].id, around[-1].rank) == (employees[-1].id, 8)
+    finally:
+        ranking_index.invalidate()
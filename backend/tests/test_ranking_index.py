@@ -0,0 +1,68 @@
+import random
+import uuid
+from services.ranking_index import IndexableSkipList, RankingIndex, decode_notification, encode_notifications
+
+
+def test_skip_list_matches_a_sorted_list():
+    rng = random.Random(7)
+    skip_list = IndexableSkipList(seed=3)
+    reference = []
+    for _ in range(2000):
+        key = (rng.randint(-50, 0), rng.randint(0, 10 ** 6))
+        if reference and rng.random() < 0.4:
+            key = reference[rng.randrange(len(reference))]
+            skip_list.remove(key)
+            reference.remove(key)
+        elif key not in reference:
+            skip_list.insert(key)
+            reference.append(key)
+            reference.sort()
+    assert len(skip_list) == len(reference)
+    assert skip_list.slice(0, len(reference)) == reference
+    for index in range(0, len(reference), 37):
+        assert skip_list[index] == reference[index]
+        assert skip_list.bisect_left(reference[index]) == index
+        assert skip_list.slice(index, 5) == reference[index:index + 5]
+
+
+def test_ranks_follow_sql_rank_semantics():
+    ids = sorted(uuid.uuid4() for _ in range(5))
+    index = RankingIndex()
+    index.load(zip(ids, [50, 40, 40, 10, 0]))
+
+    assert [(employee_id, rank) for employee_id, _, rank in index.page(10)] == [
+        (ids[0], 1), (ids[1], 2), (ids[2], 2), (ids[3], 4)
+    ]
+    # A tie continuing from the previous page keeps its rank
+    assert index.page(2, offset=2) == [(ids[2], 40, 2), (ids[3], 10, 4)]
+    assert index.rank_of(ids[2]) == 2
+    assert index.rank_of(ids[4]) is None
+    assert index.rank_for_experience(0) == 5
+
+    index.update(ids[3], 45)
+    index.update(ids[0], None)
+    assert [(employee_id, rank) for employee_id, _, rank in index.page(10)] == [
+        (ids[3], 1), (ids[1], 2), (ids[2], 2)
+    ]
+
+
+def test_updates_during_a_load_are_kept():
+    index = RankingIndex()
+    late = uuid.uuid4()
+
+    def rows():
+        yield uuid.uuid4(), 10
+        # Committed by a request after the load read its snapshot
+        index.update(late, 99)
+
+    index.load(rows())
+    assert index.ready and index.rank_of(late) == 1
+
+
+def test_notifications_round_trip_in_chunks():
+    ids = [uuid.uuid4() for _ in range(450)]
+    payloads = encode_notifications("worker", ids)
+    assert len(payloads) == 3 and all(len(payload) < 8000 for payload in payloads)
+    decoded = [decode_notification(payload) for payload in payloads]
+    assert {token for token, _ in decoded} == {"worker"}
+    assert [employee_id for _, chunk in decoded for employee_id in chunk] == ids
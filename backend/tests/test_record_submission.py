@@ -0,0 +1,56 @@
+import pytest
+from fastapi import HTTPException
+
+from controllers import solution_controller
+from controllers.solution_controller import record_submission
+from models.employee_problem import EmployeeProblem
+from models.problem import Problem
+from models.problem_best_solution import ProblemBestSolution
+from models.solution import Solution
+from models.solution_testcase_result import SolutionTestCaseResult
+from schemas.solution import Submission
+from tests.db_helpers import make_employee, make_problem, results
+
+
+def submission(employee, problem) -> Submission:
+    return Submission(employee_id=employee.id, problem_id=problem.id, source_code="print(int(input())*2)",
+                      language="Python", inTeam=False)
+
+
+def counters(db, problem):
+    db.expire_all()
+    stored = db.query(Problem).filter(Problem.id == problem.id).one()
+    return stored.total_submissions, stored.successful_submissions
+
+
+def test_accepted_submissions_count_every_time_and_mark_solved_once(app_db):
+    db = app_db
+    problem, employee = make_problem(db), make_employee(db)
+
+    first = record_submission(submission(employee, problem), results("AC", "AC"), db)
+    second = record_submission(submission(employee, problem), results("AC", "AC"), db)
+    record_submission(submission(employee, problem), results("AC", "WA"), db)
+
+    assert (first.status, second.status) == ("Accepted", "Accepted")
+    assert counters(db, problem) == (3, 2)
+    assert db.query(EmployeeProblem).filter(EmployeeProblem.problem_id == problem.id).count() == 1
+    assert db.query(SolutionTestCaseResult).count() == 6
+    best = db.query(ProblemBestSolution).filter(ProblemBestSolution.employee_id == employee.id).one()
+    assert best.solution_id == first.id
+
+
+def test_failed_write_leaves_nothing_behind(app_db, monkeypatch):
+    db = app_db
+    problem, employee = make_problem(db), make_employee(db)
+    rows = solution_controller.testcase_result_rows
+    # Two results at the same position: the result insert violates the primary key
+    monkeypatch.setattr(solution_controller, "testcase_result_rows",
+                        lambda solution_id, verdicts: rows(solution_id, verdicts) * 2)
+
+    with pytest.raises(HTTPException) as error:
+        record_submission(submission(employee, problem), results("AC", "AC"), db)
+
+    assert error.value.status_code == 400
+    assert counters(db, problem) == (0, 0)
+    for model in (Solution, SolutionTestCaseResult, ProblemBestSolution, EmployeeProblem):
+        assert db.query(model).count() == 0
@@ -0,0 +1,32 @@
+from services.reference_cache import ReferenceOutputCache, reference_cache_key
+
+
+def test_lru_eviction_and_problem_invalidation():
+    cache = ReferenceOutputCache(max_entries=2, path="")
+    a = reference_cache_key(1, "print(1)", "Python", "a")
+    b = reference_cache_key(1, "print(1)", "Python", "b")
+    c = reference_cache_key(2, "print(1)", "Python", "a")
+    cache.put(a, "1")
+    cache.put(b, "2")
+    assert cache.get(a) == "1"  # a is now most recently used
+    cache.put(c, "3")
+    assert cache.get(b) is None
+    cache.invalidate_problem(1)
+    assert cache.get(a) is None
+    assert cache.get(c) == "3"
+
+
+def test_key_depends_on_solution_and_language():
+    base = reference_cache_key(1, "code", "Python", "in")
+    assert base != reference_cache_key(1, "code", "C++", "in")
+    assert base != reference_cache_key(1, "other", "Python", "in")
+
+
+def test_persistent_cache_survives_restart(tmp_path):
+    path = str(tmp_path / "reference.sqlite3")
+    key = reference_cache_key(7, "print(42)", "Python", "")
+    ReferenceOutputCache(path=path).put(key, "42\n")
+    reopened = ReferenceOutputCache(path=path)
+    assert reopened.get(key) == "42\n"
+    reopened.invalidate_problem(7)
+    assert ReferenceOutputCache(path=path).get(key) is None
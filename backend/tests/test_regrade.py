@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+from controllers import regrade_controller
+from controllers.regrade_controller import _apply_batch, _claim_job, _next_batch
+from models.employee_problem import EmployeeProblem
+from models.problem import Problem
+from models.regrade_job import RegradeJob
+from models.solution import Solution
+from models.solution_testcase_result import SolutionTestCaseResult
+from models.testcase import TestCase
+from tests.db_helpers import make_employee, make_problem, make_solution, results
+
+
+def solved_by(db, problem):
+    db.expire_all()
+    return {marker.employee_id for marker in db.query(EmployeeProblem).filter(EmployeeProblem.problem_id == problem.id)}
+
+
+def start_job(db, problem, strategy="latest", **fields):
+    job = RegradeJob(problem_id=problem.id, strategy=strategy, status="running", heartbeat_at=datetime.utcnow(), **fields)
+    db.add(job)
+    db.commit()
+    return job
+
+
+def test_failing_latest_attempt_keeps_an_earlier_accepted_solve(app_db):
+    db = app_db
+    problem = make_problem(db, successful_submissions=2)
+    veteran, newcomer = make_employee(db), make_employee(db)
+    make_solution(db, veteran, problem, "Accepted")
+    latest = make_solution(db, veteran, problem, "Accepted")
+    newcomer_solution = make_solution(db, newcomer, problem, "Failed", passed=1)
+    db.add_all([EmployeeProblem(employee_id=veteran.id, problem_id=problem.id)])
+    db.commit()
+    job = start_job(db, problem)
+
+    # The veteran's latest attempt now fails, the newcomer's now passes
+    _apply_batch(job.id, problem.id, [latest, newcomer_solution], [results("AC", "WA", "AC"), results("AC", "AC", "AC")])
+
+    assert solved_by(db, problem) == {veteran.id, newcomer.id}
+    assert db.get(Solution, latest.id).status == "Failed"
+    # One Accepted lost, one gained
+    assert db.get(Problem, problem.id).successful_submissions == 2
+
+
+def test_losing_the_only_accepted_solution_removes_the_marker(app_db):
+    db = app_db
+    problem = make_problem(db, successful_submissions=1)
+    employee = make_employee(db)
+    solution = make_solution(db, employee, problem, "Accepted")
+    db.add(EmployeeProblem(employee_id=employee.id, problem_id=problem.id))
+    db.commit()
+    job = start_job(db, problem)
+
+    changed = _apply_batch(job.id, problem.id, [solution], [results("AC", "WA", "WA")])
+
+    assert changed == 1
+    assert solved_by(db, problem) == set()
+    assert db.get(Problem, problem.id).successful_submissions == 0
+    verdicts = [row.verdict for row in db.query(SolutionTestCaseResult).order_by(SolutionTestCaseResult.position)]
+    assert verdicts == ["AC", "WA", "WA"]
+
+
+def test_job_resumes_after_the_last_applied_batch(app_db, monkeypatch):
+    db = app_db
+    monkeypatch.setitem(regrade_controller.REGRADE_CONFIG, "batch_size", 2)
+    problem = make_problem(db)
+    db.add(TestCase(input="1", output="2", problem_id=problem.id))
+    solutions = [make_solution(db, make_employee(db), problem, "Failed", passed=0) for _ in range(3)]
+    job = start_job(db, problem, total=3)
+
+    first = _next_batch(job.id, problem.id, "latest")
+    assert [solution.id for solution in first] == [solution.id for solution in solutions[:2]]
+    _apply_batch(job.id, problem.id, first, [results("AC"), results("AC")])
+
+    # The worker dies; once the heartbeat is stale another worker claims the job
+    db.query(RegradeJob).filter(RegradeJob.id == job.id).update(
+        {"heartbeat_at": datetime.utcnow() - timedelta(seconds=regrade_controller.REGRADE_CONFIG["stale_after"] + 1)}
+    )
+    db.commit()
+    assert _claim_job(job.id) is not None
+
+    rest = _next_batch(job.id, problem.id, "latest")
+    assert [solution.id for solution in rest] == [solutions[2].id]
+    db.expire_all()
+    progress = db.get(RegradeJob, job.id)
+    assert (progress.processed, progress.changed, progress.last_solution_id) == (2, 2, solutions[1].id)
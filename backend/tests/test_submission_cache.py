@@ -0,0 +1,54 @@
+import asyncio
+from types import SimpleNamespace
+from services import submission_cache as cache_module
+from services.submission_cache import SubmissionResultCache, submission_cache_key
+
+
+def cases(*outputs):
+    return [SimpleNamespace(id=i, input=str(i), output=out) for i, out in enumerate(outputs)]
+
+
+def test_version_changes_with_testcases():
+    version = cache_module.testcase_set_version
+    assert version(cases("1", "2")) == version(list(reversed(cases("1", "2"))))
+    assert version(cases("1", "2")) != version(cases("1", "3"))
+    assert version(cases("1", "2")) != version(cases("1"))
+
+
+def test_identical_concurrent_submissions_share_one_run():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [{"result": "AC"}]
+
+    async def scenario():
+        cache = SubmissionResultCache(max_entries=10, ttl=0)
+        key = submission_cache_key(1, "Python", "print(1)", "v1")
+        first, second = await asyncio.gather(
+            cache.get_or_compute(key, 1, compute),
+            cache.get_or_compute(key, 1, compute),
+        )
+        third = await cache.get_or_compute(key, 1, compute)
+        cache.invalidate_problem(1)
+        fourth = await cache.get_or_compute(key, 1, compute)
+        return first, second, third, fourth
+
+    first, second, third, fourth = asyncio.run(scenario())
+    assert [first[1], second[1], third[1], fourth[1]] == [False, True, True, False]
+    assert len(calls) == 2
+
+
+def test_non_reusable_results_are_not_stored():
+    async def scenario():
+        cache = SubmissionResultCache(max_entries=10, ttl=0)
+
+        async def compute():
+            return [{"result": "SK"}]
+
+        not_sk = lambda results: all(r["result"] != "SK" for r in results)
+        await cache.get_or_compute("k", 1, compute, cacheable=not_sk)
+        return await cache.get_or_compute("k", 1, compute, cacheable=not_sk)
+
+    assert asyncio.run(scenario())[1] is False
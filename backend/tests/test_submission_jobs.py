@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+from controllers import solution_controller, testcase_controller
+from controllers.solution_controller import start_submission_job
+from controllers.testcase_controller import start_testcase_generation
+from models.testcase import TestCase
+from schemas.solution import Submission
+from schemas.testcase import TestCaseGenerationRequest
+from services.submission_jobs import SubmissionJob, SubmissionJobRegistry
+from tests.db_helpers import make_employee, make_problem, results
+
+
+async def collect(job: SubmissionJob) -> list:
+    return [message async for message in job.events()]
+
+
+def test_late_subscribers_get_the_whole_stream_replayed():
+    async def scenario():
+        job = SubmissionJob(total_testcases=2)
+        live = asyncio.create_task(collect(job))
+        await asyncio.sleep(0)
+        job.publish('testcase', {'position': 0, 'result': 'AC'})
+        job.publish('testcase', {'position': 1, 'result': 'WA'})
+        job.complete('Failed', 7, {'status': 'Failed'})
+        frames = [frame async for frame in job.sse()]
+        return await live, await collect(job), frames
+
+    live, replayed, frames = asyncio.run(scenario())
+    assert [message['event'] for message in live] == ['testcase', 'testcase', 'verdict']
+    assert replayed == live
+    assert frames[-1] == f"event: verdict\ndata: {json.dumps({'status': 'Failed'})}\n\n"
+
+
+def test_registry_forgets_finished_jobs_after_the_ttl():
+    registry = SubmissionJobRegistry(ttl=60)
+    finished, running = registry.create(), registry.create()
+    finished.complete('Accepted', 1, {})
+    finished.finished_at -= 61
+    running.finished_at = None
+
+    registry.purge_expired()
+    assert registry.get(finished.id) is None
+    assert registry.get(running.id) is running
+
+
+def test_submission_job_streams_results_then_the_verdict(app_db, monkeypatch):
+    db = app_db
+    problem, employee = make_problem(db), make_employee(db)
+    db.add_all([TestCase(problem_id=problem.id, input=str(n), output=str(n * 2)) for n in (1, 2)])
+    db.commit()
+
+    async def judge(submission, testcases, checker, on_result=None):
+        verdicts = results("AC", "AC")
+        for result in verdicts:
+            on_result(result)
+        return verdicts
+    monkeypatch.setattr(solution_controller, "judge_submission", judge)
+
+    async def scenario():
+        submission = Submission(employee_id=employee.id, problem_id=problem.id, source_code="print(1)",
+                                language="Python", inTeam=False)
+        job = start_submission_job(submission, db)
+        await job.task
+        return job, await collect(job)
+
+    job, events = asyncio.run(scenario())
+    assert job.status == 'completed' and job.verdict == 'Accepted'
+    assert [message['event'] for message in events] == ['testcase', 'testcase', 'verdict']
+    assert events[-1]['data']['solution_id'] == job.solution_id
+
+
+class EchoExecutor:
+    async def execute_many(self, source_code, language, cases, on_result=None, **options):
+        outputs = []
+        for index, (stdin, _) in enumerate(cases):
+            outputs.append({'status': {'id': 3}, 'stdout': stdin * 2, 'time': '0.001', 'memory': 1})
+            on_result(index, outputs[-1])
+        return outputs
+
+
+def test_generation_job_ends_its_stream_with_done(app_db, monkeypatch):
+    db = app_db
+    problem = make_problem(db, solution="print(input() * 2)")
+    monkeypatch.setattr(testcase_controller, "get_executor", lambda: EchoExecutor())
+
+    async def scenario():
+        job = start_testcase_generation(problem.id, TestCaseGenerationRequest(inputs=["ab", "cd"]), db)
+        await job.task
+        return job, await collect(job)
+
+    job, events = asyncio.run(scenario())
+    assert job.status == 'completed'
+    assert [message['event'] for message in events] == ['testcase', 'testcase', 'done']
+    assert events[-1]['data']['created'] == 2
+    db.expire_all()
+    assert sorted(case.output for case in db.query(TestCase).filter(TestCase.problem_id == problem.id)) == ["abab", "cdcd"]
@@ -53,6 +53,7 @@ const ActionButtons = ({ code, problemId, employeeId, language }: ActionButtonsP
       console.log(language);
 
     try {
+      const token = localStorage.getItem("token");
       const response = await axios.post(
         `${import.meta.env.VITE_BACKEND_URL}/solutions/test`,
         {
@@ -60,7 +61,8 @@ const ActionButtons = ({ code, problemId, employeeId, language }: ActionButtonsP
           source_code: code,
           input: customInput,
           language: language,
-        }
+        },
+        { headers: { Authorization: `Bearer ${token}` } }
       );
       const result: TestCaseResult = response.data;
       let customMessage = '';